@@ -1,5 +1,5 @@
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 import uvicorn
@@ -9,6 +9,13 @@ import os
 import logging
 from datetime import datetime
 from core.llm_router import LLMRouter
+# Registers the task-run counters served at /metrics
+from core import task_metrics  # noqa: F401
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+except ImportError:  # pragma: no cover - optional dependency
+    generate_latest = None
 
 # Configure logging
 logging.basicConfig(
@@ -296,11 +303,18 @@ async def get_daily_metrics():
     """Get daily metrics"""
     conn = get_db_connection()
     try:
-        metrics = conn.execute("SELECT * FROM metrics_daily ORDER BY day").fetchall()
+        metrics = conn.execute("SELECT * FROM metrics_daily_avg ORDER BY day").fetchall()
         return [dict(metric) for metric in metrics]
     finally:
         conn.close()
 
+@app.get("/metrics")
+async def get_prometheus_metrics():
+    """Expose in-process counters, including core.task_metrics, in the Prometheus text format"""
+    if generate_latest is None:
+        raise HTTPException(status_code=503, detail="prometheus_client is not installed.")
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/api/policy")
 async def get_policy():
     """Get current policy configuration"""
@@ -1,6 +1,16 @@
-# Database connection pool
-from .database import db_pool
-# Redis connection pool
-from .redis_pool import redis_pool
+# The pools are created on first access rather than when core is imported,
+# so that modules like core.policy don't pull in sqlite, redis and their
+# config just by living in this package
 
-__all__ = ['db_pool', 'redis_pool']
\ No newline at end of file
+def __getattr__(name):
+    if name == "db_pool":
+        # Database connection pool
+        from .database import db_pool
+        return db_pool
+    if name == "redis_pool":
+        # Redis connection pool
+        from .redis_pool import get_redis_pool
+        return get_redis_pool()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = ['db_pool', 'redis_pool']
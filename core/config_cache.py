@@ -0,0 +1,105 @@
+"""
+Cached loading of YAML configuration files.
+
+configs/policy.yaml is read by the policy engine and by the Redis and
+database pools at startup. Parsing YAML is slow compared to JSON, so each
+parsed file is kept next to it in a JSON sidecar (``<file>.cache.json``)
+stamped with the source's mtime and size; the YAML is only parsed again
+when the file changes, and then with libyaml's C loader when PyYAML was
+built with it. Any problem with the sidecar falls back to parsing
+the YAML directly. Within a process, each version of a file is loaded only
+once and the same document is handed to every caller, so callers must not
+modify it.
+"""
+
+import functools
+import json
+import logging
+import os
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+CACHE_SUFFIX = ".cache.json"
+
+
+def _parse_yaml(f) -> Any:
+    """Parse YAML from a binary file, with libyaml's C loader if available"""
+    # PyYAML is only needed when a sidecar is missing or stale, so it isn't
+    # imported until then
+    import yaml
+    try:
+        from yaml import CSafeLoader as loader
+    except ImportError:  # pragma: no cover - PyYAML built without libyaml
+        from yaml import SafeLoader as loader
+    return yaml.load(f, Loader=loader)
+
+
+def _read_sidecar(cache_path: str, stamp: list) -> Any:
+    """Return the cached document, or raise if the sidecar is missing or stale"""
+    with open(cache_path, "rb") as f:
+        cached = json.load(f)
+    if cached["stamp"] != stamp:
+        raise ValueError("stale sidecar")
+    return cached["data"]
+
+
+def _write_sidecar(cache_path: str, stamp: list, data: Any):
+    """Atomically write data to the sidecar, if it survives a JSON round trip"""
+    try:
+        text = json.dumps({"stamp": stamp, "data": data})
+        # YAML can hold things JSON can't (non-string keys, dates); those
+        # documents are simply not cached
+        if json.loads(text)["data"] != data:
+            return
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError, ValueError) as e:
+        logger.debug("Could not write config cache", extra={
+            "event": "config_cache_write_failed",
+            "cache_path": cache_path,
+            "error": str(e)
+        })
+
+
+@functools.lru_cache(maxsize=8)
+def _load(path: str, mtime_ns: int, size: int) -> Any:
+    """Load one version of a YAML file; the stamp arguments key the memo"""
+    stamp = [mtime_ns, size]
+    cache_path = path + CACHE_SUFFIX
+    try:
+        return _read_sidecar(cache_path, stamp)
+    except Exception:
+        pass
+
+    # Bytes go straight to libyaml's scanner without a Python-level decode
+    with open(path, "rb") as f:
+        data = _parse_yaml(f)
+    _write_sidecar(cache_path, stamp, data)
+    return data
+
+
+def load_yaml(path: str) -> Any:
+    """
+    Load a YAML file, reusing this process's copy or its JSON sidecar when
+    either is up to date.
+
+    Args:
+        path: Path to the YAML file
+
+    Returns:
+        The parsed document, shared with other callers; treat it as read-only
+
+    Raises:
+        OSError: If the YAML file can't be read
+        yaml.YAMLError: If the YAML file can't be parsed
+    """
+    st = os.stat(path)
+    return _load(os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+def invalidate():
+    """Forget the documents loaded in this process"""
+    _load.cache_clear()
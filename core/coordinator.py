@@ -1,12 +1,12 @@
 from typing import Dict, Any
 import logging
-import json
 import os
 import time
 import redis
 
 # Local imports
-from . import redis_pool
+from .fastjson import dumps as _dumps
+from .redis_pool import get_redis_pool
 from .exceptions import RedisError
 
 class Coordinator:
@@ -24,7 +24,7 @@ class Coordinator:
         
         # Connect to Redis for message queue
         try:
-            self.redis_client = redis_pool.get_connection()
+            self.redis_client = get_redis_pool().get_connection(verify=True)
         except RedisError as e:
             self.logger.error("Failed to initialize Coordinator due to Redis error", extra={
                 "event": "coordinator_init_redis_error",
@@ -85,7 +85,7 @@ class Coordinator:
         enqueue_start = time.time()
         try:
             self.logger.debug(f"Enqueuing task {task_id} to Redis queue: {self.task_queue}")
-            self.redis_client.lpush(self.task_queue, json.dumps(task_spec))
+            self.redis_client.lpush(self.task_queue, _dumps(task_spec))
             enqueue_time = (time.time() - enqueue_start) * 1000
             self.total_enqueue_time_ms += enqueue_time
             self.total_tasks_enqueued += 1
@@ -111,7 +111,8 @@ class Coordinator:
             }
         except (redis.ConnectionError, redis.TimeoutError, redis.RedisError) as e:
             return self._handle_task_error(task_id, e, start_time, enqueue_start)
-        except json.JSONDecodeError as e:
+        except TypeError as e:
+            # task_spec isn't JSON-serializable
             return self._handle_task_error(task_id, e, start_time, enqueue_start)
         except Exception as e:
             return self._handle_task_error(task_id, e, start_time, enqueue_start)
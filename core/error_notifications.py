@@ -2,18 +2,45 @@
 Error notification system for the agentic system.
 """
 
+import asyncio
 import logging
 import smtplib
 import subprocess
-from typing import Dict, Any, Optional, List
+import threading
+import time
+import weakref
+from typing import Dict, Any, Optional, List, Tuple
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from .exceptions import AgenticError
+from .pidfd_dispatch import run_shell
+
+try:
+    import aiosmtplib
+except ImportError:  # pragma: no cover - optional dependency
+    aiosmtplib = None
+
+# Subject prefixes for the known severity levels
+_SEVERITY_PREFIX = {
+    "error": "[ERROR]",
+    "warning": "[WARNING]",
+    "info": "[INFO]",
+}
+
+# Upper bound on distinct messages tracked for duplicate suppression
+_DEDUP_MAX_ENTRIES = 1024
 
 
 class ErrorNotificationManager:
     """Manager for sending error notifications."""
     
+    __slots__ = (
+        'smtp_host', 'smtp_port', 'smtp_username', 'smtp_password',
+        'from_email', 'to_emails', 'notification_commands', 'logger',
+        'dedup_window_seconds', '_email_ready', '_to_line', '_smtp', '_smtp_lock', '_smtp_loop',
+        '_dedup', '_dedup_lock', '_dedup_swept', '_dedup_flusher'
+    )
+    
     def __init__(
         self,
         smtp_host: Optional[str] = None,
@@ -22,7 +49,8 @@ class ErrorNotificationManager:
         smtp_password: Optional[str] = None,
         from_email: Optional[str] = None,
         to_emails: Optional[List[str]] = None,
-        notification_commands: Optional[List[str]] = None
+        notification_commands: Optional[List[str]] = None,
+        dedup_window_seconds: float = 60.0
     ):
         """
         Initialize the error notification manager.
@@ -35,6 +63,8 @@ class ErrorNotificationManager:
             from_email: Sender email address
             to_emails: List of recipient email addresses
             notification_commands: List of shell commands to execute for notifications
+            dedup_window_seconds: Window in which identical notifications are
+                coalesced into one delivery plus a repeat count (0 disables)
         """
         self.smtp_host = smtp_host
         self.smtp_port = smtp_port
@@ -43,7 +73,141 @@ class ErrorNotificationManager:
         self.from_email = from_email
         self.to_emails = to_emails or []
         self.notification_commands = notification_commands or []
+        self.dedup_window_seconds = dedup_window_seconds
         self.logger = logging.getLogger("error_notifications")
+        
+        # Email configuration is fixed after init, so check it once
+        self._email_ready = bool(smtp_host and smtp_port and from_email and self.to_emails)
+        self._to_line = ', '.join(self.to_emails)
+        
+        # Persistent async SMTP connection, opened lazily by the async path.
+        # The connection and its lock belong to one event loop, so both are
+        # created on first use and replaced when a different loop sends
+        self._smtp = None
+        self._smtp_lock: Optional[asyncio.Lock] = None
+        self._smtp_loop: Optional[weakref.ref] = None
+        
+        # Duplicate suppression: (severity, title, message) -> [suppressed count, first seen]
+        self._dedup: Dict[Tuple[str, str, str], List[float]] = {}
+        self._dedup_lock = threading.Lock()
+        self._dedup_swept = time.monotonic()
+        # Delivers repeat counts once a burst has stopped; started with the
+        # first suppressed duplicate and exits when nothing is tracked
+        self._dedup_flusher = None
+    
+    def _sweep_dedup(self, now: float, force: bool = False) -> List[Tuple[str, str, str]]:
+        """
+        Drop expired dedup entries, collecting summaries for suppressed repeats.
+        
+        Must be called with the dedup lock held.
+        
+        Args:
+            now: Current monotonic time
+            force: Expire every entry regardless of age
+            
+        Returns:
+            List of (title, message, severity) summaries to deliver
+        """
+        window = self.dedup_window_seconds
+        pending = []
+        for key, (count, first_seen) in list(self._dedup.items()):
+            if force or now - first_seen >= window:
+                del self._dedup[key]
+                if count:
+                    severity, title, message = key
+                    pending.append((
+                        title,
+                        f"{message}\n\n(occurred {int(count)} more times in last {window:g}s)",
+                        severity
+                    ))
+        self._dedup_swept = now
+        return pending
+    
+    def _dedup_admit(self, title: str, message: str, severity: str) -> Tuple[bool, List[Tuple[str, str, str]]]:
+        """
+        Decide whether a notification should be delivered or coalesced.
+        
+        Args:
+            title: The notification title
+            message: The notification message
+            severity: The severity level
+            
+        Returns:
+            Tuple of (deliver this notification, summaries of expired repeats)
+        """
+        window = self.dedup_window_seconds
+        if window <= 0:
+            return True, []
+        
+        now = time.monotonic()
+        key = (severity, title, message)
+        with self._dedup_lock:
+            pending = self._sweep_dedup(now) if now - self._dedup_swept >= window else []
+            entry = self._dedup.get(key)
+            if entry is not None:
+                if now - entry[1] < window:
+                    entry[0] += 1
+                    if self._dedup_flusher is None:
+                        self._dedup_flusher = threading.Thread(
+                            target=self._flush_suppressed_loop, name="notification-dedup", daemon=True
+                        )
+                        self._dedup_flusher.start()
+                    return False, pending
+                # Expired since the last sweep; summarise it and start afresh
+                del self._dedup[key]
+                if entry[0]:
+                    pending.append((
+                        title,
+                        f"{message}\n\n(occurred {int(entry[0])} more times in last {window:g}s)",
+                        severity
+                    ))
+            if len(self._dedup) < _DEDUP_MAX_ENTRIES:
+                self._dedup[key] = [0, now]
+        return True, pending
+    
+    def flush_suppressed(self, force: bool = False) -> int:
+        """
+        Deliver summaries for duplicate notifications suppressed so far.
+        
+        Args:
+            force: Flush every tracked notification, not only expired ones
+            
+        Returns:
+            Number of summary notifications delivered
+        """
+        with self._dedup_lock:
+            pending = self._sweep_dedup(time.monotonic(), force=force)
+        for title, message, severity in pending:
+            self._deliver(title, message, severity)
+        return len(pending)
+    
+    def _flush_suppressed_loop(self):
+        """Flush expired repeat counts every window until nothing is tracked"""
+        while True:
+            time.sleep(self.dedup_window_seconds)
+            self.flush_suppressed()
+            with self._dedup_lock:
+                if not self._dedup:
+                    self._dedup_flusher = None
+                    return
+    
+    def _build_email(self, subject: str, message: str) -> MIMEMultipart:
+        """
+        Build the MIME message for an email notification.
+        
+        Args:
+            subject: The email subject
+            message: The email message
+            
+        Returns:
+            The assembled MIME message
+        """
+        msg = MIMEMultipart()
+        msg['From'] = self.from_email
+        msg['To'] = self._to_line
+        msg['Subject'] = subject
+        msg.attach(MIMEText(message, 'plain'))
+        return msg
     
     def send_email_notification(self, subject: str, message: str) -> bool:
         """
@@ -57,19 +221,13 @@ class ErrorNotificationManager:
             True if the email was sent successfully, False otherwise
         """
         # Check if email configuration is available
-        if not all([self.smtp_host, self.smtp_port, self.from_email, self.to_emails]):
+        if not self._email_ready:
             self.logger.warning("Email notification configuration is incomplete")
             return False
         
         try:
             # Create message
-            msg = MIMEMultipart()
-            msg['From'] = self.from_email
-            msg['To'] = ', '.join(self.to_emails)
-            msg['Subject'] = subject
-            
-            # Add message body
-            msg.attach(MIMEText(message, 'plain'))
+            msg = self._build_email(subject, message)
             
             # Connect to SMTP server and send email
             server = smtplib.SMTP(self.smtp_host, self.smtp_port)
@@ -134,16 +292,40 @@ class ErrorNotificationManager:
         """
         Send a notification through all configured channels.
         
+        Identical notifications repeated within the dedup window are
+        suppressed and later delivered once with a repeat count.
+        
         Args:
             title: The notification title
             message: The notification message
             severity: The severity level (error, warning, info)
             
+        Returns:
+            True if at least one notification channel succeeded (or the
+            notification was coalesced), False otherwise
+        """
+        admitted, pending = self._dedup_admit(title, message, severity)
+        for summary in pending:
+            self._deliver(*summary)
+        if not admitted:
+            return True
+        return self._deliver(title, message, severity)
+    
+    def _deliver(self, title: str, message: str, severity: str) -> bool:
+        """
+        Deliver a notification through all configured channels.
+        
+        Args:
+            title: The notification title
+            message: The notification message
+            severity: The severity level
+            
         Returns:
             True if at least one notification channel succeeded, False otherwise
         """
-        full_message = f"[{severity.upper()}] {title}\n\n{message}"
-        email_subject = f"[{severity.upper()}] {title}"
+        prefix = _SEVERITY_PREFIX.get(severity) or f"[{severity.upper()}]"
+        email_subject = f"{prefix} {title}"
+        full_message = f"{email_subject}\n\n{message}"
         
         # Send email notification
         email_success = self.send_email_notification(email_subject, full_message)
@@ -153,6 +335,205 @@ class ErrorNotificationManager:
         
         # Return success if at least one channel succeeded
         return email_success or command_success
+    
+    def _smtp_lock_for_loop(self) -> asyncio.Lock:
+        """
+        Get the SMTP lock for the running event loop.
+        
+        A connection opened on another loop can't be used from this one, so
+        it is dropped along with that loop's lock.
+        
+        Returns:
+            The lock guarding the SMTP connection on the running loop
+        """
+        loop = asyncio.get_running_loop()
+        if self._smtp_loop is None or self._smtp_loop() is not loop:
+            self._smtp_loop = weakref.ref(loop)
+            self._smtp_lock = asyncio.Lock()
+            self._smtp = None
+        return self._smtp_lock
+    
+    async def _get_smtp(self):
+        """
+        Get the persistent async SMTP connection, connecting on first use.
+        
+        Returns:
+            A connected aiosmtplib.SMTP client
+        """
+        if self._smtp is None or not self._smtp.is_connected:
+            smtp = aiosmtplib.SMTP(
+                hostname=self.smtp_host,
+                port=self.smtp_port,
+                start_tls=bool(self.smtp_username and self.smtp_password)
+            )
+            await smtp.connect()
+            if self.smtp_username and self.smtp_password:
+                await smtp.login(self.smtp_username, self.smtp_password)
+            self._smtp = smtp
+        return self._smtp
+    
+    async def send_email_notification_async(self, subject: str, message: str) -> bool:
+        """
+        Send an email notification over a persistent async SMTP connection.
+        
+        Falls back to running the blocking implementation in a worker thread
+        when aiosmtplib is not installed.
+        
+        Args:
+            subject: The email subject
+            message: The email message
+            
+        Returns:
+            True if the email was sent successfully, False otherwise
+        """
+        if aiosmtplib is None:
+            return await asyncio.to_thread(self.send_email_notification, subject, message)
+        
+        if not self._email_ready:
+            self.logger.warning("Email notification configuration is incomplete")
+            return False
+        
+        try:
+            msg = self._build_email(subject, message)
+            async with self._smtp_lock_for_loop():
+                smtp = await self._get_smtp()
+                await smtp.send_message(msg)
+            
+            self.logger.info(f"Email notification sent: {subject}")
+            return True
+        except Exception as e:
+            # Drop the connection so the next send reconnects
+            self._smtp = None
+            self.logger.error(f"Failed to send email notification: {e}")
+            return False
+    
+    async def _run_command_async(self, command: str, message: str) -> bool:
+        """
+        Run a single notification command on the current event loop.
+        
+        Args:
+            command: The command template
+            message: The notification message
+            
+        Returns:
+            True if the command exited successfully, False otherwise
+        """
+        try:
+            formatted_command = command.format(message=message)
+            try:
+                returncode, stderr = await run_shell(formatted_command, timeout=30)
+            except asyncio.TimeoutError:
+                self.logger.error(f"Notification command timed out: {command}")
+                return False
+            
+            if returncode != 0:
+                self.logger.error(
+                    f"Notification command failed: {formatted_command} "
+                    f"Error: {stderr}"
+                )
+                return False
+            
+            self.logger.info(f"Notification command executed: {formatted_command}")
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to execute notification command {command}: {e}")
+            return False
+    
+    async def send_command_notification_async(self, message: str) -> bool:
+        """
+        Send a notification via shell commands, running them concurrently.
+        
+        Args:
+            message: The notification message
+            
+        Returns:
+            True if the commands were executed successfully, False otherwise
+        """
+        if not self.notification_commands:
+            self.logger.warning("No notification commands configured")
+            return False
+        
+        results = await asyncio.gather(
+            *(self._run_command_async(command, message) for command in self.notification_commands)
+        )
+        return all(results)
+    
+    async def send_notification_async(self, title: str, message: str, severity: str = "error") -> bool:
+        """
+        Send a notification through all configured channels on one event loop.
+        
+        Args:
+            title: The notification title
+            message: The notification message
+            severity: The severity level (error, warning, info)
+            
+        Returns:
+            True if at least one notification channel succeeded (or the
+            notification was coalesced), False otherwise
+        """
+        admitted, pending = self._dedup_admit(title, message, severity)
+        for summary in pending:
+            await self._deliver_async(*summary)
+        if not admitted:
+            return True
+        return await self._deliver_async(title, message, severity)
+    
+    async def _deliver_async(self, title: str, message: str, severity: str) -> bool:
+        """
+        Deliver a notification through all configured channels concurrently.
+        
+        Args:
+            title: The notification title
+            message: The notification message
+            severity: The severity level
+            
+        Returns:
+            True if at least one notification channel succeeded, False otherwise
+        """
+        prefix = _SEVERITY_PREFIX.get(severity) or f"[{severity.upper()}]"
+        email_subject = f"{prefix} {title}"
+        full_message = f"{email_subject}\n\n{message}"
+        
+        email_success, command_success = await asyncio.gather(
+            self.send_email_notification_async(email_subject, full_message),
+            self.send_command_notification_async(full_message)
+        )
+        return email_success or command_success
+    
+    def send_notification_threadsafe(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        title: str,
+        message: str,
+        severity: str = "error"
+    ) -> bool:
+        """
+        Send a notification from a non-async caller via a running event loop.
+        
+        Args:
+            loop: The event loop that owns the async SMTP connection
+            title: The notification title
+            message: The notification message
+            severity: The severity level (error, warning, info)
+            
+        Returns:
+            True if at least one notification channel succeeded, False otherwise
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self.send_notification_async(title, message, severity), loop
+        )
+        return future.result()
+    
+    async def close(self):
+        """Close the persistent async SMTP connection, if open."""
+        if self._smtp is not None:
+            # A connection opened on another loop can't be awaited here
+            if self._smtp_loop() is asyncio.get_running_loop():
+                try:
+                    await self._smtp.quit()
+                except Exception as e:
+                    self.logger.debug(f"Error closing SMTP connection: {e}")
+            self._smtp = None
 
 
 # Global instance
@@ -166,7 +547,8 @@ def initialize_notification_manager(
     smtp_password: Optional[str] = None,
     from_email: Optional[str] = None,
     to_emails: Optional[List[str]] = None,
-    notification_commands: Optional[List[str]] = None
+    notification_commands: Optional[List[str]] = None,
+    dedup_window_seconds: float = 60.0
 ):
     """
     Initialize the global notification manager.
@@ -179,6 +561,7 @@ def initialize_notification_manager(
         from_email: Sender email address
         to_emails: List of recipient email addresses
         notification_commands: List of shell commands to execute for notifications
+        dedup_window_seconds: Window in which identical notifications are coalesced
     """
     global _notification_manager
     _notification_manager = ErrorNotificationManager(
@@ -188,7 +571,8 @@ def initialize_notification_manager(
         smtp_password=smtp_password,
         from_email=from_email,
         to_emails=to_emails,
-        notification_commands=notification_commands
+        notification_commands=notification_commands,
+        dedup_window_seconds=dedup_window_seconds
     )
 
 
@@ -12,6 +12,12 @@ from threading import Lock
 class ErrorRateLimiter:
     """Rate limiter for error logging to prevent log flooding."""
     
+    __slots__ = (
+        'max_errors_per_second', 'max_errors_per_minute', 'window_size_seconds',
+        'error_timestamps', 'error_counts_per_second', 'error_counts_per_minute',
+        'lock', 'logger'
+    )
+    
     def __init__(
         self,
         max_errors_per_second: int = 10,
@@ -72,11 +78,11 @@ class ErrorRateLimiter:
             
             # Check rate limits
             if self.error_counts_per_second.get(current_second, 0) >= self.max_errors_per_second:
-                self.logger.debug(f"Rate limit exceeded for errors per second: {error_type}")
+                self.logger.debug("Rate limit exceeded for errors per second: %s", error_type)
                 return False
             
             if self.error_counts_per_minute.get(current_minute, 0) >= self.max_errors_per_minute:
-                self.logger.debug(f"Rate limit exceeded for errors per minute: {error_type}")
+                self.logger.debug("Rate limit exceeded for errors per minute: %s", error_type)
                 return False
             
             # Update counts
@@ -110,6 +116,14 @@ class ErrorRateLimiter:
 class AdaptiveErrorRateLimiter:
     """Adaptive error rate limiter that adjusts limits based on error patterns."""
     
+    __slots__ = (
+        'initial_max_errors_per_second', 'initial_max_errors_per_minute',
+        'window_size_seconds', 'adjustment_threshold', 'adjustment_factor',
+        'max_errors_per_second', 'max_errors_per_minute',
+        'error_timestamps', 'error_counts_per_second', 'error_counts_per_minute',
+        'error_type_counts', 'lock', 'logger'
+    )
+    
     def __init__(
         self,
         initial_max_errors_per_second: int = 10,
@@ -187,11 +201,11 @@ class AdaptiveErrorRateLimiter:
             
             # Check rate limits
             if self.error_counts_per_second.get(current_second, 0) >= self.max_errors_per_second:
-                self.logger.debug(f"Rate limit exceeded for errors per second: {error_type}")
+                self.logger.debug("Rate limit exceeded for errors per second: %s", error_type)
                 return False
             
             if self.error_counts_per_minute.get(current_minute, 0) >= self.max_errors_per_minute:
-                self.logger.debug(f"Rate limit exceeded for errors per minute: {error_type}")
+                self.logger.debug("Rate limit exceeded for errors per minute: %s", error_type)
                 return False
             
             # Update counts
@@ -225,8 +239,8 @@ class AdaptiveErrorRateLimiter:
             self.max_errors_per_second = int(self.max_errors_per_second * self.adjustment_factor)
             self.max_errors_per_minute = int(self.max_errors_per_minute * self.adjustment_factor)
             self.logger.info(
-                f"Adjusted rate limits upward: {self.max_errors_per_second}/sec, "
-                f"{self.max_errors_per_minute}/min"
+                "Adjusted rate limits upward: %d/sec, %d/min",
+                self.max_errors_per_second, self.max_errors_per_minute
             )
         elif second_usage < 0.1 and minute_usage < 0.1:
             # Decrease limits if usage is consistently low, but not below initial values
@@ -243,8 +257,8 @@ class AdaptiveErrorRateLimiter:
                 self.max_errors_per_second = new_second_limit
                 self.max_errors_per_minute = new_minute_limit
                 self.logger.info(
-                    f"Adjusted rate limits downward: {self.max_errors_per_second}/sec, "
-                    f"{self.max_errors_per_minute}/min"
+                    "Adjusted rate limits downward: %d/sec, %d/min",
+                    self.max_errors_per_second, self.max_errors_per_minute
                 )
     
     def get_stats(self) -> Dict[str, int]:
@@ -2,17 +2,29 @@
 Error recovery mechanisms for the agentic system.
 """
 
+import asyncio
+import inspect
+import math
 import time
 import random
 import logging
+import threading
 from typing import Callable, Any, Optional, Tuple, Dict
 from functools import wraps
-from .exceptions import AgenticError, DatabaseError, RedisError, APIError, FileIOError
+from .exceptions import (
+    AgenticError, DatabaseError, RedisError, APIError, FileIOError,
+    ValidationError, ConfigurationError
+)
+
+# Monotonic clock for elapsed-time checks; immune to wall-clock jumps
+_now = time.monotonic
 
 
 class ErrorRecoveryStrategy:
     """Base class for error recovery strategies."""
     
+    __slots__ = ('name', 'logger')
+    
     def __init__(self, name: str):
         """
         Initialize the error recovery strategy.
@@ -49,37 +61,27 @@ class ErrorRecoveryStrategy:
         raise NotImplementedError
 
 
-class ValidationError(AgenticError):
-    """Exception raised for validation errors."""
-    
-    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
-        """
-        Initialize the validation error.
-        
-        Args:
-            message: The error message
-            details: Additional details about the error
-        """
-        super().__init__(message, "VALIDATION_ERROR", None, details)
-
-
-class ConfigurationError(AgenticError):
-    """Exception raised for configuration errors."""
-    
-    def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
-        """
-        Initialize the configuration error.
-        
-        Args:
-            message: The error message
-            details: Additional details about the error
-        """
-        super().__init__(message, "CONFIGURATION_ERROR", None, details)
-
-
 class ExponentialBackoffStrategy(ErrorRecoveryStrategy):
     """Error recovery strategy using exponential backoff with jitter."""
     
+    __slots__ = ('base_delay', 'max_delay', 'multiplier', 'jitter', '_delays')
+    
+    # Errors that indicate a permanent failure and are never retried
+    _NO_RETRY = (ValidationError, ConfigurationError)
+    
+    # Common transient errors that are worth retrying
+    _TRANSIENT = (
+        DatabaseError,
+        RedisError,
+        APIError,
+        FileIOError,
+        ConnectionError,
+        TimeoutError
+    )
+    
+    # Exact-type fast path; types hash by identity
+    _TRANSIENT_TYPES = frozenset(_TRANSIENT)
+    
     def __init__(
         self,
         name: str = "exponential_backoff",
@@ -103,6 +105,17 @@ class ExponentialBackoffStrategy(ErrorRecoveryStrategy):
         self.max_delay = max_delay
         self.multiplier = multiplier
         self.jitter = jitter
+        
+        # Parameters are fixed, so precompute the capped delay for each attempt
+        # until the cap is reached; later attempts reuse the last entry
+        delays = []
+        delay = base_delay
+        while len(delays) < 64:
+            delays.append(min(delay, max_delay))
+            if delay >= max_delay:
+                break
+            delay *= multiplier
+        self._delays = tuple(delays)
     
     def should_retry(self, error: Exception, attempt: int) -> bool:
         """
@@ -115,24 +128,17 @@ class ExponentialBackoffStrategy(ErrorRecoveryStrategy):
         Returns:
             True if the operation should be retried, False otherwise
         """
+        # Exact match on a transient type is the common case
+        if type(error) in self._TRANSIENT_TYPES:
+            return True
+        
         # Retry on any AgenticError except those that indicate a permanent failure
         if isinstance(error, AgenticError):
             # Don't retry on validation errors or configuration errors
-            if isinstance(error, (ValidationError, ConfigurationError)):
-                return False
-            return True
-        
-        # Retry on common transient errors
-        transient_errors = (
-            DatabaseError,
-            RedisError,
-            APIError,
-            FileIOError,
-            ConnectionError,
-            TimeoutError
-        )
+            return not isinstance(error, self._NO_RETRY)
         
-        return isinstance(error, transient_errors)
+        # Retry on subclasses of common transient errors
+        return isinstance(error, self._TRANSIENT)
     
     def get_delay(self, attempt: int) -> float:
         """
@@ -144,8 +150,9 @@ class ExponentialBackoffStrategy(ErrorRecoveryStrategy):
         Returns:
             The delay in seconds
         """
-        # Calculate exponential backoff delay
-        delay = min(self.base_delay * (self.multiplier ** (attempt - 1)), self.max_delay)
+        # Look up the exponential backoff delay
+        delays = self._delays
+        delay = delays[min(max(attempt - 1, 0), len(delays) - 1)]
         
         # Add jitter if enabled
         if self.jitter:
@@ -157,6 +164,11 @@ class ExponentialBackoffStrategy(ErrorRecoveryStrategy):
 class CircuitBreaker:
     """Circuit breaker pattern implementation for error recovery."""
     
+    __slots__ = (
+        'name', 'failure_threshold', 'recovery_timeout', 'expected_exception',
+        'failure_count', 'last_failure_time', 'state', 'logger', '_lock', '_reopen_at'
+    )
+    
     def __init__(
         self,
         name: str,
@@ -181,6 +193,13 @@ class CircuitBreaker:
         self.last_failure_time = None
         self.state = "CLOSED"  # CLOSED, OPEN, HALF_OPEN
         self.logger = logging.getLogger(f"circuit_breaker.{name}")
+        
+        # Guards read-modify-write of the counters and state transitions;
+        # the healthy CLOSED path reads state without taking it
+        self._lock = threading.Lock()
+        
+        # Monotonic time at which an open circuit may be probed again
+        self._reopen_at = math.inf
     
     def call(self, func: Callable, *args, **kwargs) -> Any:
         """
@@ -197,32 +216,46 @@ class CircuitBreaker:
         Raises:
             The exception raised by the function, or CircuitBreakerError if the circuit is open
         """
-        if self.state == "OPEN":
-            if self.last_failure_time and time.time() - self.last_failure_time >= self.recovery_timeout:
-                self.state = "HALF_OPEN"
-                self.logger.info(f"Circuit breaker {self.name} is half-open")
-            else:
+        if self.state != "CLOSED":
+            # Fail fast without the lock while the circuit is clearly still open
+            if self.state == "OPEN" and _now() < self._reopen_at:
                 raise CircuitBreakerError(f"Circuit breaker {self.name} is open")
+            with self._lock:
+                if self.state == "OPEN":
+                    if _now() >= self._reopen_at:
+                        self.state = "HALF_OPEN"
+                        self.logger.info(f"Circuit breaker {self.name} is half-open")
+                    else:
+                        raise CircuitBreakerError(f"Circuit breaker {self.name} is open")
         
         try:
             result = func(*args, **kwargs)
+        except self.expected_exception:
+            with self._lock:
+                self.failure_count += 1
+                self.last_failure_time = _now()
+                
+                # Check if we should open the circuit; only the caller that
+                # performs the transition logs it
+                if self.state != "OPEN" and (
+                    self.failure_count >= self.failure_threshold or self.state == "HALF_OPEN"
+                ):
+                    self.state = "OPEN"
+                    self.logger.warning(f"Circuit breaker {self.name} is open due to {self.failure_count} failures")
+                if self.state == "OPEN":
+                    self._reopen_at = self.last_failure_time + self.recovery_timeout
             
-            # Success - reset failure count and close circuit
-            if self.state == "HALF_OPEN":
-                self.state = "CLOSED"
-                self.logger.info(f"Circuit breaker {self.name} is closed")
-            self.failure_count = 0
-            return result
-        except self.expected_exception as e:
-            self.failure_count += 1
-            self.last_failure_time = time.time()
-            
-            # Check if we should open the circuit
-            if self.failure_count >= self.failure_threshold or self.state == "HALF_OPEN":
-                self.state = "OPEN"
-                self.logger.warning(f"Circuit breaker {self.name} is open due to {self.failure_count} failures")
-            
-            raise e
+            raise
+        
+        # Success - reset failure count and close circuit
+        if self.failure_count or self.state != "CLOSED":
+            with self._lock:
+                if self.state == "HALF_OPEN":
+                    self.state = "CLOSED"
+                    self._reopen_at = math.inf
+                    self.logger.info(f"Circuit breaker {self.name} is closed")
+                self.failure_count = 0
+        return result
 
 
 class CircuitBreakerError(AgenticError):
@@ -240,18 +273,68 @@ class CircuitBreakerError(AgenticError):
 
 
 
+class RetryBudget:
+    """Token bucket that caps retries at a fraction of recent calls."""
+    
+    __slots__ = ('ratio', 'capacity', 'min_per_second', 'tokens', 'last_refill', '_lock')
+    
+    def __init__(self, ratio: float = 0.1, capacity: float = 10.0, min_per_second: float = 0.1):
+        """
+        Initialize the retry budget.
+        
+        Args:
+            ratio: Retry tokens earned per call
+            capacity: Maximum number of banked retry tokens
+            min_per_second: Tokens refilled per second regardless of traffic,
+                so low-volume callers can still retry occasionally
+        """
+        self.ratio = ratio
+        self.capacity = capacity
+        self.min_per_second = min_per_second
+        self.tokens = capacity
+        self.last_refill = _now()
+        self._lock = threading.Lock()
+    
+    def record_call(self):
+        """Earn retry tokens for a call."""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + self.ratio)
+    
+    def try_consume(self) -> bool:
+        """
+        Spend one token for a retry.
+        
+        Returns:
+            True if the retry is within budget, False otherwise
+        """
+        with self._lock:
+            now = _now()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.min_per_second)
+            self.last_refill = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
 def retry_with_backoff(
     strategy: Optional[ErrorRecoveryStrategy] = None,
     max_attempts: int = 3,
-    on_retry: Optional[Callable[[Exception, int], None]] = None
+    on_retry: Optional[Callable[[Exception, int], None]] = None,
+    budget: Optional[RetryBudget] = None
 ):
     """
     Decorator to retry a function with exponential backoff.
     
+    Retries draw from a budget shared by every call of the decorated
+    function, so a failing dependency sees at most a fraction of extra
+    traffic instead of a retry storm.
+    
     Args:
         strategy: The error recovery strategy to use
         max_attempts: The maximum number of attempts
         on_retry: A callback function to call on each retry
+        budget: The retry budget to use; defaults to a new one per decorated function
         
     Returns:
         The decorated function
@@ -260,9 +343,63 @@ def retry_with_backoff(
         strategy = ExponentialBackoffStrategy()
     
     def decorator(func: Callable) -> Callable:
+        # One budget per decorated function object, so closures built by a
+        # factory don't share a budget just because they share a name
+        retry_budget = budget if budget is not None else RetryBudget()
+        # Bound once so the wrappers read closure cells instead of attributes
+        should_retry = strategy.should_retry
+        get_delay = strategy.get_delay
+        
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs) -> Any:
+                last_error = None
+                retry_budget.record_call()
+                
+                for attempt in range(1, max_attempts + 1):
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        last_error = e
+                        
+                        # Check if we should retry
+                        if attempt < max_attempts and should_retry(e, attempt):
+                            # Fail fast once the shared retry budget is spent
+                            if not retry_budget.try_consume():
+                                logging.getLogger("retry").warning(
+                                    "Retry budget exhausted for %s; not retrying %s",
+                                    func.__qualname__, type(e).__name__
+                                )
+                                raise
+                            
+                            # Call retry callback if provided
+                            if on_retry:
+                                on_retry(e, attempt)
+                            
+                            # Calculate delay
+                            delay = get_delay(attempt)
+                            
+                            # Log retry attempt
+                            logging.getLogger("retry").info(
+                                f"Retrying {func.__name__} (attempt {attempt}/{max_attempts}) "
+                                f"after {delay:.2f}s delay due to {type(e).__name__}: {e}"
+                            )
+                            
+                            # Yield to the event loop while waiting
+                            await asyncio.sleep(delay)
+                        else:
+                            # Don't retry, re-raise the error
+                            raise
+                
+                # If we get here, we've exhausted all attempts
+                raise last_error
+            
+            return async_wrapper
+        
         @wraps(func)
         def wrapper(*args, **kwargs) -> Any:
             last_error = None
+            retry_budget.record_call()
             
             for attempt in range(1, max_attempts + 1):
                 try:
@@ -271,13 +408,21 @@ def retry_with_backoff(
                     last_error = e
                     
                     # Check if we should retry
-                    if attempt < max_attempts and strategy.should_retry(e, attempt):
+                    if attempt < max_attempts and should_retry(e, attempt):
+                        # Fail fast once the shared retry budget is spent
+                        if not retry_budget.try_consume():
+                            logging.getLogger("retry").warning(
+                                "Retry budget exhausted for %s; not retrying %s",
+                                func.__qualname__, type(e).__name__
+                            )
+                            raise
+                        
                         # Call retry callback if provided
                         if on_retry:
                             on_retry(e, attempt)
                         
                         # Calculate delay
-                        delay = strategy.get_delay(attempt)
+                        delay = get_delay(attempt)
                         
                         # Log retry attempt
                         logging.getLogger("retry").info(
@@ -289,7 +434,7 @@ def retry_with_backoff(
                         time.sleep(delay)
                     else:
                         # Don't retry, re-raise the error
-                        raise e
+                        raise
             
             # If we get here, we've exhausted all attempts
             raise last_error
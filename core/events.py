@@ -1,21 +1,91 @@
-from typing import Dict, Any, Callable
+from typing import Dict, Any, Callable, Iterable, List, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
-import json
 import os
+import queue
+import threading
 import time
 import redis
 
 # Local imports
-from .redis_pool import redis_pool
+from .redis_pool import get_redis_pool
 from .exceptions import RedisError
+# Event payloads are serialized straight to bytes, which Redis publishes as-is
+from .fastjson import dumps as _dumps
+
+# Hot-path module attributes bound once
+_monotonic = time.monotonic
+_DEBUG = logging.DEBUG
+_INFO = logging.INFO
+
+# Worker queue sentinel asking the worker to exit
+_STOP = object()
+
+# Handler error logging is sampled per event type: the first few errors in
+# each window are logged, then only every Nth, so a failing handler cannot
+# flood the log pipeline
+_HANDLER_ERROR_WINDOW_SECONDS = 60.0
+_HANDLER_ERROR_LOG_FIRST = 5
+_HANDLER_ERROR_LOG_EVERY = 100
+
+# How long get_eventbus_info may serve pool info and handler counts from cache
+_INFO_CACHE_TTL_SECONDS = 1.0
+
+# How long a PUBSUB NUMSUB/NUMPAT result is trusted before it is refreshed;
+# with skip_unsubscribed, channels with no remote subscribers are skipped
+# entirely until then
+_NUMSUB_TTL_SECONDS = 5.0
 
 class EventBus:
     """Event bus for system-wide event handling with Redis error handling"""
     
-    def __init__(self, redis_host: str = None, redis_port: int = None):
+    def __init__(
+        self,
+        redis_host: str = None,
+        redis_port: int = None,
+        flush_interval: float = 0.001,
+        parallel: bool = False,
+        max_workers: int = None,
+        max_queue_size: int = 10000,
+        max_batch_size: int = 512,
+        skip_unsubscribed: bool = False
+    ):
         self.logger = logging.getLogger(__name__)
         self.publish_count = 0
         self.subscribe_count = 0
+        
+        # Local handlers run concurrently on a bounded pool when parallel is
+        # set, or per event when it carries "_parallel"; the pool is created
+        # on first use
+        self.parallel = parallel
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        
+        # event_type -> [window start, handler errors in window]
+        self._handler_errors = {}
+        
+        # get_eventbus_info cache, invalidated on (un)subscribe
+        self._info_cache = None
+        self._info_ts = 0.0
+        self._info_dirty = True
+        
+        # With skip_unsubscribed, events for channels nobody subscribes to
+        # (by name or by pattern) are not sent to Redis. Counts are cached,
+        # so a new remote subscriber may miss up to _NUMSUB_TTL_SECONDS of
+        # events; off by default.
+        # Redis channel -> (subscriber count, expiry). Threads race on refresh,
+        # which at worst costs one redundant NUMSUB or PUBLISH
+        self.skip_unsubscribed = skip_unsubscribed
+        self._numsub_cache: Dict[str, Tuple[int, float]] = {}
+        
+        # publish() only enqueues; a single worker thread drains the queue,
+        # sends each batch to Redis in one pipelined round-trip and then runs
+        # local handlers. Events arriving within flush_interval of each other
+        # share a batch, and a full queue blocks publishers (backpressure).
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue(maxsize=max_queue_size)
         self.logger.info("Initializing Event Bus")
         
         # Connect to Redis
@@ -26,7 +96,7 @@ class EventBus:
             
         # Test Redis connection
         try:
-            with redis_pool.connection() as conn:
+            with get_redis_pool().connection() as conn:
                 conn.ping()
             self.handlers = {}
             self.logger.info("EventBus initialized successfully", extra={
@@ -53,109 +123,362 @@ class EventBus:
             })
             raise RedisError(f"Failed to initialize EventBus: {str(e)}", "EVENTBUS_INIT_ERROR")
         
+        self._worker_thread = threading.Thread(target=self._worker, name="eventbus-worker", daemon=True)
+        self._worker_thread.start()
+        
     def subscribe(self, event_type: str, handler: Callable):
         """Subscribe to an event type"""
         self.subscribe_count += 1
         
-        if event_type not in self.handlers:
-            self.handlers[event_type] = []
-        
-        self.handlers[event_type].append(handler)
-        self.logger.info("Subscribed handler to event type", extra={
-            "event": "eventbus_subscribe",
-            "event_type": event_type,
-            "handler_count": len(self.handlers[event_type]),
-            "subscribe_count": self.subscribe_count
-        })
+        # Handlers are stored as immutable tuples, rebuilt on subscribe, so
+        # dispatch iterates without copying and never sees a partial update
+        self.handlers[event_type] = self.handlers.get(event_type, ()) + (handler,)
+        self._info_dirty = True
+        _log = self.logger
+        if _log.isEnabledFor(_INFO):
+            _log.info("Subscribed handler to event type", extra={
+                "event": "eventbus_subscribe",
+                "event_type": event_type,
+                "handler_count": len(self.handlers[event_type]),
+                "subscribe_count": self.subscribe_count
+            })
         
         # In a real implementation, we would also subscribe to Redis pub/sub
         # for distributed event handling
         
-    def publish(self, event: Dict[str, Any]):
-        """Publish an event to all subscribers with Redis error handling"""
-        start_time = time.time()
-        self.publish_count += 1
-        event_type = event.get("type")
+    def unsubscribe(self, event_type: str, handler: Callable) -> bool:
+        """Unsubscribe a handler from an event type; returns False if it was not subscribed"""
+        handlers = self.handlers.get(event_type, ())
+        # Compare by equality so a freshly bound method matches its subscription
+        remaining = tuple(h for h in handlers if h != handler)
+        if len(remaining) == len(handlers):
+            return False
         
-        # Log the publish attempt
-        self.logger.debug("Publishing event", extra={
-            "event": "eventbus_publish_start",
-            "event_type": event_type,
-            "publish_count": self.publish_count
-        })
+        if remaining:
+            self.handlers[event_type] = remaining
+        else:
+            del self.handlers[event_type]
         
-        # Publish to Redis for distributed event handling
-        redis_published = False
+        self._info_dirty = True
+        
+        _log = self.logger
+        if _log.isEnabledFor(_INFO):
+            _log.info("Unsubscribed handler from event type", extra={
+                "event": "eventbus_unsubscribe",
+                "event_type": event_type,
+                "handler_count": len(remaining)
+            })
+        return True
+        
+    def _subscriber_counts(self, conn, channels: List[str]) -> Dict[str, int]:
+        """
+        Return remote subscriber counts per channel, refreshing stale entries
+        with one NUMSUB.
+        
+        NUMSUB does not count PSUBSCRIBE clients, so when a refreshed channel
+        has none, NUMPAT is asked as well; any pattern subscription on the
+        server counts as a subscriber, since it may match.
+        """
+        now = _monotonic()
+        cache = self._numsub_cache
+        counts = {}
+        stale = []
+        for channel in channels:
+            if channel in counts:
+                continue
+            cached = cache.get(channel)
+            if cached is None or cached[1] <= now:
+                stale.append(channel)
+                counts[channel] = 1
+            else:
+                counts[channel] = cached[0]
+        
+        if stale:
+            expires = now + _NUMSUB_TTL_SECONDS
+            refreshed = conn.pubsub_numsub(*stale)
+            numpat = None
+            for channel, count in refreshed:
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                if not count:
+                    if numpat is None:
+                        numpat = conn.pubsub_numpat()
+                    count = numpat
+                cache[channel] = (count, expires)
+                counts[channel] = count
+        return counts
+    
+    def _publish_redis(self, events: List[Dict[str, Any]]) -> bool:
+        """Publish events to Redis in one pipelined round-trip"""
         try:
-            with redis_pool.connection() as conn:
-                conn.publish(f"events:{event_type}", json.dumps(event))
-            redis_published = True
+            with get_redis_pool().connection() as conn:
+                channels = [f"events:{event.get('type')}" for event in events]
+                dumps = _dumps
+                if self.skip_unsubscribed:
+                    subscribers = self._subscriber_counts(conn, channels)
+                    batch = [
+                        (channel, dumps(event))
+                        for channel, event in zip(channels, events)
+                        if subscribers.get(channel, 1)
+                    ]
+                else:
+                    batch = [(channel, dumps(event)) for channel, event in zip(channels, events)]
+                if not batch:
+                    return True
+                if len(batch) == 1:
+                    conn.publish(*batch[0])
+                else:
+                    pipe = conn.pipeline(transaction=False)
+                    for channel, payload in batch:
+                        pipe.publish(channel, payload)
+                    pipe.execute()
+            return True
         except redis.ConnectionError as e:
             self.logger.error("Redis connection error during publish", extra={
                 "event": "eventbus_redis_publish_connection_error",
-                "event_type": event_type,
+                "batch_size": len(events),
                 "error": str(e),
                 "error_type": type(e).__name__
             })
         except redis.TimeoutError as e:
             self.logger.error("Redis timeout error during publish", extra={
                 "event": "eventbus_redis_publish_timeout_error",
-                "event_type": event_type,
+                "batch_size": len(events),
                 "error": str(e),
                 "error_type": type(e).__name__
             })
         except redis.RedisError as e:
             self.logger.error("Redis error during publish", extra={
                 "event": "eventbus_redis_publish_error",
-                "event_type": event_type,
+                "batch_size": len(events),
                 "error": str(e),
                 "error_type": type(e).__name__
             })
         except Exception as e:
             self.logger.error("Unexpected error during Redis publish", extra={
                 "event": "eventbus_redis_publish_unexpected_error",
-                "event_type": event_type,
+                "batch_size": len(events),
                 "error": str(e),
                 "error_type": type(e).__name__
             })
-        
-        # Publish to local handlers
-        local_handlers_count = 0
-        if event_type in self.handlers:
-            local_handlers_count = len(self.handlers[event_type])
-            self.logger.debug("Publishing to local handlers", extra={
-                "event": "eventbus_local_publish_start",
-                "event_type": event_type,
-                "handler_count": local_handlers_count
-            })
+        return False
+    
+    def _process_batch(self, batch: List[Tuple[Dict[str, Any], float]]):
+        """Publish a batch of queued events to Redis, then to local handlers"""
+        redis_published = self._publish_redis([event for event, _ in batch])
+        publish_local = self._publish_local
+        for event, start_time in batch:
+            publish_local(event, event.get("type"), start_time, redis_published)
+    
+    def _worker(self):
+        """Drain the publish queue in batches until asked to stop"""
+        q = self._queue
+        while True:
+            item = q.get()
+            batch = []
+            waiters = []
+            stop = False
+            deadline = _monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stop = True
+                    break
+                if isinstance(item, threading.Event):
+                    # flush() marker: everything queued before it is in this batch
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.max_batch_size:
+                    break
+                remaining = deadline - _monotonic()
+                try:
+                    item = q.get(timeout=remaining) if remaining > 0 else q.get_nowait()
+                except queue.Empty:
+                    break
             
-            handler_errors = 0
-            for i, handler in enumerate(self.handlers[event_type]):
+            if batch:
                 try:
-                    handler(event)
+                    self._process_batch(batch)
                 except Exception as e:
-                    handler_errors += 1
-                    self.logger.error("Error in event handler", extra={
-                        "event": "eventbus_handler_error",
-                        "event_type": event_type,
-                        "handler_index": i,
+                    self.logger.error("Unexpected error in event bus worker", extra={
+                        "event": "eventbus_worker_error",
+                        "batch_size": len(batch),
                         "error": str(e),
                         "error_type": type(e).__name__
                     })
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+    
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Wait until every event published so far has been processed.
+        
+        Returns:
+            True if the queue drained within the timeout, False otherwise
+        """
+        if not self._worker_thread.is_alive():
+            return self._queue.empty()
+        marker = threading.Event()
+        self._queue.put(marker, timeout=timeout)
+        return marker.wait(timeout)
+    
+    def close(self, timeout: float = 5.0):
+        """Process queued events and stop the worker thread"""
+        if self._worker_thread.is_alive():
+            self._queue.put(_STOP, timeout=timeout)
+            self._worker_thread.join(timeout)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+    
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """Get the handler thread pool, creating it on first use"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="eventbus-handler"
+                    )
+        return self._pool
+        
+    def publish(self, event: Dict[str, Any], block: bool = True, timeout: float = None):
+        """
+        Queue an event for Redis and local subscribers without waiting on either.
+        
+        Args:
+            event: The event to publish
+            block: Wait for room when the queue is full instead of raising
+            timeout: Maximum time to wait for room when blocking
             
-            publish_time = time.time() - start_time
-            self.logger.info("Event published successfully", extra={
-                "event": "eventbus_publish_completed",
+        Raises:
+            queue.Full: If the queue stays full (or block is False)
+        """
+        start_time = _monotonic()
+        self.publish_count += 1
+        
+        # Log the publish attempt
+        _log = self.logger
+        if _log.isEnabledFor(_DEBUG):
+            _log.debug("Publishing event", extra={
+                "event": "eventbus_publish_start",
+                "event_type": event.get("type"),
+                "publish_count": self.publish_count
+            })
+        
+        self._queue.put((event, start_time), block, timeout)
+    
+    def publish_sync(self, event: Dict[str, Any]) -> bool:
+        """Publish an event, waiting for Redis and local handlers to complete"""
+        start_time = _monotonic()
+        self.publish_count += 1
+        event_type = event.get("type")
+        
+        # Log the publish attempt
+        _log = self.logger
+        if _log.isEnabledFor(_DEBUG):
+            _log.debug("Publishing event", extra={
+                "event": "eventbus_publish_start",
                 "event_type": event_type,
-                "redis_published": redis_published,
-                "local_handlers_count": local_handlers_count,
-                "handler_errors": handler_errors,
-                "publish_time_ms": round(publish_time * 1000, 2),
                 "publish_count": self.publish_count
             })
-        else:
-            publish_time = time.time() - start_time
-            self.logger.info("Event published with no local handlers", extra={
+        
+        # Publish to Redis for distributed event handling
+        redis_published = self._publish_redis([event])
+        
+        self._publish_local(event, event_type, start_time, redis_published)
+        return redis_published
+    
+    def publish_many(self, events: Iterable[Dict[str, Any]]) -> bool:
+        """Publish several events synchronously with a single pipelined Redis round-trip"""
+        events = list(events)
+        if not events:
+            return True
+        
+        start_time = _monotonic()
+        self.publish_count += len(events)
+        redis_published = self._publish_redis(events)
+        
+        for event in events:
+            self._publish_local(event, event.get("type"), start_time, redis_published)
+        return redis_published
+    
+    def _count_handler_error(self, event_type: str) -> int:
+        """Count a handler error for an event type, returning the count in the current window"""
+        now = _monotonic()
+        bucket = self._handler_errors.get(event_type)
+        if bucket is None or now - bucket[0] >= _HANDLER_ERROR_WINDOW_SECONDS:
+            bucket = self._handler_errors[event_type] = [now, 0]
+        bucket[1] += 1
+        return bucket[1]
+    
+    @staticmethod
+    def _run_handlers(handlers: Tuple[Callable, ...], event: Dict[str, Any]):
+        """Run handlers in order, yielding (handler, exception or None)"""
+        for handler in handlers:
+            try:
+                handler(event)
+            except Exception as e:
+                yield handler, e
+            else:
+                yield handler, None
+    
+    def _publish_local(self, event: Dict[str, Any], event_type: str, start_time: float, redis_published):
+        """Publish an event to local handlers"""
+        _log = self.logger
+        handlers = self.handlers.get(event_type)
+        if handlers:
+            local_handlers_count = len(handlers)
+            if _log.isEnabledFor(_DEBUG):
+                _log.debug("Publishing to local handlers", extra={
+                    "event": "eventbus_local_publish_start",
+                    "event_type": event_type,
+                    "handler_count": local_handlers_count
+                })
+            
+            handler_errors = 0
+            suppressed = 0
+            if local_handlers_count > 1 and (self.parallel or event.get("_parallel")):
+                # Overlap handlers so publish waits for the slowest, not the sum
+                pool = self._get_pool()
+                futures = {pool.submit(handler, event): handler for handler in handlers}
+                outcomes = ((futures[f], f.exception()) for f in as_completed(futures))
+            else:
+                outcomes = self._run_handlers(handlers, event)
+            
+            for handler, e in outcomes:
+                if e is not None:
+                    handler_errors += 1
+                    window_count = self._count_handler_error(event_type)
+                    if (window_count <= _HANDLER_ERROR_LOG_FIRST
+                            or window_count % _HANDLER_ERROR_LOG_EVERY == 0):
+                        _log.error("Error in event handler", extra={
+                            "event": "eventbus_handler_error",
+                            "event_type": event_type,
+                            "handler": getattr(handler, "__qualname__", repr(handler)),
+                            "error": str(e),
+                            "error_type": type(e).__name__,
+                            "errors_in_window": window_count
+                        })
+                    else:
+                        suppressed += 1
+            
+            if _log.isEnabledFor(_INFO):
+                publish_time = _monotonic() - start_time
+                _log.info("Event published successfully", extra={
+                    "event": "eventbus_publish_completed",
+                    "event_type": event_type,
+                    "redis_published": redis_published,
+                    "local_handlers_count": local_handlers_count,
+                    "handler_errors": handler_errors,
+                    "handler_errors_suppressed": suppressed,
+                    "publish_time_ms": round(publish_time * 1000, 2),
+                    "publish_count": self.publish_count
+                })
+        elif _log.isEnabledFor(_INFO):
+            publish_time = _monotonic() - start_time
+            _log.info("Event published with no local handlers", extra={
                 "event": "eventbus_publish_no_handlers",
                 "event_type": event_type,
                 "redis_published": redis_published,
@@ -165,27 +488,39 @@ class EventBus:
             
     def get_eventbus_info(self) -> Dict[str, Any]:
         """Get information about the event bus for monitoring with Redis error handling"""
-        handler_types = list(self.handlers.keys())
-        handler_counts = {k: len(v) for k, v in self.handlers.items()}
-        
-        # Try to get Redis info
-        redis_info = {}
-        try:
-            # Get Redis connection info from pool
-            redis_info = getattr(redis_pool, 'get_pool_info', lambda: {})()
-        except Exception as e:
-            self.logger.warning("Failed to get Redis pool info", extra={
-                "event": "eventbus_get_redis_info_failed",
-                "error": str(e),
-                "error_type": type(e).__name__
-            })
+        now = _monotonic()
+        cached = self._info_cache
+        if cached is None or self._info_dirty or now - self._info_ts >= _INFO_CACHE_TTL_SECONDS:
+            handler_types = list(self.handlers.keys())
+            handler_counts = {k: len(v) for k, v in self.handlers.items()}
+            
+            # Try to get Redis info
+            redis_info = {}
+            try:
+                # Get Redis connection info from pool
+                redis_info = getattr(get_redis_pool(), 'get_pool_info', lambda: {})()
+            except Exception as e:
+                self.logger.warning("Failed to get Redis pool info", extra={
+                    "event": "eventbus_get_redis_info_failed",
+                    "error": str(e),
+                    "error_type": type(e).__name__
+                })
+            
+            cached = self._info_cache = {
+                "handler_types": handler_types,
+                "handler_counts": handler_counts,
+                "redis_info": redis_info
+            }
+            self._info_ts = now
+            self._info_dirty = False
         
+        # Counters are always live; the rest is served from the cache
         return {
             "publish_count": self.publish_count,
             "subscribe_count": self.subscribe_count,
-            "handler_types": handler_types,
-            "handler_counts": handler_counts,
-            "redis_info": redis_info
+            "handler_types": list(cached["handler_types"]),
+            "handler_counts": dict(cached["handler_counts"]),
+            "redis_info": cached["redis_info"]
         }
 
 if __name__ == "__main__":
@@ -198,5 +533,6 @@ if __name__ == "__main__":
         
         event_bus.subscribe("task.enqueued", sample_handler)
         event_bus.publish({"type": "task.enqueued", "task_id": 1})
+        event_bus.close()
     except Exception as e:
         print(f"Error in EventBus test: {e}")
\ No newline at end of file
@@ -14,11 +14,11 @@ class AgenticError(Exception):
         self.error_code = error_code
         self.context = context or {}
         self.details = details
+        # Formatted once; logging calls __str__ repeatedly on error paths
+        self._str = f"[{error_code}] {message}" if error_code else message
         
     def __str__(self):
-        if self.error_code:
-            return f"[{self.error_code}] {self.message}"
-        return self.message
+        return self._str
 
 class DatabaseError(AgenticError):
     """Exception raised for database-related errors"""
@@ -39,16 +39,16 @@ class APIError(AgenticError):
         super().__init__(message, error_code or "API_ERROR", context)
 
 class ValidationError(AgenticError):
-    """Exception raised for validation errors"""
+    """Exception raised for validation errors; never retried"""
     
-    def __init__(self, message: str, error_code: Optional[str] = None, context: Optional[Dict[str, Any]] = None):
-        super().__init__(message, error_code or "VALIDATION_ERROR", context)
+    def __init__(self, message: str, error_code: Optional[str] = None, context: Optional[Dict[str, Any]] = None, *, details: Optional[Dict[str, Any]] = None):
+        super().__init__(message, error_code or "VALIDATION_ERROR", context, details)
 
 class ConfigurationError(AgenticError):
-    """Exception raised for configuration errors"""
+    """Exception raised for configuration errors; never retried"""
     
-    def __init__(self, message: str, error_code: Optional[str] = None, context: Optional[Dict[str, Any]] = None):
-        super().__init__(message, error_code or "CONFIG_ERROR", context)
+    def __init__(self, message: str, error_code: Optional[str] = None, context: Optional[Dict[str, Any]] = None, *, details: Optional[Dict[str, Any]] = None):
+        super().__init__(message, error_code or "CONFIG_ERROR", context, details)
 
 class ResourceError(AgenticError):
     """Exception raised for resource-related errors"""
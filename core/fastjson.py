@@ -0,0 +1,47 @@
+"""
+JSON encoding for hot paths (message queue, event bus, metrics, LLM streams).
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise, so callers never need to know which backend is active. Both
+backends accept non-string dict keys and NumPy scalars/arrays.
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(obj: Any) -> bytes:
+        """Serialize obj to JSON bytes"""
+        return orjson.dumps(obj, option=_OPTIONS)
+
+    def dumps_str(obj: Any) -> str:
+        """Serialize obj to a JSON string"""
+        return orjson.dumps(obj, option=_OPTIONS).decode()
+
+    loads = orjson.loads
+else:
+    def _default(obj: Any) -> Any:
+        # NumPy scalars and arrays both expose tolist()
+        if hasattr(obj, "tolist"):
+            return obj.tolist()
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    def dumps(obj: Any) -> bytes:
+        """Serialize obj to JSON bytes"""
+        return json.dumps(obj, default=_default).encode()
+
+    def dumps_str(obj: Any) -> str:
+        """Serialize obj to a JSON string"""
+        return json.dumps(obj, default=_default)
+
+    def loads(data: Union[bytes, str]) -> Any:
+        """Deserialize JSON bytes or str"""
+        return json.loads(data)
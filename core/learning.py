@@ -1,15 +1,37 @@
 from typing import Dict, Any
 import logging
 import numpy as np
-import json
+import math
+import threading
+from array import array
 import time
-from sklearn.linear_model import LogisticRegression, Ridge
-from sklearn.preprocessing import StandardScaler
 import os
 
 # Local imports
 from .database import db_pool, DatabaseError
 from .exceptions import FileIOError
+from .learning_kernels import (
+    column_stats, standardize, augment, l2_prior, gram_stats, ridge_solve, logreg_newton
+)
+
+# Regularization matches the sklearn defaults the models were tuned with
+# (Ridge alpha=1.0, LogisticRegression C=1.0)
+_RIDGE_ALPHA = 1.0
+_LOGREG_L2 = 1.0
+_LOGREG_TOL = 1e-6
+_LOGREG_MAX_ITER = 100
+
+# New rows are folded into the existing fit, keeping the standardization
+# from the last full refit; once the data has grown by this factor since
+# then, the scaling is considered stale and everything is refit
+_REFIT_GROWTH = 2.0
+
+# train_examples.feature_blob holds each feature vector as packed float64
+_FEATURE_DTYPE = np.dtype("<f8")
+
+def _empty_training_data() -> tuple:
+    """Return an empty (features, labels_success, labels_latency, weights) tuple"""
+    return np.empty((0, 0)), np.empty(0), np.empty(0), np.empty(0)
 
 class LearningLoop:
     """Lightweight learning loop for policy optimization"""
@@ -22,57 +44,220 @@ class LearningLoop:
         # Database path
         self.db_path = os.path.join(os.path.dirname(__file__), "..", db_path)
         
-        # Models
-        self.classifier = LogisticRegression()
-        self.regressor = Ridge()
-        self.scaler = StandardScaler()
+        # Models: standardization parameters and fitted coefficients, with
+        # the intercept as the last element of each beta
+        self.mean_ = None
+        self.std_ = None
+        self.beta_cls_ = None
+        self.beta_reg_ = None
+        
+        # Prediction weights with the standardization folded in, so scoring
+        # is one dot product on raw features: w = β/σ, b = β₀ - w·μ
+        self._cls_w = None
+        self._cls_b = 0.0
+        self._reg_w = None
+        self._reg_b = 0.0
+        self._n_features = 0
+        
+        # Per-thread float32 row that single-sample predictions copy their
+        # features into, instead of allocating a new array per call
+        self._local = threading.local()
+        
+        # Incremental fit state: ridge sufficient statistics, the logistic
+        # Hessian (the prior for the next update), and sample counts
+        self._gram_reg = None
+        self._xty_reg = None
+        self._hess_cls = None
+        self._n_full = 0
+        self._n_seen = 0
         
         # Model status
         self.is_trained = False
         
-    def load_training_data(self) -> tuple:
-        """Load training data from database"""
+        # Fingerprint of the training rows behind the current fit, and the
+        # result it produced; train_model skips refitting while it matches.
+        # The fitted arrays are persisted so a restart can predict at once.
+        self._data_sig = None
+        self._last_result = None
+        self.model_cache_path = os.path.join(os.path.dirname(self.db_path), "model_cache.npz")
+        self._load_model_cache()
+        
+    def _trained_result(self, samples: int) -> Dict[str, Any]:
+        """Build the train_model result for a successful fit"""
+        return {
+            "status": "trained",
+            "samples": samples,
+            "model_info": {
+                "classifier": f"logistic_newton(l2={_LOGREG_L2})",
+                "regressor": f"ridge(alpha={_RIDGE_ALPHA})"
+            }
+        }
+    
+    def _data_signature(self):
+        """Return a cheap fingerprint of the training rows, or None if it cannot be read"""
+        try:
+            with db_pool.connection() as conn:
+                row = conn.execute(
+                    "SELECT COUNT(*), COALESCE(MAX(id), 0), COALESCE(MAX(created_ts), 0) "
+                    "FROM train_examples WHERE feature_blob IS NOT NULL"
+                ).fetchone()
+            return tuple(row)
+        except Exception as e:
+            self.logger.warning("Failed to fingerprint training data", extra={
+                "event": "training_signature_failed",
+                "error": str(e)
+            })
+            return None
+    
+    def _load_model_cache(self):
+        """Restore a previously persisted fit, if there is one"""
+        if not os.path.exists(self.model_cache_path):
+            return
+        try:
+            with np.load(self.model_cache_path) as cache:
+                mean = cache["mean"]
+                std = cache["std"]
+                beta_cls = cache["beta_cls"]
+                beta_reg = cache["beta_reg"]
+                sig = tuple(int(v) for v in cache["sig"])
+                # Fit state from before sample weights were applied can't
+                # be extended with weighted rows; the next growth refits
+                if "gram_reg" in cache and "weighted" in cache:
+                    gram_reg = cache["gram_reg"]
+                    xty_reg = cache["xty_reg"]
+                    hess_cls = cache["hess_cls"]
+                    n_full, n_seen = (int(v) for v in cache["counts"])
+                else:
+                    gram_reg = xty_reg = hess_cls = None
+                    n_full = n_seen = sig[0]
+        except Exception as e:
+            self.logger.warning("Failed to load model cache", extra={
+                "event": "model_cache_load_failed",
+                "path": self.model_cache_path,
+                "error": str(e)
+            })
+            return
+        
+        self.mean_, self.std_ = mean, std
+        self.beta_cls_, self.beta_reg_ = beta_cls, beta_reg
+        self._fuse_weights()
+        self._gram_reg, self._xty_reg, self._hess_cls = gram_reg, xty_reg, hess_cls
+        self._n_full, self._n_seen = n_full, n_seen
+        self._data_sig = sig
+        self._last_result = self._trained_result(n_seen)
+        self.is_trained = True
+        self.logger.info("Model restored from cache", extra={
+            "event": "model_cache_loaded",
+            "path": self.model_cache_path,
+            "samples": n_seen
+        })
+    
+    def _save_model_cache(self):
+        """Persist the current fit, replacing any previous cache atomically"""
+        tmp_path = self.model_cache_path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    mean=self.mean_,
+                    std=self.std_,
+                    beta_cls=self.beta_cls_,
+                    beta_reg=self.beta_reg_,
+                    gram_reg=self._gram_reg,
+                    xty_reg=self._xty_reg,
+                    hess_cls=self._hess_cls,
+                    counts=np.array((self._n_full, self._n_seen), dtype=np.int64),
+                    weighted=np.array(True),
+                    sig=np.array(self._data_sig, dtype=np.int64)
+                )
+            os.replace(tmp_path, self.model_cache_path)
+        except OSError as e:
+            self.logger.warning("Failed to save model cache", extra={
+                "event": "model_cache_save_failed",
+                "path": self.model_cache_path,
+                "error": str(e)
+            })
+    
+    def load_training_data(self, since_id: int = 0, until_id: int = None) -> tuple:
+        """
+        Load training data from database.
+        
+        Args:
+            since_id: Only load examples with an id greater than this
+            until_id: Only load examples with an id up to this, if given
+        
+        Returns:
+            Tuple of float64 arrays (features of shape (n, f), labels_success,
+            labels_latency and sample weights of shape (n,)); (0, 0), (0,),
+            (0,) and (0,) when there is no data. Each weight is the number
+            of examples the row stands for in its reservoir sample.
+        """
         start_time = time.time()
         try:
             with db_pool.connection() as conn:
-                # Load training examples
-                examples = conn.execute("SELECT * FROM train_examples").fetchall()
+                query = (
+                    "SELECT feature_blob, label_success, label_latency_ms, COALESCE(sample_weight, 1.0) "
+                    "FROM train_examples WHERE feature_blob IS NOT NULL AND id > ?"
+                )
+                params = [since_id]
+                if until_id is not None:
+                    query += " AND id <= ?"
+                    params.append(until_id)
+                
+                # Stream the cursor straight into one packed buffer and the
+                # label and weight arrays, never holding every row at once. Every
+                # example shares one feature schema, so rows whose blob
+                # size differs from the first are skipped.
+                buf = bytearray()
+                labels_success = array("d")
+                labels_latency = array("d")
+                weights = array("d")
+                width = None
+                skipped = 0
+                for blob, success, latency, weight in conn.execute(query, params):
+                    if width is None:
+                        width = len(blob)
+                        if width == 0 or width % _FEATURE_DTYPE.itemsize:
+                            raise ValueError(f"Invalid feature blob size: {width} bytes")
+                    elif len(blob) != width:
+                        skipped += 1
+                        continue
+                    buf += blob
+                    labels_success.append(success)
+                    labels_latency.append(latency)
+                    weights.append(weight)
                 
-                if not examples:
+                if width is None:
                     load_time = time.time() - start_time
                     self.logger.info("No training data found", extra={
                         "event": "no_training_data",
                         "load_time_ms": round(load_time * 1000, 2)
                     })
-                    return [], [], []
+                    return _empty_training_data()
             
-                # Extract features and labels
-                features = []
-                labels_success = []
-                labels_latency = []
-                
-                for example in examples:
-                    # Parse feature JSON
-                    try:
-                        feature_data = json.loads(example['feature_json'])
-                        features.append(list(feature_data.values()))
-                        labels_success.append(example['label_success'])
-                        labels_latency.append(example['label_latency_ms'])
-                    except json.JSONDecodeError as e:
-                        self.logger.warning("Failed to parse feature JSON", extra={
-                            "event": "feature_json_parse_error",
-                            "error": str(e),
-                            "example_id": example['id']
-                        })
-                
-                load_time = time.time() - start_time
-                self.logger.info("Training data loaded successfully", extra={
-                    "event": "training_data_loaded",
-                    "sample_count": len(features),
-                    "load_time_ms": round(load_time * 1000, 2)
+            if skipped:
+                self.logger.warning("Skipped training examples with mismatched feature count", extra={
+                    "event": "feature_blob_size_mismatch",
+                    "skipped": skipped,
+                    "expected_features": width // _FEATURE_DTYPE.itemsize
                 })
-                
-                return features, labels_success, labels_latency
+            
+            # The bytearray keeps the matrix writable for in-place
+            # standardization; the label arrays are viewed without copying
+            n = len(labels_success)
+            features = np.frombuffer(buf, dtype=_FEATURE_DTYPE).reshape(n, -1)
+            labels_success = np.frombuffer(labels_success, dtype=np.float64)
+            labels_latency = np.frombuffer(labels_latency, dtype=np.float64)
+            weights = np.frombuffer(weights, dtype=np.float64)
+            
+            load_time = time.time() - start_time
+            self.logger.info("Training data loaded successfully", extra={
+                "event": "training_data_loaded",
+                "sample_count": n,
+                "load_time_ms": round(load_time * 1000, 2)
+            })
+            
+            return features, labels_success, labels_latency, weights
         except DatabaseError as e:
             load_time = time.time() - start_time
             self.logger.error("Failed to load training data due to database error", extra={
@@ -81,7 +266,7 @@ class LearningLoop:
                 "error_type": "database",
                 "load_time_ms": round(load_time * 1000, 2)
             })
-            return [], [], []
+            return _empty_training_data()
         except Exception as e:
             load_time = time.time() - start_time
             self.logger.error("Failed to load training data due to unexpected error", extra={
@@ -90,8 +275,62 @@ class LearningLoop:
                 "error_type": "unexpected",
                 "load_time_ms": round(load_time * 1000, 2)
             })
-            return [], [], []
+            return _empty_training_data()
             
+    def _fuse_weights(self):
+        """Fold the standardization into the fitted coefficients"""
+        # Fitting stays in float64 for the solves; the weights used for
+        # scoring are float32, halving the bytes moved per prediction
+        cls_w = self.beta_cls_[:-1] / self.std_
+        reg_w = self.beta_reg_[:-1] / self.std_
+        self._cls_b = float(self.beta_cls_[-1] - cls_w @ self.mean_)
+        self._reg_b = float(self.beta_reg_[-1] - reg_w @ self.mean_)
+        self._cls_w = cls_w.astype(np.float32)
+        self._reg_w = reg_w.astype(np.float32)
+        self._n_features = len(cls_w)
+    
+    def _scratch_row(self, features) -> np.ndarray:
+        """Copy features into this thread's scratch row and return it"""
+        row = getattr(self._local, "row", None)
+        if row is None or len(row) != self._n_features:
+            row = self._local.row = np.empty(self._n_features, dtype=np.float32)
+        if len(features) != self._n_features:
+            raise ValueError(f"Expected {self._n_features} features, got {len(features)}")
+        row[:] = features
+        return row
+    
+    def _fit_full(self, X: np.ndarray, y_success: np.ndarray, y_latency: np.ndarray, weights: np.ndarray):
+        """Fit both models from scratch, standardizing X in place"""
+        mean, std = column_stats(X, weights)
+        standardize(X, mean, std)
+        Xa = augment(X)
+        
+        prior = l2_prior(Xa.shape[1], _LOGREG_L2)
+        self.beta_cls_, self._hess_cls = logreg_newton(
+            Xa, y_success, weights, np.zeros(Xa.shape[1]), prior, _LOGREG_TOL, _LOGREG_MAX_ITER
+        )
+        self._gram_reg, self._xty_reg = gram_stats(Xa, y_latency, weights)
+        self.beta_reg_ = ridge_solve(self._gram_reg, self._xty_reg, _RIDGE_ALPHA)
+        self.mean_ = mean
+        self.std_ = std
+        self._n_full = self._n_seen = len(X)
+    
+    def _fit_incremental(self, X: np.ndarray, y_success: np.ndarray, y_latency: np.ndarray, weights: np.ndarray):
+        """Update both models with new rows only, standardizing X in place"""
+        standardize(X, self.mean_, self.std_)
+        Xa = augment(X)
+        
+        # Ridge is exact: its sufficient statistics simply add up. Logistic
+        # regression takes the previous fit as a Gaussian prior.
+        gram, xty = gram_stats(Xa, y_latency, weights)
+        self._gram_reg = self._gram_reg + gram
+        self._xty_reg = self._xty_reg + xty
+        self.beta_reg_ = ridge_solve(self._gram_reg, self._xty_reg, _RIDGE_ALPHA)
+        self.beta_cls_, self._hess_cls = logreg_newton(
+            Xa, y_success, weights, self.beta_cls_, self._hess_cls, _LOGREG_TOL, _LOGREG_MAX_ITER
+        )
+        self._n_seen += len(X)
+    
     def train_model(self) -> Dict[str, Any]:
         """Train the lightweight model"""
         start_time = time.time()
@@ -102,10 +341,41 @@ class LearningLoop:
             "train_count": self.train_count
         })
         
+        # Skip the refit when the training rows have not changed
+        data_sig = self._data_signature()
+        if data_sig is not None and data_sig == self._data_sig and self.is_trained:
+            self.logger.info("Training data unchanged, reusing fitted model", extra={
+                "event": "training_cache_hit",
+                "samples": data_sig[0],
+                "train_count": self.train_count
+            })
+            return self._last_result
+        
+        # Fold only the new rows into the current fit when the table has
+        # just grown; loads are capped at the fingerprinted MAX(id) so rows
+        # inserted meanwhile are picked up by the next call, not skipped
+        prev_sig = self._data_sig
+        incremental = (
+            self.is_trained
+            and self._hess_cls is not None
+            and data_sig is not None
+            and prev_sig is not None
+            and data_sig[0] > prev_sig[0]
+            and data_sig[1] > prev_sig[1]
+            and data_sig[0] < self._n_full * _REFIT_GROWTH
+        )
+        until_id = data_sig[1] if data_sig is not None else None
+        
         # Load training data
-        features, labels_success, labels_latency = self.load_training_data()
+        if incremental:
+            features, labels_success, labels_latency, weights = self.load_training_data(prev_sig[1], until_id)
+            if features.shape[0] == 0 or features.shape[1] != len(self.mean_):
+                # Nothing usable was added, or the feature schema changed
+                incremental = False
+        if not incremental:
+            features, labels_success, labels_latency, weights = self.load_training_data(0, until_id)
         
-        if not features:
+        if features.shape[0] == 0:
             train_time = time.time() - start_time
             result = {
                 "status": "no_data",
@@ -121,36 +391,30 @@ class LearningLoop:
         
         self.logger.info("Training model with samples", extra={
             "event": "model_training_samples",
-            "samples": len(features)
+            "samples": len(features),
+            "incremental": incremental
         })
         
         try:
-            # Convert to numpy arrays
-            X = np.array(features)
-            y_success = np.array(labels_success)
-            y_latency = np.array(labels_latency)
-            
-            # Scale features
-            X_scaled = self.scaler.fit_transform(X)
-            
-            # Train classifier
-            self.classifier.fit(X_scaled, y_success)
+            if incremental:
+                self._fit_incremental(features, labels_success, labels_latency, weights)
+            else:
+                self._fit_full(features, labels_success, labels_latency, weights)
             
-            # Train regressor
-            self.regressor.fit(X_scaled, y_latency)
+            self._fuse_weights()
             
             # Mark as trained
             self.is_trained = True
             
             train_time = time.time() - start_time
-            result = {
-                "status": "trained",
-                "samples": len(features),
-                "model_info": {
-                    "classifier": str(self.classifier),
-                    "regressor": str(self.regressor)
-                }
-            }
+            result = self._trained_result(self._n_seen)
+            
+            # Rows inserted during the fit may or may not be in it; only a
+            # fingerprint taken before loading is safe to reuse
+            self._data_sig = data_sig
+            self._last_result = result
+            if data_sig is not None:
+                self._save_model_cache()
             
             self.logger.info("Model training completed successfully", extra={
                 "event": "model_training_completed",
@@ -178,20 +442,16 @@ class LearningLoop:
         """Predict success probability for given features"""
         if not self.is_trained:
             # Return default probability if not trained
-            self.logger.debug("Using default success probability - model not trained", extra={
-                "event": "default_success_probability",
-                "value": 0.5
-            })
             return 0.5
             
         try:
-            X = np.array([features])
-            X_scaled = self.scaler.transform(X)
-            prob = self.classifier.predict_proba(X_scaled)[0][1]  # Probability of success
-            self.logger.debug("Success probability predicted", extra={
-                "event": "success_probability_predicted",
-                "value": prob
-            })
+            z = float(self._cls_w @ self._scratch_row(features)) + self._cls_b
+            # Numerically stable sigmoid
+            if z >= 0:
+                prob = 1.0 / (1.0 + math.exp(-z))
+            else:
+                e = math.exp(z)
+                prob = e / (1.0 + e)
             return prob
         except Exception as e:
             self.logger.error("Failed to predict success", extra={
@@ -204,20 +464,10 @@ class LearningLoop:
         """Predict latency for given features"""
         if not self.is_trained:
             # Return default latency if not trained
-            self.logger.debug("Using default latency - model not trained", extra={
-                "event": "default_latency",
-                "value": 1000.0
-            })
             return 1000.0
             
         try:
-            X = np.array([features])
-            X_scaled = self.scaler.transform(X)
-            latency = self.regressor.predict(X_scaled)[0]
-            self.logger.debug("Latency predicted", extra={
-                "event": "latency_predicted",
-                "value": latency
-            })
+            latency = float(self._reg_w @ self._scratch_row(features)) + self._reg_b
             return latency
         except Exception as e:
             self.logger.error("Failed to predict latency", extra={
@@ -226,6 +476,56 @@ class LearningLoop:
             })
             return 1000.0
             
+    def predict_success_batch(self, features: np.ndarray) -> np.ndarray:
+        """
+        Predict success probabilities for a batch of feature vectors.
+        
+        Args:
+            features: Array (or list of lists) of shape (n_samples, n_features)
+        
+        Returns:
+            float32 array of shape (n_samples,) with success probabilities
+        """
+        X = np.asarray(features, dtype=np.float32)
+        if not self.is_trained:
+            return np.full(len(X), 0.5, dtype=np.float32)
+        
+        try:
+            z = X @ self._cls_w + np.float32(self._cls_b)
+            # tanh form of the sigmoid cannot overflow
+            return 0.5 + 0.5 * np.tanh(np.float32(0.5) * z)
+        except Exception as e:
+            self.logger.error("Failed to predict success batch", extra={
+                "event": "success_batch_prediction_failed",
+                "batch_size": len(X),
+                "error": str(e)
+            })
+            return np.full(len(X), 0.5, dtype=np.float32)
+    
+    def predict_latency_batch(self, features: np.ndarray) -> np.ndarray:
+        """
+        Predict latencies for a batch of feature vectors.
+        
+        Args:
+            features: Array (or list of lists) of shape (n_samples, n_features)
+        
+        Returns:
+            float32 array of shape (n_samples,) with predicted latencies
+        """
+        X = np.asarray(features, dtype=np.float32)
+        if not self.is_trained:
+            return np.full(len(X), 1000.0, dtype=np.float32)
+        
+        try:
+            return X @ self._reg_w + np.float32(self._reg_b)
+        except Exception as e:
+            self.logger.error("Failed to predict latency batch", extra={
+                "event": "latency_batch_prediction_failed",
+                "batch_size": len(X),
+                "error": str(e)
+            })
+            return np.full(len(X), 1000.0, dtype=np.float32)
+            
     def get_learning_info(self) -> Dict[str, Any]:
         """Get information about the learning loop for monitoring"""
         return {
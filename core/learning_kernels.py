@@ -0,0 +1,192 @@
+"""
+Closed-form model fitting kernels for the learning loop.
+
+The learning loop trains on a handful of features, where sklearn's input
+validation and solver dispatch cost far more than the arithmetic. These
+kernels do the same fits directly on float64 arrays and are JIT-compiled
+with Numba when it is installed; without it they run as plain NumPy.
+Fitted coefficients carry the intercept as their last element, and every
+fit can be updated with new rows without revisiting old ones. Every fit
+takes a per-sample weight, so a row can stand for the examples it was
+sampled from.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - optional dependency
+    njit = None
+
+NUMBA_AVAILABLE = njit is not None
+
+if njit is None:
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit"""
+        def decorator(func):
+            return func
+        return decorator
+
+
+@njit(cache=True, fastmath=True)
+def column_stats(X, s):
+    """
+    Compute weighted per-column mean and standard deviation.
+
+    Constant columns get a standard deviation of 1 so that standardizing
+    leaves them at zero, matching sklearn's StandardScaler.
+
+    Args:
+        X: 2-D float64 array of samples
+        s: 1-D float64 array of sample weights
+
+    Returns:
+        Tuple of (mean, std) arrays
+    """
+    n_samples, n_features = X.shape
+    mean = np.zeros(n_features)
+    std = np.ones(n_features)
+    s_total = 0.0
+    for i in range(n_samples):
+        s_total += s[i]
+    for j in range(n_features):
+        total = 0.0
+        for i in range(n_samples):
+            total += s[i] * X[i, j]
+        m = total / s_total
+        var = 0.0
+        for i in range(n_samples):
+            d = X[i, j] - m
+            var += s[i] * d * d
+        var /= s_total
+        mean[j] = m
+        if var > 0.0:
+            std[j] = np.sqrt(var)
+    return mean, std
+
+
+@njit(cache=True, fastmath=True)
+def standardize(X, mean, std):
+    """
+    Standardize X in place.
+
+    Args:
+        X: 2-D float64 array of samples, overwritten
+        mean: Per-column mean
+        std: Per-column standard deviation
+    """
+    n_samples, n_features = X.shape
+    for i in range(n_samples):
+        for j in range(n_features):
+            X[i, j] = (X[i, j] - mean[j]) / std[j]
+
+
+@njit(cache=True, fastmath=True)
+def augment(X):
+    """
+    Append a constant column for the intercept.
+
+    Args:
+        X: 2-D float64 array of samples
+
+    Returns:
+        Array of shape (n_samples, n_features + 1)
+    """
+    n_samples, n_features = X.shape
+    Xa = np.ones((n_samples, n_features + 1))
+    Xa[:, :n_features] = X
+    return Xa
+
+
+@njit(cache=True, fastmath=True)
+def l2_prior(n_params, l2):
+    """
+    Build the diagonal L2 penalty matrix, leaving the intercept unpenalized.
+
+    Args:
+        n_params: Number of coefficients including the intercept
+        l2: Penalty strength
+
+    Returns:
+        Square penalty matrix
+    """
+    P = np.zeros((n_params, n_params))
+    for j in range(n_params - 1):
+        P[j, j] = l2
+    return P
+
+
+@njit(cache=True, fastmath=True)
+def gram_stats(Xa, y, s):
+    """
+    Compute the sufficient statistics XᵀSX and XᵀSy of a weighted least-squares fit.
+
+    Statistics from disjoint batches add up, so a ridge fit can be
+    updated with new rows without revisiting the old ones.
+
+    Args:
+        Xa: 2-D float64 array of augmented samples
+        y: 1-D float64 array of targets
+        s: 1-D float64 array of sample weights (the diagonal of S)
+
+    Returns:
+        Tuple of (XᵀSX, XᵀSy)
+    """
+    Xs = Xa * s.reshape(-1, 1)
+    return Xs.T @ Xa, Xs.T @ y
+
+
+@njit(cache=True, fastmath=True)
+def ridge_solve(gram, xty, alpha):
+    """
+    Solve ridge regression from its sufficient statistics.
+
+    Solves (XᵀSX + αP)β = XᵀSy, where P penalizes all but the intercept;
+    this is the same fit as centring the data first.
+
+    Args:
+        gram: XᵀSX over augmented samples
+        xty: XᵀSy over augmented samples
+        alpha: L2 penalty strength
+
+    Returns:
+        Coefficients followed by the intercept
+    """
+    return np.linalg.solve(gram + l2_prior(gram.shape[0], alpha), xty)
+
+
+@njit(cache=True, fastmath=True)
+def logreg_newton(Xa, y, s, beta0, prior, tol, max_iter):
+    """
+    Fit logistic regression under a Gaussian prior by Newton-IRLS.
+
+    Minimizes -Σ sᵢ loglikᵢ(β) + ½(β - β₀)ᵀQ(β - β₀). Each step solves
+    (XᵀWX + Q)Δ = XᵀS(y - p) - Q(β - β₀) with W = S p(1 - p). With β₀ = 0
+    and Q = l2_prior(...) this is sklearn's L2 LogisticRegression; passing
+    a previous fit's coefficients and Hessian instead updates it with new
+    rows only (a Laplace approximation of the earlier data).
+
+    Args:
+        Xa: 2-D float64 array of augmented, standardized samples
+        y: 1-D float64 array of 0/1 labels
+        s: 1-D float64 array of sample weights
+        beta0: Prior mean, also the starting point
+        prior: Prior precision matrix Q
+        tol: Stop when the largest coefficient update falls below this
+        max_iter: Maximum number of Newton steps
+
+    Returns:
+        Tuple of (coefficients followed by the intercept, Hessian at the fit)
+    """
+    beta = beta0.copy()
+    H = prior.copy()
+    for _ in range(max_iter):
+        p = 1.0 / (1.0 + np.exp(-(Xa @ beta)))
+        w = s * p * (1.0 - p)
+        H = Xa.T @ (Xa * w.reshape(-1, 1)) + prior
+        g = Xa.T @ (s * (y - p)) - prior @ (beta - beta0)
+        step = np.linalg.solve(H, g)
+        beta += step
+        if np.abs(step).max() < tol:
+            break
+    return beta, H
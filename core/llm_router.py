@@ -1,60 +1,143 @@
 
+import asyncio
 import logging
-import requests
-import json
+import httpx
 import os
+
+from .fastjson import loads as _loads, dumps_str as _dumps
+
 # import openai
 
+# Marks the end of one call's chunks in route_many
+_DONE = object()
+
 class LLMRouter:
     """A router for large language models."""
 
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.logger.info("Initializing LLMRouter")
+        # One keep-alive client for all local HTTP calls instead of a new
+        # TCP connection per request; generation can take arbitrarily long,
+        # so reads never time out
+        self._http = httpx.Client(
+            timeout=httpx.Timeout(None, connect=10.0),
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=8),
+        )
+        self._ahttp = httpx.AsyncClient(
+            timeout=httpx.Timeout(None, connect=10.0),
+            limits=httpx.Limits(max_connections=64),
+        )
         # self.openai_client = openai.OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+        self._dispatch = {
+            "Ollama": self._call_ollama,
+            # "OpenAI": self._call_openai,
+            "OpenAI": self._openai_disabled,
+            "Gemini": self._call_gemini,
+            "Groq": self._call_groq,
+            "Claude": self._call_claude,
+        }
+        self._async_dispatch = {
+            "Ollama": self._acall_ollama,
+            "OpenAI": self._aopenai_disabled,
+            "Gemini": self._acall_gemini,
+            "Groq": self._acall_groq,
+            "Claude": self._acall_claude,
+        }
 
     def route(self, provider: str, model: str, message: str, history: list) -> str:
         """Route a message to the appropriate model."""
-        self.logger.info(f"Routing message to {provider} model: {model}")
-        self.logger.debug(f"Message content: {message}")
-        self.logger.debug(f"Conversation history: {history}")
-
-        if provider == "Ollama":
-            return self._call_ollama(model, message, history)
-        elif provider == "OpenAI":
-            # return self._call_openai(model, message, history)
-            return iter(["OpenAI integration is currently disabled."])
-        elif provider == "Gemini":
-            return self._call_gemini(model, message, history)
-        elif provider == "Groq":
-            return self._call_groq(model, message, history)
-        elif provider == "Claude":
-            return self._call_claude(model, message, history)
-        else:
-            self.logger.warning(f"Unknown provider: {provider}")
+        self.logger.info("Routing message to %s model: %s", provider, model)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Message content: %s", message)
+            self.logger.debug("Conversation history: %s", history)
+
+        handler = self._dispatch.get(provider)
+        if handler is None:
+            self.logger.warning("Unknown provider: %s", provider)
             return f"Unknown provider: {provider}"
+        return handler(model, message, history)
+
+    async def route_many(self, calls: list, history: list = None):
+        """
+        Route several messages concurrently and stream their chunks as they arrive.
+
+        Args:
+            calls: List of (provider, model, message) tuples
+            history: Conversation history shared by every call
+
+        Yields:
+            (index, chunk) tuples, where index is the call's position in calls.
+            A call that raises yields one error message chunk and ends.
+        """
+        history = history or []
+        queue = asyncio.Queue()
+
+        async def pump(index, provider, model, message):
+            try:
+                handler = self._async_dispatch.get(provider)
+                if handler is None:
+                    self.logger.warning("Unknown provider: %s", provider)
+                    await queue.put((index, f"Unknown provider: {provider}"))
+                    return
+                async for chunk in handler(model, message, history):
+                    await queue.put((index, chunk))
+            except Exception as e:
+                # Report the failure on this call's stream; the other calls
+                # keep running
+                self.logger.error("Error calling %s model %s: %s", provider, model, e)
+                await queue.put((index, f"Error calling {provider} API: {e}"))
+            finally:
+                await queue.put((index, _DONE))
+
+        tasks = [
+            asyncio.ensure_future(pump(index, provider, model, message))
+            for index, (provider, model, message) in enumerate(calls)
+        ]
+        try:
+            pending = len(tasks)
+            while pending:
+                index, chunk = await queue.get()
+                if chunk is _DONE:
+                    pending -= 1
+                else:
+                    yield index, chunk
+        finally:
+            # The caller may stop early; don't leave calls running
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def aclose(self):
+        """Close the HTTP clients"""
+        self._http.close()
+        await self._ahttp.aclose()
+
+    def _openai_disabled(self, model: str, message: str, history: list):
+        return iter(["OpenAI integration is currently disabled."])
 
     def _call_ollama(self, model: str, message: str, history: list) -> str:
-        self.logger.info(f"Calling Ollama model: {model}")
+        self.logger.info("Calling Ollama model: %s", model)
         messages = history + [{"role": "user", "content": message}]
         try:
-            response = requests.post(
+            # Stream the body so chunks are forwarded as they arrive; leaving
+            # the block returns the connection to the client's pool
+            with self._http.stream(
+                "POST",
                 "http://localhost:11434/api/chat",
                 json={"model": model, "messages": messages, "stream": True},
-            )
-            response.raise_for_status()
-            for line in response.iter_lines():
-                if line:
-                    decoded_line = line.decode('utf-8')
-                    json_line = json.loads(decoded_line)
-                    content = json_line["message"]["content"]
-                    yield json.dumps({"response": content})
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"Error calling Ollama API: {e}")
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if line:
+                        content = _loads(line).get("message", {}).get("content", "")
+                        yield _dumps({"response": content})
+        except httpx.HTTPError as e:
+            self.logger.error("Error calling Ollama API: %s", e)
             yield f"Error calling Ollama API: {e}"
 
     def _call_openai(self, model: str, message: str, history: list) -> str:
-        self.logger.info(f"Calling OpenAI model: {model}")
+        self.logger.info("Calling OpenAI model: %s", model)
         messages = history + [{"role": "user", "content": message}]
         try:
             stream = self.openai_client.chat.completions.create(
@@ -65,20 +148,56 @@ class LLMRouter:
             for chunk in stream:
                 yield chunk.choices[0].delta.content or ""
         except Exception as e:
-            self.logger.error(f"Error calling OpenAI API: {e}")
+            self.logger.error("Error calling OpenAI API: %s", e)
             yield f"Error calling OpenAI API: {e}"
 
     def _call_gemini(self, model: str, message: str, history: list) -> str:
-        self.logger.info(f"Calling Gemini model: {model}")
+        self.logger.info("Calling Gemini model: %s", model)
         # Mock implementation
         yield f"Gemini response to: {message}"
 
     def _call_groq(self, model: str, message: str, history: list) -> str:
-        self.logger.info(f"Calling Groq model: {model}")
+        self.logger.info("Calling Groq model: %s", model)
         # Mock implementation
         yield f"Groq response to: {message}"
 
     def _call_claude(self, model: str, message: str, history: list) -> str:
-        self.logger.info(f"Calling Claude model: {model}")
+        self.logger.info("Calling Claude model: %s", model)
+        # Mock implementation
+        yield f"Claude response to: {message}"
+
+    async def _acall_ollama(self, model: str, message: str, history: list):
+        self.logger.info("Calling Ollama model: %s", model)
+        messages = history + [{"role": "user", "content": message}]
+        try:
+            async with self._ahttp.stream(
+                "POST",
+                "http://localhost:11434/api/chat",
+                json={"model": model, "messages": messages, "stream": True},
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if line:
+                        content = _loads(line).get("message", {}).get("content", "")
+                        yield _dumps({"response": content})
+        except httpx.HTTPError as e:
+            self.logger.error("Error calling Ollama API: %s", e)
+            yield f"Error calling Ollama API: {e}"
+
+    async def _aopenai_disabled(self, model: str, message: str, history: list):
+        yield "OpenAI integration is currently disabled."
+
+    async def _acall_gemini(self, model: str, message: str, history: list):
+        self.logger.info("Calling Gemini model: %s", model)
+        # Mock implementation
+        yield f"Gemini response to: {message}"
+
+    async def _acall_groq(self, model: str, message: str, history: list):
+        self.logger.info("Calling Groq model: %s", model)
+        # Mock implementation
+        yield f"Groq response to: {message}"
+
+    async def _acall_claude(self, model: str, message: str, history: list):
+        self.logger.info("Calling Claude model: %s", model)
         # Mock implementation
         yield f"Claude response to: {message}"
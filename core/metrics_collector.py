@@ -1,53 +1,230 @@
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List, Tuple
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+import atexit
 import logging
 import sqlite3
 import os
 import psutil
+import random
+import threading
 import time
-from datetime import datetime
-import json
+from datetime import datetime, timezone
+import hashlib
+import numpy as np
 
 # Local imports
 from .database import db_pool, DatabaseError
+from . import fastjson
+from .task_metrics import record_task_run, record_dropped_run
+
+# System metrics are polled in tiers: CPU on every call, network at most
+# every second, memory at most every 2 s and disk usage at most every 30 s.
+# Disk and network reads can block (statvfs on NFS or encrypted volumes,
+# virtualized NICs), so once they have a value they are refreshed in the
+# background and callers get the previous reading meanwhile
+_NETWORK_TTL_SECONDS = 1.0
+_MEMORY_TTL_SECONDS = 2.0
+_DISK_TTL_SECONDS = 30.0
+
+# Dropped task metrics are logged on the first drop and then every Nth
+_DROPPED_LOG_EVERY = 1000
+
+# Column order of runs rows as queued by collect_task_metrics and accepted by
+# collect_task_metrics_bulk
+_RUN_COLUMNS = (
+    "task_id", "agent", "tool", "params_json", "start_ts", "end_ts", "success", "error_code", "retries",
+    "bytes_in", "bytes_out", "latency_ms", "cpu_ms", "mem_mb", "notes",
+)
+_TRAIN_COLUMNS = (
+    "agent", "tool", "feature_json", "feature_blob", "label_success", "label_latency_ms", "created_ts",
+    "sample_weight",
+)
+
+@lru_cache(maxsize=None)
+def _insert_sql(table: str, columns: Tuple[str, ...]) -> str:
+    """Build (once per table and column set) an INSERT with one placeholder per column"""
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+_INSERT_RUN_SQL = _insert_sql("runs", _RUN_COLUMNS)
+
+# Positions of the columns _daily_rollup totals
+_START_TS = _RUN_COLUMNS.index("start_ts")
+_SUCCESS = _RUN_COLUMNS.index("success")
+_RETRIES = _RUN_COLUMNS.index("retries")
+_LATENCY_MS = _RUN_COLUMNS.index("latency_ms")
+
+# Folds one batch's per-day totals into metrics_daily. Only sums and counts
+# are stored, so batches (and days) add up; the metrics_daily_avg view
+# derives the averages at read time
+_UPSERT_DAILY_SQL = """
+    INSERT INTO metrics_daily (day, tasks_completed, sum_success, sum_latency_ms, sum_retries)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(day) DO UPDATE SET
+        tasks_completed = tasks_completed + excluded.tasks_completed,
+        sum_success = sum_success + excluded.sum_success,
+        sum_latency_ms = sum_latency_ms + excluded.sum_latency_ms,
+        sum_retries = sum_retries + excluded.sum_retries
+"""
+
+# Feature payloads larger than this are stored once in feature_payloads,
+# keyed by their BLAKE2b digest, and referenced from feature_json as
+# {"$ref": "<digest>"}
+_FEATURE_JSON_MAX_BYTES = 65536
+
+_INSERT_PAYLOAD_SQL = "INSERT OR IGNORE INTO feature_payloads (digest, payload_json) VALUES (?, ?)"
+
+_INSERT_TRAIN_SQL = _insert_sql("train_examples", _TRAIN_COLUMNS)
+
+def _error_type(e: Exception) -> str:
+    """Classify an exception for the error_type log field"""
+    if isinstance(e, (DatabaseError, sqlite3.Error)):
+        return "database"
+    return "unexpected"
+
+def _daily_rollup(rows: List[Tuple]) -> List[Tuple]:
+    """Total a batch of runs rows per UTC day, as _UPSERT_DAILY_SQL parameters"""
+    totals = {}
+    for row in rows:
+        day = row[_START_TS] // 86400
+        success = row[_SUCCESS] or 0
+        retries = row[_RETRIES] or 0
+        latency_ms = row[_LATENCY_MS] or 0
+        total = totals.get(day)
+        if total is None:
+            totals[day] = [1, success, latency_ms, retries]
+        else:
+            total[0] += 1
+            total[1] += success
+            total[2] += latency_ms
+            total[3] += retries
+    return [
+        (time.strftime("%Y-%m-%d", time.gmtime(day * 86400)), n, success, latency_ms, retries)
+        for day, (n, success, latency_ms, retries) in totals.items()
+    ]
 
 class MetricsCollector:
     """Collector for system and task metrics"""
     
-    def __init__(self, db_path: str = "data/core.db"):
+    def __init__(self, db_path: str = "data/core.db", flush_size: int = 500, flush_interval: float = 1.0,
+                 max_pending: int = 100000, reservoir_size: int = 1024, reservoir_interval: float = 300.0):
         self.logger = logging.getLogger(__name__)
         self.collect_count = 0
         self.logger.info("Initializing Metrics Collector")
         
+        # collect_task_metrics only queues a ready-to-insert row; a flusher
+        # thread writes the queue with one executemany per transaction every
+        # flush_interval seconds, or as soon as flush_size rows are waiting.
+        # deque appends and pops are atomic, so producers never take a lock;
+        # past max_pending rows new runs are dropped and counted instead
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = deque()
+        self.dropped_count = 0
+        self._dropped_lock = threading.Lock()
+        self._flush_wanted = threading.Event()
+        self._stop = threading.Event()
+        
+        # Training examples are reservoir-sampled (algorithm R): each
+        # (agent, tool) keeps a uniform sample of at most reservoir_size of
+        # the examples seen in the current reservoir_interval, and the
+        # flusher writes the samples out at the end of the interval. Each
+        # stored example carries sample_weight = seen / kept, so weighted
+        # statistics over train_examples stay unbiased. Samples not yet
+        # written are lost if the process is killed, hence the short interval
+        # and the flush on close and at exit.
+        # (agent, tool) -> [examples seen, sampled rows]
+        self.reservoir_size = reservoir_size
+        self.reservoir_interval = reservoir_interval
+        self._reservoirs = {}
+        self._reservoir_lock = threading.Lock()
+        self._reservoir_deadline = time.monotonic() + reservoir_interval
+        
+        self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flusher", daemon=True)
+        self._flusher.start()
+        
+        # Prime the non-blocking CPU counter so the first collection reports
+        # usage since startup instead of 0.0; the CPU count never changes
+        psutil.cpu_percent(interval=None)
+        self._cpu_count = psutil.cpu_count()
+        
+        # name -> (value, monotonic time it was read), for the slower tiers
+        self._tier_cache = {}
+        # Background refreshes run one at a time; names being refreshed
+        self._tier_refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="metrics-refresh")
+        self._tier_refreshing = set()
+        
+        # Write out queued runs and pending samples on interpreter exit
+        atexit.register(self.close)
+        
+    def _tiered(self, name: str, ttl: float, read: Callable[[], Any], background: bool = False) -> Any:
+        """
+        Return a cached psutil reading, re-reading it once it is older than ttl.
+        
+        With background=True a stale reading is returned as is while a
+        refresh runs on the refresher thread; only the very first read
+        blocks the caller.
+        """
+        now = time.monotonic()
+        cached = self._tier_cache.get(name)
+        if cached is not None and now - cached[1] < ttl:
+            return cached[0]
+        if cached is not None and background:
+            if name not in self._tier_refreshing:
+                self._tier_refreshing.add(name)
+                self._tier_refresher.submit(self._refresh_tier, name, read)
+            return cached[0]
+        value = read()
+        self._tier_cache[name] = (value, now)
+        return value
+    
+    def _refresh_tier(self, name: str, read: Callable[[], Any]):
+        """Re-read one tier on the refresher thread"""
+        try:
+            self._tier_cache[name] = (read(), time.monotonic())
+        except Exception as e:
+            # Keep serving the previous reading; the next stale hit retries
+            self.logger.warning("Error refreshing system metric", extra={
+                "event": "metrics_system_refresh_error",
+                "metric": name,
+                "error": str(e),
+                "error_type": type(e).__name__
+            })
+        finally:
+            self._tier_refreshing.discard(name)
+    
     def collect_system_metrics(self) -> Dict[str, Any]:
         """Collect system-level metrics"""
         start_time = time.time()
         self.collect_count += 1
         
-        self.logger.debug("Collecting system metrics", extra={
-            "event": "metrics_system_start",
-            "collect_count": self.collect_count
-        })
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Collecting system metrics", extra={
+                "event": "metrics_system_start",
+                "collect_count": self.collect_count
+            })
         
         try:
-            # CPU metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
-            cpu_count = psutil.cpu_count()
+            # CPU metrics: usage since the previous call, without sleeping
+            cpu_percent = psutil.cpu_percent(interval=None)
+            cpu_count = self._cpu_count
             
             # Memory metrics
-            memory = psutil.virtual_memory()
+            memory = self._tiered("memory", _MEMORY_TTL_SECONDS, psutil.virtual_memory)
             memory_percent = memory.percent
             memory_available = memory.available / (1024 * 1024)  # MB
             
             # Disk metrics
-            disk = psutil.disk_usage("/")
+            disk = self._tiered("disk", _DISK_TTL_SECONDS, lambda: psutil.disk_usage("/"), background=True)
             disk_percent = (disk.used / disk.total) * 100
             
             # Network metrics
-            net_io = psutil.net_io_counters()
+            net_io = self._tiered("network", _NETWORK_TTL_SECONDS, psutil.net_io_counters, background=True)
             network_bytes_sent = net_io.bytes_sent
             network_bytes_recv = net_io.bytes_recv
             
-            collect_time = time.time() - start_time
             metrics = {
                 "timestamp": time.time(),
                 "cpu_percent": cpu_percent,
@@ -59,14 +236,16 @@ class MetricsCollector:
                 "network_bytes_recv": network_bytes_recv
             }
             
-            self.logger.info("System metrics collected successfully", extra={
-                "event": "metrics_system_collected",
-                "cpu_percent": cpu_percent,
-                "memory_percent": memory_percent,
-                "disk_percent": disk_percent,
-                "collect_time_ms": round(collect_time * 1000, 2),
-                "collect_count": self.collect_count
-            })
+            if self.logger.isEnabledFor(logging.INFO):
+                collect_time = time.time() - start_time
+                self.logger.info("System metrics collected successfully", extra={
+                    "event": "metrics_system_collected",
+                    "cpu_percent": cpu_percent,
+                    "memory_percent": memory_percent,
+                    "disk_percent": disk_percent,
+                    "collect_time_ms": round(collect_time * 1000, 2),
+                    "collect_count": self.collect_count
+                })
             
             return metrics
         except Exception as e:
@@ -82,17 +261,17 @@ class MetricsCollector:
     def collect_task_metrics(self, task_id: int, agent: str, tool: str, params: Dict[str, Any],
                            start_time: float, end_time: float, success: bool, error_code: str = None,
                            retries: int = 0, bytes_in: int = 0, bytes_out: int = 0) -> bool:
-        """Collect and store task-level metrics"""
-        collect_start = time.time()
-        self.collect_count += 1
+        """
+        Queue task-level metrics for storage.
         
-        self.logger.debug("Collecting task metrics", extra={
-            "event": "metrics_task_start",
-            "task_id": task_id,
-            "agent": agent,
-            "tool": tool,
-            "collect_count": self.collect_count
-        })
+        The run is written by the next batch flush, at most flush_interval
+        seconds later; call flush() to write queued runs immediately.
+        
+        Returns:
+            True if the run was queued, False if it was dropped because
+            max_pending runs are already waiting
+        """
+        self.collect_count += 1
         
         try:
             # Calculate metrics
@@ -100,104 +279,271 @@ class MetricsCollector:
             cpu_ms = 0  # Would need more detailed tracking to measure this accurately
             mem_mb = 0  # Would need more detailed tracking to measure this accurately
             
-            # Store in database
-            with db_pool.connection() as conn:
-                cursor = conn.cursor()
-                
-                # Insert run record
-                cursor.execute("""
-                    INSERT INTO runs (task_id, agent, tool, params_json, start_ts, end_ts, success, error_code, retries,
-                                    bytes_in, bytes_out, latency_ms, cpu_ms, mem_mb, notes)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (task_id, agent, tool, json.dumps(params), int(start_time), int(end_time), int(success), error_code, retries,
-                      bytes_in, bytes_out, latency_ms, cpu_ms, mem_mb, ""))
-                
-                conn.commit()
-            
-            collect_time = time.time() - collect_start
-            self.logger.info("Task metrics collected and stored successfully", extra={
-                "event": "metrics_task_collected",
+            # Serialize now so the flusher only does database work
+            row = (task_id, agent, tool, fastjson.dumps_str(params), int(start_time), int(end_time), int(success), error_code,
+                   retries, bytes_in, bytes_out, latency_ms, cpu_ms, mem_mb, "")
+        except Exception as e:
+            self.logger.error("Error collecting task metrics due to unexpected error", extra={
+                "event": "metrics_task_error",
+                "task_id": task_id,
+                "agent": agent,
+                "tool": tool,
+                "error": str(e),
+                "error_type": "unexpected",
+                "collect_count": self.collect_count
+            })
+            return False
+        
+        # Counted for Prometheus even if the run is dropped below
+        record_task_run(agent, tool, success, latency_ms)
+        
+        pending = len(self._pending)
+        if pending >= self.max_pending:
+            # Only the overflow path locks, to keep the count exact
+            with self._dropped_lock:
+                self.dropped_count += 1
+                dropped = self.dropped_count
+            record_dropped_run()
+            if dropped == 1 or dropped % _DROPPED_LOG_EVERY == 0:
+                self.logger.warning("Task metrics queue full, dropping run", extra={
+                    "event": "metrics_task_dropped",
+                    "task_id": task_id,
+                    "pending": pending,
+                    "dropped_count": dropped
+                })
+            self._flush_wanted.set()
+            return False
+        
+        self._pending.append(row)
+        pending += 1
+        if pending >= self.flush_size:
+            self._flush_wanted.set()
+        
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Task metrics queued", extra={
+                "event": "metrics_task_queued",
                 "task_id": task_id,
                 "agent": agent,
                 "tool": tool,
                 "success": success,
                 "latency_ms": latency_ms,
-                "retries": retries,
-                "bytes_in": bytes_in,
-                "bytes_out": bytes_out,
-                "collect_time_ms": round(collect_time * 1000, 2),
+                "pending": pending,
                 "collect_count": self.collect_count
             })
-            
+        return True
+    
+    def collect_task_metrics_bulk(self, rows: List[Tuple]) -> bool:
+        """
+        Store many run records in a single transaction.
+        
+        The day's totals in metrics_daily are updated in the same
+        transaction.
+        
+        Args:
+            rows: Tuples in runs column order (task_id, agent, tool, params_json,
+                start_ts, end_ts, success, error_code, retries, bytes_in,
+                bytes_out, latency_ms, cpu_ms, mem_mb, notes)
+        
+        Returns:
+            True if every row was stored
+        """
+        if not rows:
             return True
+        
+        try:
+            with db_pool.connection() as conn:
+                return self._store_runs(conn.cursor(), rows)
         except DatabaseError as e:
-            collect_time = time.time() - collect_start
-            self.logger.error("Error collecting task metrics due to database error", extra={
+            # _store_runs handles its own errors, so only checking out a
+            # connection can fail here
+            self.logger.error("Error storing task metrics due to database error", extra={
                 "event": "metrics_task_error",
-                "task_id": task_id,
-                "agent": agent,
-                "tool": tool,
+                "batch_size": len(rows),
                 "error": str(e),
                 "error_type": "database",
-                "collect_time_ms": round(collect_time * 1000, 2),
                 "collect_count": self.collect_count
             })
             return False
+    
+    def _store_runs(self, cursor: sqlite3.Cursor, rows: List[Tuple]) -> bool:
+        """Insert rows into runs with cursor in one explicit transaction"""
+        collect_start = time.time()
+        try:
+            cursor.execute("BEGIN")
+            try:
+                cursor.executemany(_INSERT_RUN_SQL, rows)
+                # Keep metrics_daily current in the same transaction
+                cursor.executemany(_UPSERT_DAILY_SQL, _daily_rollup(rows))
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            
+            if self.logger.isEnabledFor(logging.INFO):
+                collect_time = time.time() - collect_start
+                self.logger.info("Task metrics stored successfully", extra={
+                    "event": "metrics_task_collected",
+                    "batch_size": len(rows),
+                    "collect_time_ms": round(collect_time * 1000, 2),
+                    "collect_count": self.collect_count
+                })
+            return True
         except Exception as e:
             collect_time = time.time() - collect_start
-            self.logger.error("Error collecting task metrics due to unexpected error", extra={
+            error_type = _error_type(e)
+            self.logger.error(f"Error storing task metrics due to {error_type} error", extra={
                 "event": "metrics_task_error",
-                "task_id": task_id,
-                "agent": agent,
-                "tool": tool,
+                "batch_size": len(rows),
                 "error": str(e),
-                "error_type": "unexpected",
+                "error_type": error_type,
                 "collect_time_ms": round(collect_time * 1000, 2),
                 "collect_count": self.collect_count
             })
             return False
     
+    def _take_pending(self) -> List[Tuple]:
+        """Remove and return all queued run rows"""
+        rows = []
+        popleft = self._pending.popleft
+        try:
+            # Bounded so rows appended meanwhile wait for the next batch
+            for _ in range(len(self._pending)):
+                rows.append(popleft())
+        except IndexError:
+            # Another thread flushed concurrently
+            pass
+        return rows
+    
+    def flush(self) -> bool:
+        """Write all queued task metrics now; returns False if the write failed"""
+        return self.collect_task_metrics_bulk(self._take_pending())
+    
+    def _flush_loop(self):
+        """Flush queued task metrics periodically until closed"""
+        # The flusher keeps its own autocommit connection and one cursor for
+        # its whole lifetime, so each batch is just BEGIN, one executemany of
+        # the same statement (a hit in SQLite's statement cache) and COMMIT
+        conn = None
+        cursor = None
+        try:
+            while not self._stop.is_set():
+                self._flush_wanted.wait(self.flush_interval)
+                self._flush_wanted.clear()
+                if time.monotonic() >= self._reservoir_deadline:
+                    self.flush_training_examples()
+                rows = self._take_pending()
+                if not rows:
+                    continue
+                try:
+                    if cursor is None:
+                        conn = db_pool.connect(isolation_level=None)
+                        cursor = conn.cursor()
+                except Exception as e:
+                    self.logger.error("Error opening metrics flusher connection", extra={
+                        "event": "metrics_flusher_connect_error",
+                        "batch_size": len(rows),
+                        "error": str(e),
+                        "error_type": type(e).__name__
+                    })
+                    continue
+                if not self._store_runs(cursor, rows):
+                    # Start over with a fresh connection for the next batch
+                    conn.close()
+                    conn = cursor = None
+        finally:
+            if conn is not None:
+                conn.close()
+    
+    def flush_training_examples(self) -> bool:
+        """
+        Write the sampled training examples and start new reservoirs.
+        
+        Returns:
+            True if the samples were stored (or there were none)
+        """
+        with self._reservoir_lock:
+            reservoirs = self._reservoirs
+            self._reservoirs = {}
+            self._reservoir_deadline = time.monotonic() + self.reservoir_interval
+        
+        rows = []
+        payloads = {}
+        for seen, sampled in reservoirs.values():
+            weight = seen / len(sampled)
+            for row in sampled:
+                rows.append(row[:7] + (weight,))
+                if row[7] is not None:
+                    payloads[row[7][0]] = row[7][1]
+        if not rows:
+            return True
+        
+        flush_start = time.time()
+        try:
+            with db_pool.connection() as conn:
+                if payloads:
+                    conn.executemany(_INSERT_PAYLOAD_SQL, payloads.items())
+                conn.executemany(_INSERT_TRAIN_SQL, rows)
+                conn.commit()
+            
+            if self.logger.isEnabledFor(logging.INFO):
+                flush_time = time.time() - flush_start
+                self.logger.info("Training example samples stored successfully", extra={
+                    "event": "metrics_training_flushed",
+                    "buckets": len(reservoirs),
+                    "examples_seen": sum(seen for seen, _ in reservoirs.values()),
+                    "examples_stored": len(rows),
+                    "flush_time_ms": round(flush_time * 1000, 2)
+                })
+            return True
+        except Exception as e:
+            flush_time = time.time() - flush_start
+            error_type = _error_type(e)
+            self.logger.error(f"Error storing training example samples due to {error_type} error", extra={
+                "event": "metrics_training_error",
+                "batch_size": len(rows),
+                "error": str(e),
+                "error_type": error_type,
+                "flush_time_ms": round(flush_time * 1000, 2)
+            })
+            return False
+    
+    def close(self, timeout: float = 5.0):
+        """Stop the flusher thread and write any queued task metrics and samples"""
+        atexit.unregister(self.close)
+        self._stop.set()
+        self._flush_wanted.set()
+        self._flusher.join(timeout)
+        self._tier_refresher.shutdown(wait=False)
+        self.flush()
+        self.flush_training_examples()
+    
     def aggregate_daily_metrics(self) -> bool:
-        """Aggregate daily metrics from runs table"""
+        """
+        Report today's daily metrics.
+        
+        metrics_daily is maintained incrementally as runs are written, so
+        this is a single primary-key lookup rather than a scan of today's
+        runs. Days are UTC, matching the rollup.
+        """
         start_time = time.time()
         self.collect_count += 1
         
-        self.logger.debug("Aggregating daily metrics", extra={
-            "event": "metrics_daily_start",
-            "collect_count": self.collect_count
-        })
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Aggregating daily metrics", extra={
+                "event": "metrics_daily_start",
+                "collect_count": self.collect_count
+            })
         
         try:
+            today = datetime.now(timezone.utc).date().isoformat()
             with db_pool.connection() as conn:
-                cursor = conn.cursor()
-                
-                # Get today's date
-                today = datetime.now().strftime("%Y-%m-%d")
-                
-                # Aggregate metrics for today
-                cursor.execute("""
-                    SELECT
-                        COUNT(*) as tasks_completed,
-                        AVG(success) as success_rate,
-                        AVG(latency_ms) as avg_latency_ms,
-                        AVG(retries) as avg_retries
-                    FROM runs
-                    WHERE date(start_ts, 'unixepoch') = ?
-                """, (today,))
-                
-                result = cursor.fetchone()
-                
-                if result:
-                    tasks_completed, success_rate, avg_latency_ms, avg_retries = result
-                    
-                    # Insert or update daily metrics
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO metrics_daily (day, tasks_completed, success_rate, avg_latency_ms, avg_retries)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (today, tasks_completed or 0, success_rate or 0, avg_latency_ms or 0, avg_retries or 0))
-                    
-                    conn.commit()
-                
+                result = conn.execute("""
+                    SELECT tasks_completed, success_rate, avg_latency_ms, avg_retries
+                    FROM metrics_daily_avg
+                    WHERE day = ?
+                """, (today,)).fetchone()
+            tasks_completed, success_rate, avg_latency_ms, avg_retries = result or (0, 0, 0, 0)
+            
             aggregate_time = time.time() - start_time
             self.logger.info("Daily metrics aggregated successfully", extra={
                 "event": "metrics_daily_aggregated",
@@ -211,22 +557,13 @@ class MetricsCollector:
             })
             
             return True
-        except DatabaseError as e:
-            aggregate_time = time.time() - start_time
-            self.logger.error("Error aggregating daily metrics due to database error", extra={
-                "event": "metrics_daily_error",
-                "error": str(e),
-                "error_type": "database",
-                "aggregate_time_ms": round(aggregate_time * 1000, 2),
-                "collect_count": self.collect_count
-            })
-            return False
         except Exception as e:
             aggregate_time = time.time() - start_time
-            self.logger.error("Error aggregating daily metrics due to unexpected error", extra={
+            error_type = _error_type(e)
+            self.logger.error(f"Error aggregating daily metrics due to {error_type} error", extra={
                 "event": "metrics_daily_error",
                 "error": str(e),
-                "error_type": "unexpected",
+                "error_type": error_type,
                 "aggregate_time_ms": round(aggregate_time * 1000, 2),
                 "collect_count": self.collect_count
             })
@@ -234,62 +571,85 @@ class MetricsCollector:
     
     def collect_training_example(self, agent: str, tool: str, features: Dict[str, Any],
                                success: bool, latency_ms: int) -> bool:
-        """Collect a training example for the learning loop"""
+        """
+        Collect a training example for the learning loop.
+        
+        The example enters its (agent, tool) reservoir and is only stored if
+        it is still in the sample when the reservoir is written out; call
+        flush_training_examples() to write the samples immediately.
+        
+        Returns:
+            True if the example was offered to the sample
+        """
         start_time = time.time()
         self.collect_count += 1
         
-        self.logger.debug("Collecting training example", extra={
-            "event": "metrics_training_start",
-            "agent": agent,
-            "tool": tool,
-            "collect_count": self.collect_count
-        })
-        
-        try:
-            with db_pool.connection() as conn:
-                cursor = conn.cursor()
-                
-                # Insert training example
-                cursor.execute("""
-                    INSERT INTO train_examples (agent, tool, feature_json, label_success, label_latency_ms, created_ts)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (agent, tool, json.dumps(features), int(success), latency_ms, int(time.time())))
-                
-                conn.commit()
-            
-            collect_time = time.time() - start_time
-            self.logger.info("Training example collected and stored successfully", extra={
-                "event": "metrics_training_collected",
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Collecting training example", extra={
+                "event": "metrics_training_start",
                 "agent": agent,
                 "tool": tool,
-                "success": success,
-                "latency_ms": latency_ms,
-                "feature_count": len(features) if features else 0,
-                "collect_time_ms": round(collect_time * 1000, 2),
                 "collect_count": self.collect_count
             })
+        
+        try:
+            # Features are also stored packed as little-endian float64 so the
+            # learning loop can load them without parsing JSON; examples with
+            # non-numeric features keep only the JSON and are not trained on
+            try:
+                feature_blob = np.asarray(list(features.values()), dtype="<f8").tobytes()
+            except (AttributeError, TypeError, ValueError):
+                feature_blob = None
+            
+            # The last element carries an oversized payload until the sample
+            # is written, so only payloads that stay in the sample are stored
+            payload = fastjson.dumps(features)
+            if len(payload) > _FEATURE_JSON_MAX_BYTES:
+                digest = hashlib.blake2b(payload, digest_size=16).hexdigest()
+                feature_json = '{"$ref":"%s"}' % digest
+                oversized = (digest, payload.decode())
+            else:
+                feature_json = payload.decode()
+                oversized = None
+            row = (agent, tool, feature_json, feature_blob, int(success), latency_ms, int(start_time), oversized)
+            key = (agent, tool)
+            with self._reservoir_lock:
+                reservoir = self._reservoirs.get(key)
+                if reservoir is None:
+                    reservoir = self._reservoirs[key] = [0, []]
+                reservoir[0] += 1
+                seen, rows = reservoir
+                if len(rows) < self.reservoir_size:
+                    rows.append(row)
+                else:
+                    # Keep the new example with probability size / seen
+                    slot = random.randrange(seen)
+                    if slot < self.reservoir_size:
+                        rows[slot] = row
+            
+            if self.logger.isEnabledFor(logging.INFO):
+                collect_time = time.time() - start_time
+                self.logger.info("Training example collected and sampled successfully", extra={
+                    "event": "metrics_training_collected",
+                    "agent": agent,
+                    "tool": tool,
+                    "success": success,
+                    "latency_ms": latency_ms,
+                    "feature_count": len(features) if features else 0,
+                    "collect_time_ms": round(collect_time * 1000, 2),
+                    "collect_count": self.collect_count
+                })
             
             return True
-        except DatabaseError as e:
-            collect_time = time.time() - start_time
-            self.logger.error("Error collecting training example due to database error", extra={
-                "event": "metrics_training_error",
-                "agent": agent,
-                "tool": tool,
-                "error": str(e),
-                "error_type": "database",
-                "collect_time_ms": round(collect_time * 1000, 2),
-                "collect_count": self.collect_count
-            })
-            return False
         except Exception as e:
             collect_time = time.time() - start_time
-            self.logger.error("Error collecting training example due to unexpected error", extra={
+            error_type = _error_type(e)
+            self.logger.error(f"Error collecting training example due to {error_type} error", extra={
                 "event": "metrics_training_error",
                 "agent": agent,
                 "tool": tool,
                 "error": str(e),
-                "error_type": "unexpected",
+                "error_type": error_type,
                 "collect_time_ms": round(collect_time * 1000, 2),
                 "collect_count": self.collect_count
             })
@@ -298,7 +658,10 @@ class MetricsCollector:
     def get_metrics_info(self) -> Dict[str, Any]:
         """Get information about the metrics collector for monitoring"""
         return {
-            "collect_count": self.collect_count
+            "collect_count": self.collect_count,
+            "pending_task_metrics": len(self._pending),
+            "dropped_task_metrics": self.dropped_count,
+            "training_reservoirs": len(self._reservoirs)
         }
 
 if __name__ == "__main__":
@@ -323,6 +686,7 @@ if __name__ == "__main__":
         bytes_out=2048
     )
     print(f"Task metrics collection: {'Success' if task_success else 'Failed'}")
+    collector.flush()
     
     # Aggregate daily metrics
     daily_success = collector.aggregate_daily_metrics()
@@ -1,13 +1,79 @@
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 import logging
-import json
 import os
 import time
 import redis
 
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
 # Local imports
-from .redis_pool import redis_pool
+from .redis_pool import get_redis_pool
 from .exceptions import RedisError
+from . import fastjson
+
+# Payloads are MessagePack when available, JSON otherwise. Readers accept
+# both: a JSON object starts with '{', which no MessagePack map does, so
+# messages queued before a switch stay readable. Queue connections are
+# binary so payloads come back as bytes
+if msgpack is not None:
+    def _msgpack_default(obj: Any) -> Any:
+        # NumPy scalars and arrays both expose tolist()
+        if hasattr(obj, "tolist"):
+            return obj.tolist()
+        raise TypeError(f"Object of type {type(obj).__name__} is not MessagePack serializable")
+    
+    def _pack(message: Dict[str, Any]) -> bytes:
+        return msgpack.packb(message, use_bin_type=True, default=_msgpack_default)
+else:
+    _pack = fastjson.dumps
+
+def _unpack(payload: bytes) -> Dict[str, Any]:
+    if msgpack is None or payload[:1] == b"{":
+        return fastjson.loads(payload)
+    return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+
+# enqueue_many sends at most this many messages per LPUSH command; all
+# commands still go out in one pipelined round-trip
+_LPUSH_CHUNK_SIZE = 512
+
+# Atomically pops the n oldest messages (the right end of the list) and
+# counts them in the stats hash. LRANGE returns them newest first;
+# dequeue_batch reverses them into queue order
+_POP_BATCH_LUA = """
+local n = tonumber(ARGV[1])
+local m = redis.call('LRANGE', KEYS[1], -n, -1)
+if #m > 0 then
+    redis.call('LTRIM', KEYS[1], 0, -n - 1)
+    redis.call('HINCRBY', KEYS[2], 'dequeue', #m)
+end
+return m
+"""
+
+# Moves every in-flight message back onto the consuming end of the queue,
+# oldest last so it is dequeued first; returns how many were moved
+_REQUEUE_INFLIGHT_LUA = """
+local n = 0
+while true do
+    local m = redis.call('LPOP', KEYS[1])
+    if not m then
+        break
+    end
+    redis.call('RPUSH', KEYS[2], m)
+    n = n + 1
+end
+return n
+"""
+
+# Error kinds for _log_error, most specific first: (exception type, event
+# suffix, message prefix). Anything else is logged as unexpected
+_ERROR_KINDS = (
+    (redis.ConnectionError, "redis_connection_error", "Redis connection error"),
+    (redis.TimeoutError, "redis_timeout_error", "Redis timeout error"),
+    (redis.RedisError, "redis_error", "Redis error"),
+)
 
 class MessageQueue:
     """Message queue for inter-component communication with Redis error handling"""
@@ -18,13 +84,21 @@ class MessageQueue:
         self.dequeue_count = 0
         self.logger.info("Initializing Message Queue")
         
-        # Store queue name
+        # Store queue name. Totals that survive restarts and are shared by
+        # every MessageQueue on the same queue live in a Redis hash;
+        # enqueue_count and dequeue_count only count this instance
         self.queue_name = queue_name
+        self.stats_key = f"mq:stats:{queue_name}"
+        # Messages taken with dequeue_reliable wait here until acked
+        self.inflight_key = f"{queue_name}:inflight"
         
-        # Test Redis connection
+        # Check Redis once per process rather than once per queue handle;
+        # registering the scripts is local, so construction is otherwise
+        # free of round-trips
         try:
-            with redis_pool.connection() as conn:
-                conn.ping()
+            get_redis_pool().on_startup_probe()
+            self._pop_batch = get_redis_pool().register_script(_POP_BATCH_LUA, binary=True)
+            self._requeue_inflight = get_redis_pool().register_script(_REQUEUE_INFLIGHT_LUA, binary=True)
             self.logger.info("MessageQueue initialized successfully", extra={
                 "event": "mq_init_success",
                 "queue_name": queue_name
@@ -46,74 +120,112 @@ class MessageQueue:
             })
             raise RedisError(f"Failed to initialize MessageQueue: {str(e)}", "MQ_INIT_ERROR")
         
+    def _log_error(self, e: Exception, event: str, action: str, **fields):
+        """
+        Log a failed queue operation.
+        
+        Args:
+            e: The exception raised
+            event: Event name prefix, e.g. "mq_enqueue"
+            action: What was being done, e.g. "during enqueue"
+            **fields: Extra structured fields for the log record
+        """
+        for error_type, suffix, label in _ERROR_KINDS:
+            if isinstance(e, error_type):
+                break
+        else:
+            suffix, label = "unexpected_error", "Unexpected error"
+        self.logger.error(f"{label} {action}", extra={
+            "event": f"{event}_{suffix}",
+            "queue_name": self.queue_name,
+            "error": str(e),
+            "error_type": type(e).__name__,
+            **fields
+        })
+        
     def enqueue(self, message: Dict[str, Any]) -> bool:
         """Enqueue a message with Redis error handling"""
         start_time = time.time()
         self.enqueue_count += 1
         
-        # Log the enqueue attempt
-        self.logger.debug("Enqueuing message", extra={
-            "event": "mq_enqueue_start",
-            "queue_name": self.queue_name,
-            "message_type": message.get("type", "unknown"),
-            "enqueue_count": self.enqueue_count
-        })
-        
-        try:
-            with redis_pool.connection() as conn:
-                conn.lpush(self.queue_name, json.dumps(message))
-            enqueue_time = time.time() - start_time
-            self.logger.info("Message enqueued successfully", extra={
-                "event": "mq_enqueue_success",
+        # Log the enqueue attempt; the extra dicts are only built when the
+        # level is enabled, since enqueue is on every task's path
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Enqueuing message", extra={
+                "event": "mq_enqueue_start",
                 "queue_name": self.queue_name,
                 "message_type": message.get("type", "unknown"),
-                "enqueue_time_ms": round(enqueue_time * 1000, 2),
                 "enqueue_count": self.enqueue_count
             })
+        
+        try:
+            with get_redis_pool().connection(binary=True) as conn:
+                # The counter update rides in the same round-trip as the push
+                pipe = conn.pipeline(transaction=False)
+                pipe.lpush(self.queue_name, _pack(message))
+                pipe.hincrby(self.stats_key, "enqueue", 1)
+                pipe.execute()
+            if self.logger.isEnabledFor(logging.INFO):
+                enqueue_time = time.time() - start_time
+                self.logger.info("Message enqueued successfully", extra={
+                    "event": "mq_enqueue_success",
+                    "queue_name": self.queue_name,
+                    "message_type": message.get("type", "unknown"),
+                    "enqueue_time_ms": round(enqueue_time * 1000, 2),
+                    "enqueue_count": self.enqueue_count
+                })
             return True
-        except redis.ConnectionError as e:
-            enqueue_time = time.time() - start_time
-            self.logger.error("Redis connection error during enqueue", extra={
-                "event": "mq_enqueue_redis_connection_error",
-                "queue_name": self.queue_name,
-                "error": str(e),
-                "error_type": type(e).__name__,
-                "enqueue_time_ms": round(enqueue_time * 1000, 2),
-                "enqueue_count": self.enqueue_count
-            })
-            return False
-        except redis.TimeoutError as e:
-            enqueue_time = time.time() - start_time
-            self.logger.error("Redis timeout error during enqueue", extra={
-                "event": "mq_enqueue_redis_timeout_error",
-                "queue_name": self.queue_name,
-                "error": str(e),
-                "error_type": type(e).__name__,
-                "enqueue_time_ms": round(enqueue_time * 1000, 2),
-                "enqueue_count": self.enqueue_count
-            })
-            return False
-        except redis.RedisError as e:
+        except Exception as e:
             enqueue_time = time.time() - start_time
-            self.logger.error("Redis error during enqueue", extra={
-                "event": "mq_enqueue_redis_error",
-                "queue_name": self.queue_name,
-                "error": str(e),
-                "error_type": type(e).__name__,
-                "enqueue_time_ms": round(enqueue_time * 1000, 2),
-                "enqueue_count": self.enqueue_count
-            })
+            self._log_error(e, "mq_enqueue", "during enqueue",
+                            enqueue_time_ms=round(enqueue_time * 1000, 2),
+                            enqueue_count=self.enqueue_count)
             return False
+        
+    def enqueue_many(self, messages: Iterable[Dict[str, Any]]) -> bool:
+        """
+        Enqueue several messages in one pipelined round-trip.
+        
+        Messages are pushed in order, so they are dequeued in the same order
+        as if enqueue had been called for each one.
+        
+        Args:
+            messages: Messages to enqueue
+        
+        Returns:
+            True if every message was enqueued
+        """
+        start_time = time.time()
+        payloads = []
+        
+        try:
+            payloads = [_pack(message) for message in messages]
+            if not payloads:
+                return True
+            self.enqueue_count += len(payloads)
+            
+            with get_redis_pool().connection(binary=True) as conn:
+                pipe = conn.pipeline(transaction=False)
+                for i in range(0, len(payloads), _LPUSH_CHUNK_SIZE):
+                    pipe.lpush(self.queue_name, *payloads[i:i + _LPUSH_CHUNK_SIZE])
+                pipe.hincrby(self.stats_key, "enqueue", len(payloads))
+                pipe.execute()
+            if self.logger.isEnabledFor(logging.INFO):
+                enqueue_time = time.time() - start_time
+                self.logger.info("Messages enqueued successfully", extra={
+                    "event": "mq_enqueue_many_success",
+                    "queue_name": self.queue_name,
+                    "batch_size": len(payloads),
+                    "enqueue_time_ms": round(enqueue_time * 1000, 2),
+                    "enqueue_count": self.enqueue_count
+                })
+            return True
         except Exception as e:
             enqueue_time = time.time() - start_time
-            self.logger.error("Unexpected error during enqueue", extra={
-                "event": "mq_enqueue_unexpected_error",
-                "queue_name": self.queue_name,
-                "error": str(e),
-                "error_type": type(e).__name__,
-                "enqueue_time_ms": round(enqueue_time * 1000, 2),
-                "enqueue_count": self.enqueue_count
-            })
+            self._log_error(e, "mq_enqueue", "during enqueue_many",
+                            batch_size=len(payloads),
+                            enqueue_time_ms=round(enqueue_time * 1000, 2),
+                            enqueue_count=self.enqueue_count)
             return False
         
     def dequeue(self, timeout: float = 1.0) -> Dict[str, Any]:
@@ -122,139 +234,210 @@ class MessageQueue:
         self.dequeue_count += 1
         
         # Log the dequeue attempt
-        self.logger.debug("Dequeuing message", extra={
-            "event": "mq_dequeue_start",
-            "queue_name": self.queue_name,
-            "dequeue_count": self.dequeue_count,
-            "timeout": timeout
-        })
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Dequeuing message", extra={
+                "event": "mq_dequeue_start",
+                "queue_name": self.queue_name,
+                "dequeue_count": self.dequeue_count,
+                "timeout": timeout
+            })
         
         try:
-            with redis_pool.connection() as conn:
+            with get_redis_pool().connection(binary=True) as conn:
                 message = conn.brpop(self.queue_name, timeout=timeout)
-            dequeue_time = time.time() - start_time
+                if message:
+                    conn.hincrby(self.stats_key, "dequeue", 1)
+            log_info = self.logger.isEnabledFor(logging.INFO)
             if message:
-                msg_data = json.loads(message[1])
+                msg_data = _unpack(message[1])
+                if log_info:
+                    dequeue_time = time.time() - start_time
+                    self.logger.info("Message dequeued successfully", extra={
+                        "event": "mq_dequeue_success",
+                        "queue_name": self.queue_name,
+                        "message_type": msg_data.get("type", "unknown"),
+                        "dequeue_time_ms": round(dequeue_time * 1000, 2),
+                        "has_message": True,
+                        "dequeue_count": self.dequeue_count
+                    })
+                return msg_data
+            else:
+                if log_info:
+                    dequeue_time = time.time() - start_time
+                    self.logger.info("No message available for dequeue", extra={
+                        "event": "mq_dequeue_empty",
+                        "queue_name": self.queue_name,
+                        "dequeue_time_ms": round(dequeue_time * 1000, 2),
+                        "has_message": False,
+                        "dequeue_count": self.dequeue_count
+                    })
+                return {}
+        except Exception as e:
+            dequeue_time = time.time() - start_time
+            self._log_error(e, "mq_dequeue", "during dequeue",
+                            dequeue_time_ms=round(dequeue_time * 1000, 2),
+                            dequeue_count=self.dequeue_count)
+            return {}
+            
+    def dequeue_batch(self, n: int, timeout: float = 1.0) -> List[Dict[str, Any]]:
+        """
+        Dequeue up to n messages in one round-trip.
+        
+        Messages are returned oldest first, in the order dequeue would have
+        returned them. When the queue is empty this blocks like dequeue for
+        up to timeout seconds and returns the single message that arrives.
+        
+        Args:
+            n: Maximum number of messages to dequeue
+            timeout: Seconds to block when the queue is empty
+        
+        Returns:
+            List of messages, empty if none arrived or on error
+        
+        Raises:
+            ValueError: If n is less than 1
+        """
+        # The pop script takes the last n entries; n < 1 would read the
+        # whole list without removing it or trim the wrong end
+        if n < 1:
+            raise ValueError(f"dequeue_batch needs n >= 1, got {n}")
+        
+        start_time = time.time()
+        
+        try:
+            with get_redis_pool().connection(binary=True) as conn:
+                raw = self._pop_batch(keys=[self.queue_name, self.stats_key], args=[n], client=conn)
+                if raw:
+                    raw.reverse()
+                else:
+                    message = conn.brpop(self.queue_name, timeout=timeout)
+                    if message:
+                        conn.hincrby(self.stats_key, "dequeue", 1)
+                        raw = [message[1]]
+            messages = [_unpack(payload) for payload in raw]
+            self.dequeue_count += len(messages)
+            if self.logger.isEnabledFor(logging.DEBUG):
+                dequeue_time = time.time() - start_time
+                self.logger.debug("Message batch dequeued", extra={
+                    "event": "mq_dequeue_batch",
+                    "queue_name": self.queue_name,
+                    "batch_size": len(messages),
+                    "dequeue_time_ms": round(dequeue_time * 1000, 2),
+                    "dequeue_count": self.dequeue_count
+                })
+            return messages
+        except Exception as e:
+            dequeue_time = time.time() - start_time
+            self._log_error(e, "mq_dequeue", "during dequeue_batch",
+                            dequeue_time_ms=round(dequeue_time * 1000, 2),
+                            dequeue_count=self.dequeue_count)
+            return []
+            
+    def dequeue_reliable(self, timeout: float = 1.0) -> Tuple[Dict[str, Any], Optional[bytes]]:
+        """
+        Dequeue a message without losing it if the consumer dies.
+        
+        The message is atomically moved to the in-flight list
+        (BRPOPLPUSH) and stays there until ack is called with the returned
+        receipt; requeue_inflight puts unacknowledged messages back.
+        
+        Args:
+            timeout: Seconds to block when the queue is empty
+        
+        Returns:
+            (message, receipt), or ({}, None) if none arrived or on error
+        """
+        start_time = time.time()
+        
+        try:
+            with get_redis_pool().connection(binary=True) as conn:
+                payload = conn.brpoplpush(self.queue_name, self.inflight_key, timeout=timeout)
+                if payload is None:
+                    return {}, None
+                conn.hincrby(self.stats_key, "dequeue", 1)
+            self.dequeue_count += 1
+            msg_data = _unpack(payload)
+            if self.logger.isEnabledFor(logging.INFO):
+                dequeue_time = time.time() - start_time
                 self.logger.info("Message dequeued successfully", extra={
                     "event": "mq_dequeue_success",
                     "queue_name": self.queue_name,
                     "message_type": msg_data.get("type", "unknown"),
                     "dequeue_time_ms": round(dequeue_time * 1000, 2),
                     "has_message": True,
+                    "reliable": True,
                     "dequeue_count": self.dequeue_count
                 })
-                return msg_data
-            else:
-                self.logger.info("No message available for dequeue", extra={
-                "event": "mq_dequeue_empty",
-                "queue_name": self.queue_name,
-                "dequeue_time_ms": round(dequeue_time * 1000, 2),
-                "has_message": False,
-                "dequeue_count": self.dequeue_count
-            })
-                return {}
-        except redis.ConnectionError as e:
-            dequeue_time = time.time() - start_time
-            self.logger.error("Redis connection error during dequeue", extra={
-                "event": "mq_dequeue_redis_connection_error",
-                "queue_name": self.queue_name,
-                "error": str(e),
-                "error_type": type(e).__name__,
-                "dequeue_time_ms": round(dequeue_time * 1000, 2),
-                "dequeue_count": self.dequeue_count
-            })
-            return {}
-        except redis.TimeoutError as e:
-            dequeue_time = time.time() - start_time
-            self.logger.error("Redis timeout error during dequeue", extra={
-                "event": "mq_dequeue_redis_timeout_error",
-                "queue_name": self.queue_name,
-                "error": str(e),
-                "error_type": type(e).__name__,
-                "dequeue_time_ms": round(dequeue_time * 1000, 2),
-                "dequeue_count": self.dequeue_count
-            })
-            return {}
-        except redis.RedisError as e:
-            dequeue_time = time.time() - start_time
-            self.logger.error("Redis error during dequeue", extra={
-                "event": "mq_dequeue_redis_error",
-                "queue_name": self.queue_name,
-                "error": str(e),
-                "error_type": type(e).__name__,
-                "dequeue_time_ms": round(dequeue_time * 1000, 2),
-                "dequeue_count": self.dequeue_count
-            })
-            return {}
+            return msg_data, payload
         except Exception as e:
             dequeue_time = time.time() - start_time
-            self.logger.error("Unexpected error during dequeue", extra={
-                "event": "mq_dequeue_unexpected_error",
-                "queue_name": self.queue_name,
-                "error": str(e),
-                "error_type": type(e).__name__,
-                "dequeue_time_ms": round(dequeue_time * 1000, 2),
-                "dequeue_count": self.dequeue_count
-            })
-            return {}
+            self._log_error(e, "mq_dequeue", "during dequeue_reliable",
+                            dequeue_time_ms=round(dequeue_time * 1000, 2),
+                            dequeue_count=self.dequeue_count)
+            return {}, None
+            
+    def ack(self, receipt: bytes) -> bool:
+        """
+        Acknowledge a message taken with dequeue_reliable.
+        
+        Args:
+            receipt: The receipt dequeue_reliable returned with the message
+        
+        Returns:
+            True if the message was removed from the in-flight list
+        """
+        try:
+            with get_redis_pool().connection(binary=True) as conn:
+                return conn.lrem(self.inflight_key, 1, receipt) == 1
+        except Exception as e:
+            self._log_error(e, "mq_ack", "during ack")
+            return False
+            
+    def requeue_inflight(self) -> int:
+        """
+        Put every unacknowledged in-flight message back on the queue.
+        
+        Call this when consumers start, before any of them dequeues; with
+        several consumers on one queue, a message another live consumer is
+        still working on would be delivered twice.
+        
+        Returns:
+            Number of messages requeued, -1 on error
+        """
+        try:
+            with get_redis_pool().connection(binary=True) as conn:
+                requeued = self._requeue_inflight(keys=[self.inflight_key, self.queue_name], client=conn)
+            if requeued:
+                self.logger.warning("Requeued unacknowledged messages", extra={
+                    "event": "mq_requeue_inflight",
+                    "queue_name": self.queue_name,
+                    "requeued": requeued
+                })
+            return requeued
+        except Exception as e:
+            self._log_error(e, "mq_requeue", "requeuing in-flight messages")
+            return -1
             
     def get_queue_info(self) -> Dict[str, Any]:
         """Get information about the message queue for monitoring with Redis error handling"""
         try:
-            with redis_pool.connection() as conn:
-                queue_length = conn.llen(self.queue_name)
+            with get_redis_pool().connection(binary=True) as conn:
+                pipe = conn.pipeline(transaction=False)
+                pipe.llen(self.queue_name)
+                pipe.hmget(self.stats_key, "enqueue", "dequeue")
+                pipe.llen(self.inflight_key)
+                queue_length, (total_enqueued, total_dequeued), inflight = pipe.execute()
             return {
                 "queue_name": self.queue_name,
                 "queue_length": queue_length,
                 "enqueue_count": self.enqueue_count,
-                "dequeue_count": self.dequeue_count
-            }
-        except redis.ConnectionError as e:
-            self.logger.error("Redis connection error getting queue info", extra={
-                "event": "mq_get_info_redis_connection_error",
-                "queue_name": self.queue_name,
-                "error": str(e),
-                "error_type": type(e).__name__
-            })
-            return {
-                "queue_name": self.queue_name,
-                "queue_length": -1,
-                "enqueue_count": self.enqueue_count,
-                "dequeue_count": self.dequeue_count
-            }
-        except redis.TimeoutError as e:
-            self.logger.error("Redis timeout error getting queue info", extra={
-                "event": "mq_get_info_redis_timeout_error",
-                "queue_name": self.queue_name,
-                "error": str(e),
-                "error_type": type(e).__name__
-            })
-            return {
-                "queue_name": self.queue_name,
-                "queue_length": -1,
-                "enqueue_count": self.enqueue_count,
-                "dequeue_count": self.dequeue_count
-            }
-        except redis.RedisError as e:
-            self.logger.error("Redis error getting queue info", extra={
-                "event": "mq_get_info_redis_error",
-                "queue_name": self.queue_name,
-                "error": str(e),
-                "error_type": type(e).__name__
-            })
-            return {
-                "queue_name": self.queue_name,
-                "queue_length": -1,
-                "enqueue_count": self.enqueue_count,
-                "dequeue_count": self.dequeue_count
+                "dequeue_count": self.dequeue_count,
+                "total_enqueued": int(total_enqueued or 0),
+                "total_dequeued": int(total_dequeued or 0),
+                "inflight_length": inflight
             }
         except Exception as e:
-            self.logger.error("Unexpected error getting queue info", extra={
-                "event": "mq_get_info_unexpected_error",
-                "queue_name": self.queue_name,
-                "error": str(e),
-                "error_type": type(e).__name__
-            })
+            self._log_error(e, "mq_get_info", "getting queue info")
             return {
                 "queue_name": self.queue_name,
                 "queue_length": -1,
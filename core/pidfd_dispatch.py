@@ -0,0 +1,114 @@
+"""
+Shell command dispatch for async notification delivery.
+
+On Linux kernels with pidfd support (5.3+), children are spawned directly and
+their exit is observed by registering each pidfd with the running event loop's
+selector. Completions for every outstanding command are then reaped by the
+same epoll wait that drives the rest of the loop, with no watcher thread per
+child. Elsewhere this falls back to asyncio.create_subprocess_shell.
+"""
+
+import asyncio
+import os
+import signal
+import subprocess
+import tempfile
+from typing import Tuple
+
+
+def _probe_pidfd() -> bool:
+    """Check once whether the running kernel supports pidfd_open."""
+    if not hasattr(os, "pidfd_open"):
+        return False
+    try:
+        fd = os.pidfd_open(os.getpid())
+    except OSError:
+        return False
+    os.close(fd)
+    return True
+
+
+PIDFD_AVAILABLE = _probe_pidfd()
+
+
+def _kill_group(pid: int):
+    """Kill a command's whole process group, including anything the shell forked."""
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def _run_shell_pidfd(command: str, timeout: float) -> Tuple[int, str]:
+    """Run a shell command and await its exit through a pidfd reader."""
+    loop = asyncio.get_running_loop()
+    # stderr goes to an unlinked temp file so a chatty child can never block
+    # on a full pipe while we only watch the pidfd
+    with tempfile.TemporaryFile() as stderr_file:
+        proc = subprocess.Popen(
+            command,
+            shell=True,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=stderr_file,
+            start_new_session=True
+        )
+        pidfd = os.pidfd_open(proc.pid)
+        exited = loop.create_future()
+        loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(None))
+        try:
+            await asyncio.wait_for(exited, timeout=timeout)
+        except BaseException:
+            # Timed out, cancelled or failed: the child may still be running
+            _kill_group(proc.pid)
+            raise
+        finally:
+            loop.remove_reader(pidfd)
+            os.close(pidfd)
+            # The child has exited (or been killed), so this does not block
+            returncode = proc.wait()
+
+        stderr_file.seek(0)
+        stderr = stderr_file.read().decode(errors="replace")
+    return returncode, stderr
+
+
+async def _run_shell_asyncio(command: str, timeout: float) -> Tuple[int, str]:
+    """Run a shell command through asyncio's subprocess transport."""
+    proc = await asyncio.create_subprocess_shell(
+        command,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True
+    )
+    try:
+        _, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+    except BaseException:
+        # Timed out, cancelled or failed. Kill the whole group: a process
+        # the shell forked would keep the stderr pipe, and wait(), open
+        _kill_group(proc.pid)
+        await proc.wait()
+        raise
+    return proc.returncode, stderr.decode(errors="replace")
+
+
+async def run_shell(command: str, timeout: float = 30) -> Tuple[int, str]:
+    """
+    Run a shell command on the current event loop.
+
+    Args:
+        command: The shell command to run
+        timeout: Seconds to wait before killing the command
+
+    Returns:
+        Tuple of (return code, captured stderr)
+
+    Raises:
+        asyncio.TimeoutError: If the command does not exit within the timeout
+    """
+    if PIDFD_AVAILABLE:
+        loop = asyncio.get_running_loop()
+        # Proactor-style loops have no add_reader; only selector loops qualify
+        if isinstance(loop, asyncio.SelectorEventLoop):
+            return await _run_shell_pidfd(command, timeout)
+    return await _run_shell_asyncio(command, timeout)
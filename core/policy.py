@@ -1,9 +1,41 @@
 from typing import Dict, Any
 import logging
-import yaml
 import os
 import time
 
+from .config_cache import load_yaml
+
+def _build_router(ping_threshold, browser_policy):
+    """
+    Specialize the routing rules for one loaded policy.
+
+    The thresholds and browser parameters become closure constants, so the
+    returned function only compares its arguments against them.
+
+    Args:
+        ping_threshold: Ping above which cached results are preferred
+        browser_policy: The agents.browser policy, or None if there is none
+
+    Returns:
+        A function (ping_ms, flake_rate) -> (params, prefer_cached, use_headed)
+    """
+    if browser_policy is None:
+        def route(ping_ms, flake_rate):
+            return {}, ping_ms > ping_threshold, False
+        return route
+    
+    timeout = browser_policy.get("default_timeout_s", 15)
+    retries = browser_policy.get("max_retries", 2)
+    headed_threshold = browser_policy.get("headed_on_flake_rate_gt", 0.25)
+    
+    def route(ping_ms, flake_rate):
+        params = {"timeout": timeout, "retries": retries}
+        use_headed = flake_rate > headed_threshold
+        if use_headed:
+            params["headed"] = True
+        return params, ping_ms > ping_threshold, use_headed
+    return route
+
 class PolicyEngine:
     """Policy engine for decision making"""
     
@@ -14,14 +46,14 @@ class PolicyEngine:
         
         # Load policies from configuration file
         self.policies = self._load_policies(config_path)
+        self._compile_policies()
         
     def _load_policies(self, config_path: str) -> Dict[str, Any]:
         """Load policies from YAML configuration file"""
         start_time = time.time()
         try:
             config_full_path = os.path.join(os.path.dirname(__file__), "..", config_path)
-            with open(config_full_path, 'r') as file:
-                policies = yaml.safe_load(file)
+            policies = load_yaml(config_full_path)
             load_time = time.time() - start_time
             self.logger.info("Policy configuration loaded successfully", extra={
                 "event": "policy_config_loaded",
@@ -70,68 +102,72 @@ class PolicyEngine:
             })
             return default_policies
         
+    def _compile_policies(self):
+        """Specialize decide() for the loaded policies"""
+        self._ping_threshold = self.policies["routing"]["prefer_cached_when_ping_ms_gt"]
+        # Agent is always the browser for now
+        browser_policy = self.policies["agents"].get("browser")
+        self._headed_threshold = (browser_policy or {}).get("headed_on_flake_rate_gt", 0.25)
+        self._route = _build_router(self._ping_threshold, browser_policy)
+        
     def decide(self, task_features: Dict[str, Any], env_probes: Dict[str, Any]) -> Dict[str, Any]:
         """Make a routing decision based on task features and environment probes"""
-        start_time = time.time()
         self.decision_count += 1
+        # Only pay for timing and log extras when they will be emitted
+        info = self.logger.isEnabledFor(logging.INFO)
+        if info:
+            start_time = time.time()
         
         # Log input features for debugging
-        self.logger.debug("Making decision for task", extra={
-            "event": "policy_decision_start",
-            "task_features": task_features,
-            "env_probes": env_probes,
-            "decision_count": self.decision_count
-        })
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Making decision for task", extra={
+                "event": "policy_decision_start",
+                "task_features": task_features,
+                "env_probes": env_probes,
+                "decision_count": self.decision_count
+            })
         
         # Simple routing logic based on policies
         # In a real implementation, this would be more sophisticated
         agent = "browser"
         tool = "playwright"
         
-        # Check if we should prefer cached results based on network conditions
+        # Prefer cached results on a slow network; use headed mode when the
+        # browser has been flaky
         ping_ms = env_probes.get("ping_ms", 0)
-        prefer_cached = ping_ms > self.policies["routing"]["prefer_cached_when_ping_ms_gt"]
+        flake_rate = env_probes.get("flake_rate", 0)
+        params, prefer_cached, use_headed = self._route(ping_ms, flake_rate)
         if prefer_cached:
-            self.logger.info("Preferring cached results due to high network latency", extra={
-                "event": "prefer_cached_results",
-                "ping_ms": ping_ms,
-                "threshold": self.policies["routing"]["prefer_cached_when_ping_ms_gt"]
-            })
+            if info:
+                self.logger.info("Preferring cached results due to high network latency", extra={
+                    "event": "prefer_cached_results",
+                    "ping_ms": ping_ms,
+                    "threshold": self._ping_threshold
+                })
             # In a real implementation, we would check for cached results here
             
-        # Set parameters based on agent policies
-        params = {}
-        if agent in self.policies["agents"]:
-            agent_policy = self.policies["agents"][agent]
-            params["timeout"] = agent_policy.get("default_timeout_s", 15)
-            params["retries"] = agent_policy.get("max_retries", 2)
-            
-            # Check if we should use headed mode based on flake rate
-            flake_rate = env_probes.get("flake_rate", 0)
-            headed_threshold = agent_policy.get("headed_on_flake_rate_gt", 0.25)
-            use_headed = flake_rate > headed_threshold
-            if use_headed:
-                params["headed"] = True
-                self.logger.info("Using headed mode due to high flake rate", extra={
-                    "event": "headed_mode_activated",
-                    "flake_rate": flake_rate,
-                    "threshold": headed_threshold
-                })
+        if use_headed and info:
+            self.logger.info("Using headed mode due to high flake rate", extra={
+                "event": "headed_mode_activated",
+                "flake_rate": flake_rate,
+                "threshold": self._headed_threshold
+            })
         
-        decision_time = time.time() - start_time
         decision = {
             "agent": agent,
             "tool": tool,
             "params": params
         }
         
-        self.logger.info("Policy decision completed", extra={
-            "event": "policy_decision_completed",
-            "decision_time_ms": round(decision_time * 1000, 2),
-            "decision": decision,
-            "prefer_cached": prefer_cached,
-            "decision_count": self.decision_count
-        })
+        if info:
+            decision_time = time.time() - start_time
+            self.logger.info("Policy decision completed", extra={
+                "event": "policy_decision_completed",
+                "decision_time_ms": round(decision_time * 1000, 2),
+                "decision": decision,
+                "prefer_cached": prefer_cached,
+                "decision_count": self.decision_count
+            })
         
         return decision
 
@@ -4,106 +4,176 @@ import atexit
 from typing import Optional
 import logging
 import os
-import yaml
+import time
 from contextlib import contextmanager
 
 # Local imports
+from .config_cache import load_yaml
 from .exceptions import RedisError
 
 logger = logging.getLogger(__name__)
 
+# How long get_pool_info reuses its last reading; monitoring scrapes can
+# come in far more often than the numbers change meaningfully
+_POOL_INFO_TTL_SECONDS = 1.0
+
 class RedisConnectionPool:
     """Redis connection pool for thread-safe Redis access with error handling"""
     
-    def __init__(self, host: str = None, port: int = None, max_connections: int = 20):
+    def __init__(self, host: str = None, port: int = None, max_connections: int = None, min_idle: int = 0):
         self.host = host or os.getenv("REDIS_HOST", "localhost")
         self.port = port or int(os.getenv("REDIS_PORT", 6379))
-        self.max_connections = max_connections
+        # Plain GET/SET-style traffic needs only a few sockets per process
+        self.max_connections = max_connections or int(os.getenv("REDIS_POOL_SIZE", 8))
+        self.min_idle = min(min_idle, self.max_connections)
         self._shutdown = False
+        self._probed = False
+        self._probe_lock = threading.Lock()
+        self._info_cache = (0.0, None)
+        # Fields every log record from this pool carries
+        self._log_base = {"host": self.host, "port": self.port}
         
         try:
             # Create Redis connection pool
             self.pool = redis.ConnectionPool(
                 host=self.host,
                 port=self.port,
-                max_connections=max_connections,
+                max_connections=self.max_connections,
                 decode_responses=True,
                 retry_on_timeout=True,
                 health_check_interval=30
             )
+            # Same server, but replies stay bytes, for binary payloads
+            # such as MessagePack queue messages
+            self.binary_pool = redis.ConnectionPool(
+                host=self.host,
+                port=self.port,
+                max_connections=self.max_connections,
+                decode_responses=False,
+                retry_on_timeout=True,
+                health_check_interval=30
+            )
+            # redis.Redis is thread-safe and only checks connections out of
+            # its pool per command, so one client per pool is shared by all
+            self._client = redis.Redis(connection_pool=self.pool)
+            self._binary_client = redis.Redis(connection_pool=self.binary_pool)
             
             # Register cleanup handler
             atexit.register(self.close_all)
             
             logger.info("Initialized Redis connection pool", extra={
+                **self._log_base,
                 "event": "redis_pool_initialized",
-                "host": self.host,
-                "port": self.port,
-                "max_connections": max_connections
+                "max_connections": self.max_connections,
+                "min_idle": self.min_idle
             })
         except Exception as e:
-            logger.error("Failed to initialize Redis connection pool", extra={
-                "event": "redis_pool_init_failed",
-                "host": self.host,
-                "port": self.port,
-                "error": str(e),
-                "error_type": type(e).__name__
-            })
+            logger.error("Failed to initialize Redis connection pool", extra=self._extra("redis_pool_init_failed", e))
             raise RedisError(f"Failed to initialize Redis connection pool: {str(e)}", "REDIS_POOL_INIT_ERROR")
     
-    def get_connection(self) -> redis.Redis:
-        """Get a connection from the pool with error handling"""
+    def _extra(self, event: str, error: Exception = None) -> dict:
+        """Build the extra fields of a log record about this pool"""
+        extra = dict(self._log_base, event=event)
+        if error is not None:
+            extra["error"] = str(error)
+            extra["error_type"] = type(error).__name__
+        return extra
+    
+    def get_connection(self, binary: bool = False, verify: bool = False) -> redis.Redis:
+        """
+        Get a connection from the pool with error handling.
+        
+        Every caller shares the same client per pool. Stale sockets are
+        detected lazily by the pool's health checks, so no round-trip is
+        made here unless verify is set.
+        
+        Args:
+            binary: Return replies as bytes instead of decoded strings
+            verify: PING the server before returning the connection
+        """
         if self._shutdown:
             raise RedisError("Redis connection pool is shut down", "REDIS_POOL_SHUTDOWN")
         
+        conn = self._binary_client if binary else self._client
+        if not verify:
+            return conn
+        
         try:
-            conn = redis.Redis(connection_pool=self.pool)
-            # Test the connection
             conn.ping()
             return conn
         except redis.ConnectionError as e:
-            logger.error("Redis connection error", extra={
-                "event": "redis_connection_error",
-                "host": self.host,
-                "port": self.port,
-                "error": str(e),
-                "error_type": type(e).__name__
-            })
+            logger.error("Redis connection error", extra=self._extra("redis_connection_error", e))
             raise RedisError(f"Redis connection failed: {str(e)}", "REDIS_CONNECTION_ERROR")
         except redis.TimeoutError as e:
-            logger.error("Redis timeout error", extra={
-                "event": "redis_timeout_error",
-                "host": self.host,
-                "port": self.port,
-                "error": str(e),
-                "error_type": type(e).__name__
-            })
+            logger.error("Redis timeout error", extra=self._extra("redis_timeout_error", e))
             raise RedisError(f"Redis operation timed out: {str(e)}", "REDIS_TIMEOUT_ERROR")
         except Exception as e:
-            logger.error("Unexpected Redis error", extra={
-                "event": "redis_unexpected_error",
-                "host": self.host,
-                "port": self.port,
-                "error": str(e),
-                "error_type": type(e).__name__
-            })
+            logger.error("Unexpected Redis error", extra=self._extra("redis_unexpected_error", e))
             raise RedisError(f"Unexpected Redis error: {str(e)}", "REDIS_UNEXPECTED_ERROR")
     
+    def on_startup_probe(self):
+        """
+        Check once per process that Redis is reachable.
+        
+        After the first successful probe this returns immediately, so
+        clients can call it from their constructors without paying a
+        round-trip each; a failed probe is retried on the next call. A
+        successful probe also opens min_idle connections in each pool.
+        
+        Raises:
+            RedisError: If Redis cannot be reached
+        """
+        if self._probed:
+            return
+        with self._probe_lock:
+            if self._probed:
+                return
+            with self.connection() as conn:
+                conn.ping()
+            self._warm(self.pool)
+            self._warm(self.binary_pool)
+            self._probed = True
+            logger.info("Redis startup probe succeeded", extra=self._extra("redis_startup_probe_ok"))
+    
+    def _warm(self, pool: redis.ConnectionPool):
+        """Open connections in pool until at least min_idle are available"""
+        # redis-py has no min-idle setting, so check out min_idle connections
+        # (reusing idle ones first, connecting the rest) and hand them back;
+        # they then sit in the pool's available list
+        connections = []
+        try:
+            while len(connections) < self.min_idle:
+                connections.append(pool.get_connection())
+        except Exception as e:
+            logger.warning("Failed to open idle Redis connections", extra=self._extra("redis_pool_warm_failed", e))
+        finally:
+            for connection in connections:
+                pool.release(connection)
+    
+    def register_script(self, script: str, binary: bool = False):
+        """
+        Register a Lua script without talking to the server.
+        
+        The returned script runs with EVALSHA and falls back to EVAL once
+        per server; pass client= to run it on a specific connection.
+        
+        Args:
+            script: Lua source
+            binary: Bind the script to the binary (non-decoding) pool
+        """
+        return (self._binary_client if binary else self._client).register_script(script)
+    
     @contextmanager
-    def connection(self):
-        """Context manager for Redis connections"""
+    def connection(self, binary: bool = False):
+        """Context manager for Redis connections; see get_connection for binary"""
         conn = None
         try:
-            conn = self.get_connection()
+            conn = self.get_connection(binary)
             yield conn
         except Exception as e:
-            logger.error("Redis operation failed", extra={
-                "event": "redis_operation_failed",
-                "host": self.host,
-                "port": self.port,
-                "error": str(e),
-                "error_type": type(e).__name__
-            })
+            # The one error log on the per-operation path
+            if logger.isEnabledFor(logging.ERROR):
+                logger.error("Redis operation failed", extra=self._extra("redis_operation_failed", e))
             raise
         finally:
             # Redis connections from a pool are automatically returned to the pool
@@ -114,13 +184,7 @@ class RedisConnectionPool:
                     # They are automatically managed by the connection pool
                     pass
                 except Exception as e:
-                    logger.warning("Error during Redis connection cleanup", extra={
-                        "event": "redis_connection_cleanup_error",
-                        "host": self.host,
-                        "port": self.port,
-                        "error": str(e),
-                        "error_type": type(e).__name__
-                    })
+                    logger.warning("Error during Redis connection cleanup", extra=self._extra("redis_connection_cleanup_error", e))
     
     def close_all(self):
         """Close all connections in the pool"""
@@ -132,41 +196,35 @@ class RedisConnectionPool:
             if self.pool:
                 # Disconnect all connections in the pool
                 self.pool.disconnect()
-                logger.info("Closed all Redis connections in pool", extra={
-                    "event": "redis_pool_closed",
-                    "host": self.host,
-                    "port": self.port
-                })
+                self.binary_pool.disconnect()
+                logger.info("Closed all Redis connections in pool", extra=self._extra("redis_pool_closed"))
         except Exception as e:
-            logger.error("Error closing Redis connection pool", extra={
-                "event": "redis_pool_close_error",
-                "host": self.host,
-                "port": self.port,
-                "error": str(e),
-                "error_type": type(e).__name__
-            })
+            logger.error("Error closing Redis connection pool", extra=self._extra("redis_pool_close_error", e))
             raise RedisError(f"Error closing Redis connection pool: {str(e)}", "REDIS_POOL_CLOSE_ERROR")
     
     def get_pool_info(self) -> dict:
-        """Get information about the connection pool"""
+        """Get information about the connection pool, at most _POOL_INFO_TTL_SECONDS old"""
+        now = time.monotonic()
+        cached_at, info = self._info_cache
+        if info is not None and now - cached_at < _POOL_INFO_TTL_SECONDS:
+            return dict(info)
+        
         try:
-            return {
-                "host": self.host,
-                "port": self.port,
+            available = len(self.pool._available_connections)
+            in_use = len(self.pool._in_use_connections)
+            info = {
+                **self._log_base,
                 "max_connections": self.max_connections,
-                "created_connections": len(self.pool._available_connections) + len(self.pool._in_use_connections),
-                "available_connections": len(self.pool._available_connections),
-                "in_use_connections": len(self.pool._in_use_connections)
+                "created_connections": available + in_use,
+                "available_connections": available,
+                "in_use_connections": in_use
             }
+            self._info_cache = (now, info)
+            return dict(info)
         except Exception as e:
-            logger.error("Failed to get Redis pool info", extra={
-                "event": "redis_pool_info_failed",
-                "error": str(e),
-                "error_type": type(e).__name__
-            })
+            logger.error("Failed to get Redis pool info", extra=self._extra("redis_pool_info_failed", e))
             return {
-                "host": self.host,
-                "port": self.port,
+                **self._log_base,
                 "max_connections": self.max_connections,
                 "created_connections": -1,
                 "available_connections": -1,
@@ -177,8 +235,7 @@ def load_redis_config():
     """Load Redis configuration from config file"""
     config_path = os.path.join(os.path.dirname(__file__), "..", "configs", "policy.yaml")
     try:
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = load_yaml(config_path)
         return config.get('redis', {})
     except Exception as e:
         logger.warning("Failed to load Redis config, using defaults", extra={
@@ -189,18 +246,43 @@ def load_redis_config():
         })
         return {}
 
-# Initialize the Redis pool with configuration
-try:
-    redis_config = load_redis_config()
-    redis_pool = RedisConnectionPool(
-        host=redis_config.get('host'),
-        port=redis_config.get('port'),
-        max_connections=redis_config.get('max_connections', 20)
-    )
-except Exception as e:
-    logger.error("Failed to initialize global Redis pool", extra={
-        "event": "global_redis_pool_init_failed",
-        "error": str(e),
-        "error_type": type(e).__name__
-    })
-    redis_pool = None
\ No newline at end of file
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_redis_pool() -> Optional[RedisConnectionPool]:
+    """
+    Return the process-wide Redis pool, creating it from the config file
+    on first use.
+    
+    Returns:
+        The pool, or None if it could not be created (retried next call)
+    """
+    global _pool
+    if _pool is not None:
+        return _pool
+    with _pool_lock:
+        if _pool is None:
+            try:
+                redis_config = load_redis_config()
+                _pool = RedisConnectionPool(
+                    host=redis_config.get('host'),
+                    port=redis_config.get('port'),
+                    # REDIS_POOL_SIZE overrides the config file
+                    max_connections=int(os.getenv("REDIS_POOL_SIZE", 0)) or redis_config.get('max_connections'),
+                    min_idle=redis_config.get('min_idle', 0)
+                )
+            except Exception as e:
+                logger.error("Failed to initialize global Redis pool", extra={
+                    "event": "global_redis_pool_init_failed",
+                    "error": str(e),
+                    "error_type": type(e).__name__
+                })
+    return _pool
+
+def __getattr__(name):
+    # Keeps `core.redis_pool.redis_pool` working for outside callers.
+    # Importing the name still builds the pool at import time, so in-tree
+    # code calls get_redis_pool() where the pool is used instead
+    if name == "redis_pool":
+        return get_redis_pool()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
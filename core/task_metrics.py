@@ -0,0 +1,51 @@
+"""
+In-process task-run counters for Prometheus.
+
+The API serves them at /metrics. They count runs recorded in this
+process: the worker records every task it processes, and
+MetricsCollector.collect_task_metrics records the runs it stores. main.py
+runs the API and the worker in one process, so a scrape sees the worker's
+runs. The module has no dependencies beyond prometheus_client, which is
+optional; without it recording is a no-op.
+"""
+
+try:
+    from prometheus_client import Counter, Histogram
+except ImportError:  # pragma: no cover - optional dependency
+    Counter = Histogram = None
+
+
+if Counter is not None:
+    TASK_RUNS = Counter(
+        "argus_task_runs_total", "Task runs collected", ["agent", "tool", "success"]
+    )
+    TASK_LATENCY_MS = Histogram(
+        "argus_task_latency_ms", "Task run latency in milliseconds", ["agent", "tool"],
+        buckets=(10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, float("inf"))
+    )
+    TASK_RUNS_DROPPED = Counter(
+        "argus_task_runs_dropped_total", "Task runs dropped because the metrics queue was full"
+    )
+else:
+    TASK_RUNS = TASK_LATENCY_MS = TASK_RUNS_DROPPED = None
+
+
+def record_task_run(agent: str, tool: str, success: bool, latency_ms: float):
+    """
+    Count one task run and observe its latency.
+
+    Args:
+        agent: Agent that ran the task
+        tool: Tool the agent used
+        success: Whether the run succeeded
+        latency_ms: Wall-clock duration of the run in milliseconds
+    """
+    if TASK_RUNS is not None:
+        TASK_RUNS.labels(agent, tool, "true" if success else "false").inc()
+        TASK_LATENCY_MS.labels(agent, tool).observe(latency_ms)
+
+
+def record_dropped_run():
+    """Count a run dropped because the metrics queue was full"""
+    if TASK_RUNS_DROPPED is not None:
+        TASK_RUNS_DROPPED.inc()
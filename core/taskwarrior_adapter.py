@@ -1,10 +1,79 @@
 from typing import Dict, Any, List
+import calendar
+import functools
 import logging
-from taskw import TaskWarrior
-from taskw.exceptions import TaskwarriorError
 import os
+import subprocess
 import time
 from .exceptions import FileIOError
+from .fastjson import loads as _loads
+
+logger = logging.getLogger(__name__)
+
+# (our key, Taskwarrior key) for fields copied over as they are
+_FIELD_MAP = (
+    ("id", "id"),
+    ("tw_uuid", "uuid"),
+    ("description", "description"),
+    ("project", "project"),
+    ("priority", "priority"),
+    ("urgency", "urgency"),
+)
+
+# (our key, Taskwarrior key) for date fields, converted to timestamps
+_DATE_FIELDS = (
+    ("created_ts", "entry"),
+    ("due_ts", "due"),
+    ("updated_ts", "modified"),
+)
+
+_TASKW_NAMES = ("TaskWarrior", "TaskWarriorShellout", "TaskwarriorError")
+
+def _import_taskw():
+    """Bind the taskw names used below; taskw is slow to import, so this
+    waits until the first adapter is created"""
+    names = globals()
+    if all(name in names for name in _TASKW_NAMES):
+        return
+    from taskw import TaskWarrior, TaskWarriorShellout
+    from taskw.exceptions import TaskwarriorError
+    # setdefault leaves names patched in by tests alone
+    names.setdefault("TaskWarrior", TaskWarrior)
+    names.setdefault("TaskWarriorShellout", TaskWarriorShellout)
+    names.setdefault("TaskwarriorError", TaskwarriorError)
+
+def __getattr__(name):
+    if name in _TASKW_NAMES:
+        _import_taskw()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@functools.lru_cache(maxsize=1)
+def _find_taskrc() -> str:
+    """Return the first taskrc in the standard locations, or None; looked up once per process"""
+    taskrc_locations = [
+        os.path.expanduser("~/.taskrc"),
+        "/etc/taskrc"
+    ]
+    
+    for location in taskrc_locations:
+        try:
+            if os.path.exists(location):
+                return location
+        except Exception as e:
+            logger.warning("Error checking taskrc location", extra={
+                "event": "taskwarrior_taskrc_check_error",
+                "location": location,
+                "error": str(e)
+            })
+    return None
+
+@functools.lru_cache(maxsize=4)
+def _make_tw(taskrc_path: str = None) -> "TaskWarrior":
+    """Create the TaskWarrior client for a taskrc, shared by every adapter using it"""
+    if taskrc_path:
+        return TaskWarrior(config_filename=taskrc_path)
+    return TaskWarrior()
 
 class TaskwarriorAdapter:
     """Adapter for interacting with Taskwarrior"""
@@ -12,12 +81,16 @@ class TaskwarriorAdapter:
     def __init__(self, taskrc_path: str = None):
         self.logger = logging.getLogger(__name__)
         self.operation_count = 0
+        # ((path, mtime_ns, size), tasks) from the last pending.data read
+        self._pending_cache = (None, None)
         self.logger.info("Initializing Taskwarrior Adapter")
+        _import_taskw()
         
-        # Initialize TaskWarrior client
+        # Initialize TaskWarrior client; clients are shared per taskrc, and
+        # failures aren't cached, so a bad path is retried next time
         if taskrc_path:
             try:
-                self.tw = TaskWarrior(config_filename=taskrc_path)
+                self.tw = _make_tw(taskrc_path)
             except Exception as e:
                 self.logger.error("Error initializing TaskWarrior with specified taskrc path", extra={
                     "event": "taskwarrior_init_error",
@@ -27,28 +100,11 @@ class TaskwarriorAdapter:
                 raise FileIOError(f"Failed to initialize TaskWarrior with taskrc path: {taskrc_path}") from e
         else:
             # Look for taskrc in standard locations
-            taskrc_locations = [
-                os.path.expanduser("~/.taskrc"),
-                "/etc/taskrc"
-            ]
-            
-            found_taskrc = None
-            for location in taskrc_locations:
-                try:
-                    if os.path.exists(location):
-                        found_taskrc = location
-                        break
-                except Exception as e:
-                    self.logger.warning("Error checking taskrc location", extra={
-                        "event": "taskwarrior_taskrc_check_error",
-                        "location": location,
-                        "error": str(e)
-                    })
-                    continue
+            found_taskrc = _find_taskrc()
             
             if found_taskrc:
                 try:
-                    self.tw = TaskWarrior(config_filename=found_taskrc)
+                    self.tw = _make_tw(found_taskrc)
                 except Exception as e:
                     self.logger.error("Error initializing TaskWarrior with found taskrc", extra={
                         "event": "taskwarrior_init_error",
@@ -59,7 +115,7 @@ class TaskwarriorAdapter:
             else:
                 # Use default configuration
                 try:
-                    self.tw = TaskWarrior()
+                    self.tw = _make_tw()
                 except Exception as e:
                     self.logger.error("Error initializing TaskWarrior with default configuration", extra={
                         "event": "taskwarrior_init_error",
@@ -79,32 +135,17 @@ class TaskwarriorAdapter:
         })
         
         try:
+            # Only read the pending set; completed tasks are never needed here.
+            # filter_tasks isn't implemented by taskw's direct (file-reading)
+            # backend, and pending.data is usually read directly, so the
+            # description filter is applied here
+            pending_tasks = self._load_pending()
             if filter:
-                tasks = self.tw.filter_tasks({"status": "pending", "description.contains": filter})
-            else:
-                tasks = self.tw.load_tasks()
-            
-            # Extract pending tasks
-            pending_tasks = tasks.get("pending", [])
+                pending_tasks = [task for task in pending_tasks if filter in task.get("description", "")]
             task_count = len(pending_tasks)
             
             # Convert to our internal format
-            converted_tasks = []
-            for task in pending_tasks:
-                converted_task = {
-                    "id": task.get("id"),
-                    "tw_uuid": task.get("uuid"),
-                    "description": task.get("description"),
-                    "project": task.get("project"),
-                    "tags": task.get("tags", []),
-                    "priority": task.get("priority"),
-                    "urgency": task.get("urgency"),
-                    "status": task.get("status", "pending"),
-                    "created_ts": self._parse_date(task.get("entry")),
-                    "due_ts": self._parse_date(task.get("due")),
-                    "updated_ts": self._parse_date(task.get("modified"))
-                }
-                converted_tasks.append(converted_task)
+            converted_tasks = [self._convert_task(task) for task in pending_tasks]
             
             operation_time = time.time() - start_time
             self.logger.info("Tasks fetched successfully from Taskwarrior", extra={
@@ -176,19 +217,7 @@ class TaskwarriorAdapter:
             task = self.tw.task_add(**task_data)
             
             # Convert to our internal format
-            converted_task = {
-                "id": task.get("id"),
-                "tw_uuid": task.get("uuid"),
-                "description": task.get("description"),
-                "project": task.get("project"),
-                "tags": task.get("tags", []),
-                "priority": task.get("priority"),
-                "urgency": task.get("urgency"),
-                "status": task.get("status", "pending"),
-                "created_ts": self._parse_date(task.get("entry")),
-                "due_ts": self._parse_date(task.get("due")),
-                "updated_ts": self._parse_date(task.get("modified"))
-            }
+            converted_task = self._convert_task(task)
             
             operation_time = time.time() - start_time
             self.logger.info("Task created successfully in Taskwarrior", extra={
@@ -246,40 +275,27 @@ class TaskwarriorAdapter:
         })
         
         try:
-            # Prepare update data
-            update_data = {}
+            # Read the task once and carry it through every step, rather
+            # than re-fetching it (a full task-list read, or a `task`
+            # process) around each write
+            _, task = self.tw.get_task(uuid=uuid)
+            if not task:
+                raise KeyError(f"Task not found: {uuid}")
             
             if status:
-                update_data["status"] = status
-                
-            # Update task
-            self.tw.task_update(uuid, **update_data)
+                task["status"] = status
+                _, task = self.tw.task_update(task)
             
-            # Add annotations if provided
+            # Add annotations if provided; task_annotate returns the
+            # annotated task
             annotation_count = 0
             if annotations:
-                task = self.tw.get_task(uuid)[1]
                 for annotation in annotations:
-                    self.tw.task_annotate(task, annotation)
+                    task = self.tw.task_annotate(task, annotation)
                     annotation_count += 1
             
-            # Fetch updated task
-            _, task = self.tw.get_task(uuid)
-            
             # Convert to our internal format
-            converted_task = {
-                "id": task.get("id"),
-                "tw_uuid": task.get("uuid"),
-                "description": task.get("description"),
-                "project": task.get("project"),
-                "tags": task.get("tags", []),
-                "priority": task.get("priority"),
-                "urgency": task.get("urgency"),
-                "status": task.get("status", "pending"),
-                "created_ts": self._parse_date(task.get("entry")),
-                "due_ts": self._parse_date(task.get("due")),
-                "updated_ts": self._parse_date(task.get("modified"))
-            }
+            converted_task = self._convert_task(task)
             
             operation_time = time.time() - start_time
             self.logger.info("Task updated successfully in Taskwarrior", extra={
@@ -322,15 +338,100 @@ class TaskwarriorAdapter:
             })
             return {}
     
+    def _read_pending_file(self) -> List[Dict[str, Any]]:
+        """
+        Read pending and waiting tasks straight from pending.data.
+        
+        The parsed file is reused until it changes. IDs are line numbers,
+        as Taskwarrior assigns them.
+        
+        Returns:
+            The tasks, or None if the data file is missing or not in the
+            line-based format (e.g. Taskwarrior 3's database)
+        """
+        from taskw.utils import decode_task
+        
+        try:
+            location = os.path.expanduser(self.tw.config["data"]["location"])
+            path = os.path.join(location, "pending.data")
+            st = os.stat(path)
+        except Exception:
+            return None
+        
+        stamp = (path, st.st_mtime_ns, st.st_size)
+        cached_stamp, cached_tasks = self._pending_cache
+        if cached_stamp == stamp:
+            return cached_tasks
+        
+        tasks = []
+        with open(path, "r") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.startswith("["):
+                    if line.strip():
+                        return None
+                    continue
+                task = decode_task(line)
+                if task.get("status") in ("pending", "waiting"):
+                    task["id"] = line_no
+                    tasks.append(task)
+        self._pending_cache = (stamp, tasks)
+        return tasks
+    
+    def _load_pending(self) -> List[Dict[str, Any]]:
+        """Load pending (and waiting) tasks"""
+        tasks = self._read_pending_file()
+        if tasks is not None:
+            return tasks
+        
+        if not isinstance(self.tw, TaskWarriorShellout):
+            return self.tw.load_tasks(command="pending").get("pending", [])
+        
+        # taskw's shell-out backend runs one export per status and parses
+        # it with the stdlib json module; one export parsed with fastjson
+        # returns the same tasks
+        command = [
+            "task", f"rc:{os.path.expanduser(self.tw.config_filename)}",
+            "rc.json.array=TRUE", "rc.verbose=nothing",
+            "(", "status:pending", "or", "status:waiting", ")", "export"
+        ]
+        result = subprocess.run(command, capture_output=True, check=True)
+        return _loads(result.stdout)
+    
+    def _convert_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a Taskwarrior task into our internal format"""
+        converted_task = {key: task.get(tw_key) for key, tw_key in _FIELD_MAP}
+        converted_task["tags"] = task.get("tags") or []
+        converted_task["status"] = task.get("status", "pending")
+        for key, tw_key in _DATE_FIELDS:
+            converted_task[key] = self._parse_date(task.get(tw_key))
+        return converted_task
+    
     def _parse_date(self, date_str: str) -> int:
-        """Parse a date string into a timestamp"""
+        """Parse a Taskwarrior UTC date string (YYYYMMDDTHHMMSSZ) into a timestamp"""
         if not date_str:
             return None
             
         try:
-            from datetime import datetime
-            dt = datetime.strptime(date_str, "%Y%m%dT%H%M%SZ")
-            return int(dt.timestamp())
+            # Fixed-width format, so slice it instead of going through strptime,
+            # and convert all 14 digits with one int() call
+            if len(date_str) != 16 or date_str[8] != "T" or date_str[15] != "Z":
+                raise ValueError(f"expected YYYYMMDDTHHMMSSZ, got {date_str!r}")
+            digits = date_str[:8] + date_str[9:15]
+            # int() would also accept signs, spaces and underscores
+            if not (digits.isascii() and digits.isdigit()):
+                raise ValueError(f"expected YYYYMMDDTHHMMSSZ, got {date_str!r}")
+            date, time_of_day = divmod(int(digits), 1000000)
+            year, month_day = divmod(date, 10000)
+            month, day = divmod(month_day, 100)
+            hour, minute_second = divmod(time_of_day, 10000)
+            minute, second = divmod(minute_second, 100)
+            # timegm silently rolls invalid dates over (Feb 31 -> Mar 2), so
+            # check the day against the actual month length, like strptime
+            if not (1 <= month <= 12 and hour < 24 and minute < 60 and second < 62):
+                raise ValueError(f"date out of range: {date_str!r}")
+            if not 1 <= day <= calendar.monthrange(year, month)[1]:
+                raise ValueError(f"date out of range: {date_str!r}")
+            return calendar.timegm((year, month, day, hour, minute, second, 0, 0, 0))
         except Exception as e:
             self.logger.warning("Error parsing date", extra={
                 "event": "taskwarrior_date_parse_warning",
@@ -1,94 +1,179 @@
 
-import time
+import asyncio
 import logging
-import json
+import threading
+import time
 import redis
-import sqlite3
-from . import redis_pool
+import redis.asyncio as aioredis
+from concurrent.futures import ThreadPoolExecutor
+from .mq import _unpack
+from .redis_pool import get_redis_pool
 from .database import db_pool
 from .exceptions import RedisError, DatabaseError
+from .task_metrics import record_task_run
 from agents.browser_agent.main import BrowserAgent
 
+# Status updates are written in batches: every _FLUSH_INTERVAL seconds, or
+# as soon as _FLUSH_BATCH_SIZE are waiting
+_FLUSH_INTERVAL = 0.1
+_FLUSH_BATCH_SIZE = 100
+
 class Worker:
     """A worker that processes tasks from the message queue."""
 
-    def __init__(self):
+    def __init__(self, concurrency: int = 4):
         self.logger = logging.getLogger(__name__)
         self.logger.info("Initializing Worker")
         self.task_queue = "task_queue"
+        self.concurrency = concurrency
         self.shutdown_event = False
+        # (status, task_id) pairs not yet written to the database
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._flush_wanted = None
+
+        # Playwright's sync API must stay on the thread that started it, and
+        # a sqlite connection on the thread that opened it, so each gets one
+        # dedicated thread instead of asyncio's default pool
+        self._browser_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="worker-browser")
+        self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="worker-db")
 
         try:
-            self.redis_client = redis_pool.get_connection()
-            self.db_conn = db_pool.get_connection()
+            # Fail fast if Redis is unreachable; the queue itself is read
+            # through an asyncio client created in run()
+            get_redis_pool().on_startup_probe()
+            self.db_conn = self._db_executor.submit(db_pool.get_connection).result()
         except (RedisError, DatabaseError) as e:
             self.logger.error(f"Failed to initialize Worker: {e}")
             raise
 
         self.browser_agent = BrowserAgent()
 
-    def run(self):
-        """Continuously process tasks from the queue."""
+    async def run(self):
+        """Process tasks from the queue with `concurrency` coroutines."""
         self.logger.info("Worker started and listening for tasks.")
+        # Binary client: payloads are decoded straight from bytes, and may be
+        # MessagePack from MessageQueue producers as well as JSON
+        client = aioredis.Redis(
+            host=get_redis_pool().host,
+            port=get_redis_pool().port,
+            max_connections=self.concurrency,
+        )
+        self._flush_wanted = asyncio.Event()
+        flusher = asyncio.create_task(self._flush_loop())
+        try:
+            await asyncio.gather(*(self._worker_loop(client) for _ in range(self.concurrency)))
+        finally:
+            flusher.cancel()
+            await asyncio.gather(flusher, return_exceptions=True)
+            # Write whatever the last tasks left behind
+            await asyncio.get_running_loop().run_in_executor(self._db_executor, self._flush)
+            await client.aclose()
+
+    async def _worker_loop(self, client):
+        """Pop and process tasks until the worker is shut down."""
         while not self.shutdown_event:
+            task_data = None
             try:
-                # Blocking pop from the queue
                 self.logger.debug("Waiting for task on queue: %s", self.task_queue)
-                _, task_data = self.redis_client.brpop(self.task_queue)
+                # Time out now and then so shutdown is noticed
+                popped = await client.brpop(self.task_queue, timeout=5)
+                if popped is None:
+                    continue
+                _, task_data = popped
                 self.logger.debug("Received task data from queue.")
-                task = json.loads(task_data)
-                self.process_task(task)
+                task = _unpack(task_data)
+                await self.process_task(task)
             except redis.ConnectionError as e:
                 self.logger.error(f"Redis connection error: {e}. Retrying in 5 seconds.")
-                time.sleep(5)  # Wait before retrying
-            except json.JSONDecodeError as e:
-                self.logger.error(f"Error decoding task data: {e}. Task data: {task_data}")
+                await asyncio.sleep(5)  # Wait before retrying
+            except ValueError as e:
+                # JSON and MessagePack decode errors are both ValueErrors
+                self.logger.error(f"Error decoding task data: {e}. Task data: {task_data!r}")
             except Exception as e:
                 self.logger.error(f"An unexpected error occurred in worker run loop: {e}")
 
-    def process_task(self, task: dict):
+    async def process_task(self, task: dict):
         """Process a single task."""
         task_id = task.get("id")
         self.logger.info(f"Starting processing for task {task_id}.")
         self.logger.debug(f"Task details: {task}")
+        loop = asyncio.get_running_loop()
+        browser_task = bool(task.get("browser_task"))
+        agent = task.get("agent") or ("browser" if browser_task else "generic")
+        tool = task.get("tool") or ("playwright" if browser_task else "none")
+        start = time.monotonic()
 
         try:
-            if task.get("browser_task"):
+            if browser_task:
                 self.logger.info(f"Task {task_id} is a browser task. Executing with BrowserAgent.")
-                result = self.browser_agent.execute_task(task)
+                result = await loop.run_in_executor(
+                    self._browser_executor, self.browser_agent.execute_task, task
+                )
                 status = result.get("status")
                 self.logger.info(f"BrowserAgent finished task {task_id} with status: {status}")
             else:
                 self.logger.info(f"Task {task_id} is a generic task. Simulating work.")
                 # Simulate work for non-browser tasks
-                time.sleep(2)
+                await asyncio.sleep(2)
                 status = "completed"
                 self.logger.info(f"Generic task {task_id} completed.")
 
-            # Update task status in the database
-            self.logger.debug(f"Updating task {task_id} status to '{status}' in the database.")
-            cursor = self.db_conn.cursor()
-            cursor.execute("UPDATE tasks SET status = ? WHERE id = ?", (status, task_id))
-            self.db_conn.commit()
-            self.logger.info(f"Successfully updated task {task_id} to status '{status}'.")
+            self.logger.debug(f"Queueing status '{status}' for task {task_id}.")
+            self._set_status(task_id, status)
+            record_task_run(agent, tool, status == "completed", (time.monotonic() - start) * 1000)
         except Exception as e:
             self.logger.error(f"An error occurred while processing task {task_id}: {e}")
-            # Optionally, update the task status to 'failed' in the database
+            self._set_status(task_id, "failed")
+            record_task_run(agent, tool, False, (time.monotonic() - start) * 1000)
+
+    def _set_status(self, task_id, status: str):
+        """Queue a task's status for the next batched write."""
+        with self._pending_lock:
+            self._pending.append((status, task_id))
+            full = len(self._pending) >= _FLUSH_BATCH_SIZE
+        if full and self._flush_wanted is not None:
+            self._flush_wanted.set()
+
+    async def _flush_loop(self):
+        """Write queued statuses every _FLUSH_INTERVAL, or sooner when a batch fills."""
+        loop = asyncio.get_running_loop()
+        while True:
             try:
-                cursor = self.db_conn.cursor()
-                cursor.execute("UPDATE tasks SET status = ? WHERE id = ?", ("failed", task_id))
-                self.db_conn.commit()
-                self.logger.info(f"Updated task {task_id} status to 'failed'.")
-            except Exception as db_e:
-                self.logger.error(f"Could not update task {task_id} status to 'failed': {db_e}")
+                await asyncio.wait_for(self._flush_wanted.wait(), _FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_wanted.clear()
+            await loop.run_in_executor(self._db_executor, self._flush)
+
+    def _flush(self):
+        """Write all queued statuses in one transaction; runs on the database thread."""
+        with self._pending_lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return
+        try:
+            with self.db_conn:
+                self.db_conn.executemany("UPDATE tasks SET status = ? WHERE id = ?", batch)
+            self.logger.info(f"Updated status of {len(batch)} tasks.")
+        except Exception as e:
+            self.logger.error(f"Could not update status of {len(batch)} tasks: {e}")
+
+    def stop(self):
+        """Make run() return once the tasks in progress are finished."""
+        self.shutdown_event = True
 
     def shutdown(self):
         """Gracefully shut down the worker."""
         self.logger.info("Shutting down worker")
         self.shutdown_event = True
-        redis_pool.close_all()
+        self._browser_executor.shutdown(wait=False)
+        # Drain statuses queued since the last flush before closing
+        self._db_executor.submit(self._flush).result()
+        self._db_executor.shutdown(wait=True)
+        get_redis_pool().close_all()
         db_pool.close_all()
 
 if __name__ == "__main__":
     worker = Worker()
-    worker.run()
+    asyncio.run(worker.run())
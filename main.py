@@ -6,13 +6,11 @@ import signal
 import sys
 from typing import List
 import uvicorn
-import threading
-import time
 
 # Local imports
 from core.coordinator import Coordinator
 from core.mq import MessageQueue
-from core.redis_pool import redis_pool
+from core.redis_pool import get_redis_pool
 from core.database import db_pool
 from apps.proxy_api.main import app as fastapi_app
 from core.worker import Worker
@@ -29,123 +27,118 @@ class ApplicationManager:
     
     def __init__(self):
         self.services = {}
-        self.shutdown_event = threading.Event()
+        # All services run as coroutines on one event loop and stop when
+        # this is set
+        self.shutdown_event = asyncio.Event()
+        self._loop = None
         
     def setup_signal_handlers(self):
         """Set up signal handlers for graceful shutdown"""
         def signal_handler(signum, frame):
             logger.info(f"Received signal {signum}, initiating shutdown...")
-            self.shutdown()
+            self._loop.call_soon_threadsafe(self.shutdown_event.set)
             
         signal.signal(signal.SIGINT, signal_handler)
         signal.signal(signal.SIGTERM, signal_handler)
         
-    def start_api_server(self, host: str = "0.0.0.0", port: int = 9000):
-        """Start the FastAPI server in a separate thread"""
-        def run_server():
-            try:
-                logger.info(f"Starting API server on {host}:{port}")
-                uvicorn.run(fastapi_app, host=host, port=port, log_level="info")
-            except Exception as e:
-                logger.error(f"API server error: {e}")
-                
-        api_thread = threading.Thread(target=run_server, daemon=True)
-        api_thread.start()
-        self.services["api_server"] = api_thread
-        logger.info("API server thread started")
-        
-    def start_message_queue_processor(self):
-        """Start the message queue processor with efficient event-driven mechanism"""
-        def process_messages():
-            try:
-                mq = MessageQueue()
-                logger.info("Message queue processor started")
-                
-                # Use a blocking mechanism instead of polling
-                while not self.shutdown_event.is_set():
-                    # Block with timeout to allow graceful shutdown
-                    message = mq.dequeue(timeout=5.0)  # 5 second timeout for better efficiency
-                    if message:
-                        logger.info(f"Processing message: {message}")
-                        # In a real implementation, this would route to appropriate agents
-                    # No need for sleep - the dequeue call blocks until timeout or message
-                        
-            except Exception as e:
-                logger.error(f"Message queue processor error: {e}")
-                
-        mq_thread = threading.Thread(target=process_messages, daemon=True)
-        mq_thread.start()
-        self.services["mq_processor"] = mq_thread
-        logger.info("Message queue processor thread started")
+    async def start_api_server(self, host: str = "0.0.0.0", port: int = 9000):
+        """Serve the FastAPI app on the running event loop"""
+        config = uvicorn.Config(fastapi_app, host=host, port=port, log_level="info", loop="asyncio")
+        server = uvicorn.Server(config)
+
+        async def stop_on_shutdown():
+            await self.shutdown_event.wait()
+            server.should_exit = True
+
+        stopper = asyncio.create_task(stop_on_shutdown())
+        try:
+            logger.info(f"Starting API server on {host}:{port}")
+            await server.serve()
+        except Exception as e:
+            logger.error(f"API server error: {e}")
+        finally:
+            stopper.cancel()
+            # Uvicorn handles SIGINT/SIGTERM itself while it serves, so the
+            # server stopping is what shuts the other services down
+            self.shutdown_event.set()
         
-    def start_coordinator(self):
-        """Start the coordinator service with efficient event-driven mechanism"""
-        def run_coordinator():
-            try:
-                coordinator = Coordinator()
-                logger.info("Coordinator service started")
-                
-                # Use a work event to signal when there's work to do
-                work_event = threading.Event()
-                
-                # In a real implementation, this would coordinate tasks
-                while not self.shutdown_event.is_set():
-                    # Wait for work or shutdown signal with timeout
-                    work_event.wait(timeout=5.0)  # Check every 5 seconds for work
-                    work_event.clear()
+    async def start_message_queue_processor(self):
+        """Process messages until shutdown"""
+        try:
+            mq = MessageQueue()
+            # This is the queue's only consumer, so anything still in
+            # flight was left by a previous run that died mid-message
+            await asyncio.to_thread(mq.requeue_inflight)
+            logger.info("Message queue processor started")
+            
+            while not self.shutdown_event.is_set():
+                # The dequeue blocks in Redis until a message arrives or the
+                # timeout allows a shutdown check; it runs off the loop so
+                # the other services keep going meanwhile
+                message, receipt = await asyncio.to_thread(mq.dequeue_reliable, timeout=5.0)
+                if message:
+                    logger.info(f"Processing message: {message}")
+                    # In a real implementation, this would route to appropriate agents
+                    await asyncio.to_thread(mq.ack, receipt)
                     
-                    # Check if there's work to do (placeholder for real implementation)
-                    # If work is found, process it, then reset the event
-                    # For now, this is just a placeholder
+        except Exception as e:
+            logger.error(f"Message queue processor error: {e}")
+        
+    async def start_coordinator(self):
+        """Run the coordinator until shutdown"""
+        try:
+            coordinator = Coordinator()
+            logger.info("Coordinator service started")
+            
+            # In a real implementation, this would coordinate tasks,
+            # blocking on a queue read so it wakes only for real work.
+            # There is no such work yet, so park until shutdown rather
+            # than waking on a fixed cadence
+            await self.shutdown_event.wait()
                     
-            except Exception as e:
-                logger.error(f"Coordinator service error: {e}")
-                
-        coordinator_thread = threading.Thread(target=run_coordinator, daemon=True)
-        coordinator_thread.start()
-        self.services["coordinator"] = coordinator_thread
-        logger.info("Coordinator service thread started")
-
-    def start_worker(self):
-        """Start the worker service"""
-        def run_worker():
-            try:
-                worker = Worker()
-                worker.run()
-            except Exception as e:
-                logger.error(f"Worker service error: {e}")
+        except Exception as e:
+            logger.error(f"Coordinator service error: {e}")
 
-        worker_thread = threading.Thread(target=run_worker, daemon=True)
-        worker_thread.start()
-        self.services["worker"] = worker_thread
-        logger.info("Worker service thread started")
+    async def start_worker(self):
+        """Run the worker until shutdown"""
+        try:
+            worker = Worker()
+            runner = asyncio.create_task(worker.run())
+            stopper = asyncio.create_task(self.shutdown_event.wait())
+            await asyncio.wait({runner, stopper}, return_when=asyncio.FIRST_COMPLETED)
+            stopper.cancel()
+            worker.stop()
+            await runner
+        except Exception as e:
+            logger.error(f"Worker service error: {e}")
         
-    def start_all_services(self):
-        """Start all application services"""
+    async def start_all_services(self):
+        """Run all application services until shutdown"""
         logger.info("Starting all application services...")
+        self._loop = asyncio.get_running_loop()
+        self.setup_signal_handlers()
         
         # Start services
-        self.start_api_server()
-        self.start_message_queue_processor()
-        self.start_coordinator()
-        self.start_worker()
-        
+        self.services = {
+            "api_server": asyncio.create_task(self.start_api_server()),
+            "mq_processor": asyncio.create_task(self.start_message_queue_processor()),
+            "coordinator": asyncio.create_task(self.start_coordinator()),
+            "worker": asyncio.create_task(self.start_worker()),
+        }
         logger.info("All services started")
         
+        await asyncio.gather(*self.services.values())
+        
     def shutdown(self):
         """Gracefully shutdown all services"""
         logger.info("Shutting down application services...")
         
-        # Signal shutdown to all services
+        # Signal shutdown to all services; any still running are stopped
+        # when their event loop is closed
         self.shutdown_event.set()
-        
-        # Wait for threads to finish (with timeout)
-        for name, thread in self.services.items():
-            logger.info(f"Shutting down {name}...")
-            thread.join(timeout=5.0)
-            logger.info(f"{name} shut down.")
             
         # Close Redis pool
+        redis_pool = get_redis_pool()
         if redis_pool:
             try:
                 redis_pool.close_all()
@@ -165,16 +158,12 @@ class ApplicationManager:
         sys.exit(0)
 
     def run(self):
-        """Run the application and wait for shutdown signal"""
-        self.setup_signal_handlers()
-        self.start_all_services()
-
-        # Keep the main thread alive to handle signals
+        """Run the application until a shutdown signal"""
         try:
-            self.shutdown_event.wait()
+            asyncio.run(self.start_all_services())
         except KeyboardInterrupt:
             logger.info("Keyboard interrupt received, shutting down...")
-            self.shutdown()
+        self.shutdown()
 
 
 if __name__ == "__main__":
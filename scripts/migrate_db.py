@@ -2,8 +2,11 @@
 
 import os
 import sys
+import json
 import logging
 
+import numpy as np
+
 # Add the project root to the path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
@@ -41,22 +44,37 @@ CREATE TABLE IF NOT EXISTS runs(
   FOREIGN KEY(task_id) REFERENCES tasks(id)
 );
 
--- aggregated daily stats
+-- aggregated daily stats, kept up to date incrementally by the runs
+-- writer; the sums let each batch be folded in without rescanning runs.
+-- The avg columns are no longer written: read metrics_daily_avg instead
 CREATE TABLE IF NOT EXISTS metrics_daily(
   day TEXT PRIMARY KEY,
   tasks_completed INTEGER,
   success_rate REAL,
   avg_latency_ms REAL,
-  avg_retries REAL
+  avg_retries REAL,
+  sum_success INTEGER,
+  sum_latency_ms REAL,
+  sum_retries INTEGER
 );
 
 -- learning features+labels for routing
 CREATE TABLE IF NOT EXISTS train_examples(
   id INTEGER PRIMARY KEY,
   agent TEXT, tool TEXT, feature_json TEXT,
+  feature_blob BLOB,
   label_success INTEGER,
   label_latency_ms INTEGER,
-  created_ts INTEGER
+  created_ts INTEGER,
+  -- examples are reservoir-sampled; each stands for this many collected
+  sample_weight REAL DEFAULT 1.0
+);
+
+-- oversized train_examples.feature_json payloads, stored once per content
+-- digest and referenced as {"$ref": "<digest>"}
+CREATE TABLE IF NOT EXISTS feature_payloads(
+  digest TEXT PRIMARY KEY,
+  payload_json TEXT
 );
 
 -- policy parameters and model metadata
@@ -78,15 +96,83 @@ CREATE TABLE IF NOT EXISTS conversations(
 # Indexes for performance
 INDEXES = [
     "CREATE INDEX IF NOT EXISTS idx_runs_task ON runs(task_id);",
-    "CREATE INDEX IF NOT EXISTS idx_runs_ts ON runs(start_ts);",
+    # Covers start_ts range scans that read only these columns (per-day
+    # stats); supersedes the old single-column idx_runs_ts
+    "CREATE INDEX IF NOT EXISTS ix_runs_start_ts ON runs(start_ts, success, latency_ms, retries);",
+    "DROP INDEX IF EXISTS idx_runs_ts;",
     "CREATE INDEX IF NOT EXISTS idx_train_agent ON train_examples(agent);"
 ]
 
+# Views are created after the column migrations, since they read the
+# metrics_daily sums that older databases only gain in migrate_metrics_daily
+VIEWS = [
+    """
+    CREATE VIEW IF NOT EXISTS metrics_daily_avg AS
+    SELECT day, tasks_completed,
+           1.0 * sum_success / tasks_completed AS success_rate,
+           1.0 * sum_latency_ms / tasks_completed AS avg_latency_ms,
+           1.0 * sum_retries / tasks_completed AS avg_retries
+    FROM metrics_daily
+    """
+]
+
 # Index for conversation history
 INDEXES.extend([
     "CREATE INDEX IF NOT EXISTS idx_conversations_updated ON conversations(updated_ts);"
 ])
 
+def migrate_feature_blobs(cursor):
+    """Add train_examples.feature_blob and backfill it from feature_json"""
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(train_examples)")}
+    if "feature_blob" not in columns:
+        logger.info("Adding train_examples.feature_blob column...")
+        cursor.execute("ALTER TABLE train_examples ADD COLUMN feature_blob BLOB")
+    
+    rows = cursor.execute(
+        "SELECT id, feature_json FROM train_examples "
+        "WHERE feature_blob IS NULL AND feature_json IS NOT NULL"
+    ).fetchall()
+    updates = []
+    for row_id, feature_json in rows:
+        try:
+            values = list(json.loads(feature_json).values())
+            updates.append((np.asarray(values, dtype="<f8").tobytes(), row_id))
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Skipping train example {row_id} with unusable features: {e}")
+    if updates:
+        logger.info(f"Backfilling feature_blob for {len(updates)} training examples...")
+        cursor.executemany("UPDATE train_examples SET feature_blob = ? WHERE id = ?", updates)
+
+def migrate_sample_weight(cursor):
+    """Add train_examples.sample_weight; existing examples were not sampled"""
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(train_examples)")}
+    if "sample_weight" not in columns:
+        logger.info("Adding train_examples.sample_weight column...")
+        cursor.execute("ALTER TABLE train_examples ADD COLUMN sample_weight REAL DEFAULT 1.0")
+
+def migrate_metrics_daily(cursor):
+    """Add the metrics_daily running sums and rebuild them from runs"""
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(metrics_daily)")}
+    missing = [
+        (name, sql_type)
+        for name, sql_type in (("sum_success", "INTEGER"), ("sum_latency_ms", "REAL"), ("sum_retries", "INTEGER"))
+        if name not in columns
+    ]
+    if not missing:
+        return
+    
+    for name, sql_type in missing:
+        logger.info(f"Adding metrics_daily.{name} column...")
+        cursor.execute(f"ALTER TABLE metrics_daily ADD COLUMN {name} {sql_type}")
+    
+    logger.info("Rebuilding metrics_daily from runs...")
+    cursor.execute("""
+        INSERT OR REPLACE INTO metrics_daily (day, tasks_completed, sum_success, sum_latency_ms, sum_retries)
+        SELECT date(start_ts, 'unixepoch'), COUNT(*), TOTAL(success), TOTAL(latency_ms), TOTAL(retries)
+        FROM runs
+        GROUP BY date(start_ts, 'unixepoch')
+    """)
+
 def migrate_database():
     """Create or migrate the database schema"""
     db_path = os.path.join(os.path.dirname(__file__), "..", "data", "core.db")
@@ -108,6 +194,14 @@ def migrate_database():
             for index_sql in INDEXES:
                 cursor.execute(index_sql)
             
+            migrate_feature_blobs(cursor)
+            migrate_sample_weight(cursor)
+            migrate_metrics_daily(cursor)
+            
+            logger.info("Creating views...")
+            for view_sql in VIEWS:
+                cursor.execute(view_sql)
+            
             # Commit changes
             conn.commit()
             logger.info("Database migration completed successfully")
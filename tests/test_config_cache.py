@@ -0,0 +1,66 @@
+"""
+Unit tests for the YAML config cache.
+"""
+
+import os
+import sys
+
+# Add the project root to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.config_cache import load_yaml, invalidate, CACHE_SUFFIX
+
+
+class TestConfigCache:
+    """Test suite for load_yaml."""
+
+    def test_sidecar_written_and_reused(self, tmp_path, monkeypatch):
+        """The second load reads the sidecar instead of parsing the YAML"""
+        path = tmp_path / "policy.yaml"
+        path.write_text("redis:\n  host: localhost\n  port: 6379\n")
+
+        assert load_yaml(str(path)) == {"redis": {"host": "localhost", "port": 6379}}
+        assert os.path.exists(str(path) + CACHE_SUFFIX)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("YAML parsed despite a fresh sidecar")
+        monkeypatch.setattr("core.config_cache._parse_yaml", fail)
+        invalidate()
+        assert load_yaml(str(path)) == {"redis": {"host": "localhost", "port": 6379}}
+
+    def test_loaded_once_per_process(self, tmp_path):
+        """Repeated loads of an unchanged file share one document"""
+        path = tmp_path / "policy.yaml"
+        path.write_text("a: 1\n")
+
+        first = load_yaml(str(path))
+        os.remove(str(path) + CACHE_SUFFIX)
+        assert load_yaml(str(path)) is first
+        assert not os.path.exists(str(path) + CACHE_SUFFIX)
+
+    def test_sidecar_refreshed_when_file_changes(self, tmp_path):
+        """Editing the YAML invalidates the sidecar"""
+        path = tmp_path / "policy.yaml"
+        path.write_text("learning:\n  enabled: true\n")
+        assert load_yaml(str(path)) == {"learning": {"enabled": True}}
+
+        path.write_text("learning:\n  enabled: false\n  min_samples: 10\n")
+        assert load_yaml(str(path)) == {"learning": {"enabled": False, "min_samples": 10}}
+
+    def test_corrupt_sidecar_falls_back_to_yaml(self, tmp_path):
+        """A broken sidecar is ignored and rewritten"""
+        path = tmp_path / "policy.yaml"
+        path.write_text("a: 1\n")
+        load_yaml(str(path))
+        (tmp_path / ("policy.yaml" + CACHE_SUFFIX)).write_text("{not json")
+        invalidate()
+
+        assert load_yaml(str(path)) == {"a": 1}
+
+    def test_non_json_documents_not_cached(self, tmp_path):
+        """Documents that don't survive a JSON round trip skip the sidecar"""
+        path = tmp_path / "policy.yaml"
+        path.write_text("1: one\n")
+
+        assert load_yaml(str(path)) == {1: "one"}
+        assert not os.path.exists(str(path) + CACHE_SUFFIX)
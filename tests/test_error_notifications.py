@@ -2,10 +2,12 @@
 Unit tests for the ErrorNotificationManager class and related functions.
 """
 
+import asyncio
 import pytest
 import smtplib
 import subprocess
-from unittest.mock import Mock, patch, MagicMock
+import time
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 from core.error_notifications import (
     ErrorNotificationManager,
     initialize_notification_manager,
@@ -240,6 +242,223 @@ class TestErrorNotificationManager:
         mock_send_email.assert_called_once()
         mock_send_command.assert_called_once()
 
+    def test_send_command_notification_async_success(self):
+        """Test async command notification runs every command."""
+        manager = ErrorNotificationManager(
+            notification_commands=["true {message}", "echo {message}"]
+        )
+        
+        result = asyncio.run(manager.send_command_notification_async("Test"))
+        
+        assert result is True
+
+    def test_send_command_notification_async_failure(self):
+        """Test async command notification with a failing command."""
+        manager = ErrorNotificationManager(
+            notification_commands=["true", "exit 1"]
+        )
+        
+        result = asyncio.run(manager.send_command_notification_async("Test"))
+        
+        assert result is False
+
+    @patch('core.pidfd_dispatch.PIDFD_AVAILABLE', False)
+    def test_send_command_notification_async_fallback(self):
+        """Test async command notification without pidfd support."""
+        manager = ErrorNotificationManager(
+            notification_commands=["true {message}", "exit 1"]
+        )
+        
+        result = asyncio.run(manager.send_command_notification_async("Test"))
+        
+        assert result is False
+
+    @patch('core.error_notifications.run_shell', new_callable=AsyncMock)
+    def test_send_command_notification_async_timeout(self, mock_run_shell):
+        """Test async command notification with timeout."""
+        mock_run_shell.side_effect = asyncio.TimeoutError()
+        
+        manager = ErrorNotificationManager(
+            notification_commands=["sleep 60"]
+        )
+        
+        result = asyncio.run(manager.send_command_notification_async("Test"))
+        
+        assert result is False
+
+    @pytest.mark.parametrize("pidfd", [True, False])
+    def test_run_shell_cancelled_kills_command(self, pidfd):
+        """Cancelling run_shell kills the command instead of waiting for it."""
+        from core import pidfd_dispatch
+        if pidfd and not pidfd_dispatch.PIDFD_AVAILABLE:
+            pytest.skip("pidfd_open is not supported here")
+        
+        async def cancel_soon():
+            task = asyncio.ensure_future(pidfd_dispatch.run_shell("sleep 30"))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        
+        with patch('core.pidfd_dispatch.PIDFD_AVAILABLE', pidfd):
+            start = time.monotonic()
+            asyncio.run(cancel_soon())
+        
+        assert time.monotonic() - start < 5
+
+    def test_send_email_notification_async_incomplete_config(self):
+        """Test async email notification with incomplete configuration."""
+        manager = ErrorNotificationManager()
+        
+        result = asyncio.run(manager.send_email_notification_async("Subject", "Message"))
+        
+        assert result is False
+
+    @patch('core.error_notifications.aiosmtplib')
+    def test_send_email_notification_async_reuses_connection(self, mock_aiosmtplib):
+        """Test async email notification keeps one SMTP connection open."""
+        mock_client = MagicMock()
+        mock_client.is_connected = True
+        mock_client.connect = AsyncMock()
+        mock_client.login = AsyncMock()
+        mock_client.send_message = AsyncMock()
+        mock_aiosmtplib.SMTP.return_value = mock_client
+        
+        manager = ErrorNotificationManager(
+            smtp_host="smtp.example.com",
+            smtp_port=587,
+            smtp_username="user",
+            smtp_password="pass",
+            from_email="sender@example.com",
+            to_emails=["recipient@example.com"]
+        )
+        
+        async def send_twice():
+            first = await manager.send_email_notification_async("One", "Message")
+            second = await manager.send_email_notification_async("Two", "Message")
+            return first, second
+        
+        assert asyncio.run(send_twice()) == (True, True)
+        mock_aiosmtplib.SMTP.assert_called_once()
+        mock_client.connect.assert_awaited_once()
+        mock_client.login.assert_awaited_once_with("user", "pass")
+        assert mock_client.send_message.await_count == 2
+
+    @patch('core.error_notifications.aiosmtplib')
+    def test_send_email_notification_async_across_event_loops(self, mock_aiosmtplib):
+        """Test each event loop gets its own SMTP connection and lock."""
+        mock_aiosmtplib.SMTP.side_effect = lambda **kwargs: MagicMock(
+            is_connected=True, connect=AsyncMock(), login=AsyncMock(), send_message=AsyncMock()
+        )
+        
+        manager = ErrorNotificationManager(
+            smtp_host="smtp.example.com",
+            smtp_port=587,
+            from_email="sender@example.com",
+            to_emails=["recipient@example.com"]
+        )
+        
+        assert asyncio.run(manager.send_email_notification_async("One", "Message")) is True
+        first = manager._smtp
+        assert asyncio.run(manager.send_email_notification_async("Two", "Message")) is True
+        
+        assert mock_aiosmtplib.SMTP.call_count == 2
+        assert manager._smtp is not first
+        first.send_message.assert_awaited_once()
+        manager._smtp.send_message.assert_awaited_once()
+
+    @patch.object(ErrorNotificationManager, 'send_email_notification_async', new_callable=AsyncMock)
+    @patch.object(ErrorNotificationManager, 'send_command_notification_async', new_callable=AsyncMock)
+    def test_send_notification_async(self, mock_send_command, mock_send_email):
+        """Test async notification fans out to both channels."""
+        mock_send_email.return_value = False
+        mock_send_command.return_value = True
+        
+        manager = ErrorNotificationManager()
+        
+        result = asyncio.run(manager.send_notification_async("Title", "Message", "error"))
+        
+        assert result is True
+        mock_send_email.assert_awaited_once()
+        mock_send_command.assert_awaited_once()
+
+    @patch.object(ErrorNotificationManager, 'send_email_notification')
+    @patch.object(ErrorNotificationManager, 'send_command_notification')
+    def test_send_notification_coalesces_duplicates(self, mock_send_command, mock_send_email):
+        """Test identical notifications within the window are delivered once."""
+        mock_send_email.return_value = True
+        mock_send_command.return_value = True
+        
+        manager = ErrorNotificationManager(dedup_window_seconds=60)
+        
+        for _ in range(5):
+            assert manager.send_notification("Title", "Message", "error") is True
+        manager.send_notification("Title", "Other message", "error")
+        
+        assert mock_send_email.call_count == 2
+        
+        # Flushing emits one summary carrying the repeat count
+        assert manager.flush_suppressed(force=True) == 1
+        assert mock_send_email.call_count == 3
+        subject, body = mock_send_email.call_args[0]
+        assert subject == "[ERROR] Title"
+        assert "occurred 4 more times" in body
+
+    @patch.object(ErrorNotificationManager, 'send_email_notification')
+    @patch.object(ErrorNotificationManager, 'send_command_notification')
+    def test_suppressed_count_delivered_after_burst(self, mock_send_command, mock_send_email):
+        """Test repeat counts are delivered once a burst stops, without another send."""
+        mock_send_email.return_value = True
+        mock_send_command.return_value = True
+        
+        manager = ErrorNotificationManager(dedup_window_seconds=0.1)
+        
+        for _ in range(3):
+            manager.send_notification("Title", "Message", "error")
+        assert mock_send_email.call_count == 1
+        
+        deadline = time.monotonic() + 5
+        while mock_send_email.call_count < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        
+        assert mock_send_email.call_count == 2
+        subject, body = mock_send_email.call_args[0]
+        assert subject == "[ERROR] Title"
+        assert "occurred 2 more times" in body
+
+    @patch.object(ErrorNotificationManager, 'send_email_notification')
+    @patch.object(ErrorNotificationManager, 'send_command_notification')
+    def test_send_notification_dedup_window_expiry(self, mock_send_command, mock_send_email):
+        """Test a repeat after the window is delivered along with a summary."""
+        mock_send_email.return_value = True
+        mock_send_command.return_value = True
+        
+        manager = ErrorNotificationManager(dedup_window_seconds=60)
+        
+        with patch('core.error_notifications.time.monotonic', return_value=1000.0):
+            manager.send_notification("Title", "Message", "warning")
+            manager.send_notification("Title", "Message", "warning")
+        with patch('core.error_notifications.time.monotonic', return_value=1061.0):
+            manager.send_notification("Title", "Message", "warning")
+        
+        # Original, summary of the suppressed repeat, then the new occurrence
+        assert mock_send_email.call_count == 3
+        assert "occurred 1 more times" in mock_send_email.call_args_list[1][0][1]
+
+    @patch.object(ErrorNotificationManager, 'send_email_notification')
+    @patch.object(ErrorNotificationManager, 'send_command_notification')
+    def test_send_notification_dedup_disabled(self, mock_send_command, mock_send_email):
+        """Test a zero window delivers every notification."""
+        mock_send_email.return_value = True
+        mock_send_command.return_value = True
+        
+        manager = ErrorNotificationManager(dedup_window_seconds=0)
+        
+        for _ in range(3):
+            manager.send_notification("Title", "Message", "error")
+        
+        assert mock_send_email.call_count == 3
+
 
 class TestGlobalNotificationFunctions:
     """Test suite for global notification functions."""
@@ -2,6 +2,7 @@
 Unit tests for the ErrorRateLimiter and AdaptiveErrorRateLimiter classes.
 """
 
+import json
 import pytest
 import time
 from unittest.mock import patch, Mock
@@ -88,6 +89,17 @@ class TestErrorRateLimiter:
         assert stats["errors_in_current_second"] == 1
         assert stats["errors_in_current_minute"] == 1
 
+    def test_get_stats_returns_snapshot(self):
+        """Test get_stats returns an independent, JSON-serializable dict each call."""
+        limiter = ErrorRateLimiter()
+        
+        stats = limiter.get_stats()
+        limiter.is_allowed("test_error")
+        
+        assert stats["errors_in_current_second"] == 0
+        assert limiter.get_stats()["errors_in_current_second"] == 1
+        assert json.loads(json.dumps(stats)) == stats
+
 
 class TestAdaptiveErrorRateLimiter:
     """Test suite for AdaptiveErrorRateLimiter class."""
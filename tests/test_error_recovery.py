@@ -2,6 +2,9 @@
 Unit tests for the error recovery mechanisms.
 """
 
+import asyncio
+import copy
+import pickle
 import pytest
 import time
 import random
@@ -15,6 +18,7 @@ from core.error_recovery import (
     ConfigurationError,
     retry_with_backoff,
     with_circuit_breaker,
+    RetryBudget,
     AgenticError,
     DatabaseError,
     RedisError,
@@ -257,6 +261,49 @@ class TestCircuitBreaker:
         assert cb.state == "OPEN"
 
 
+    def test_concurrent_failures_counted(self):
+        """Test failures from many threads are all counted."""
+        import threading
+        
+        cb = CircuitBreaker("test", failure_threshold=1000)
+        
+        def fail_func():
+            raise ValueError("Test failure")
+        
+        def worker():
+            for _ in range(100):
+                with pytest.raises(ValueError):
+                    cb.call(fail_func)
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert cb.failure_count == 800
+        assert cb.state == "CLOSED"
+
+    def test_open_circuit_recovers_after_timeout(self):
+        """Test an open circuit goes half-open once the recovery timeout passes."""
+        cb = CircuitBreaker("test", failure_threshold=1, recovery_timeout=30.0)
+        
+        def fail_func():
+            raise ValueError("Test failure")
+        
+        with patch('core.error_recovery._now', return_value=100.0):
+            with pytest.raises(ValueError):
+                cb.call(fail_func)
+            assert cb.state == "OPEN"
+        
+        with patch('core.error_recovery._now', return_value=129.0):
+            with pytest.raises(CircuitBreakerError):
+                cb.call(lambda: "success")
+        
+        with patch('core.error_recovery._now', return_value=130.0):
+            assert cb.call(lambda: "success") == "success"
+        assert cb.state == "CLOSED"
+
 class TestRetryDecorator:
     """Test suite for retry_with_backoff decorator."""
 
@@ -327,6 +374,118 @@ class TestRetryDecorator:
         assert retry_callback_count == 2  # Called on attempts 1 and 2
 
 
+    def test_retry_async_function(self):
+        """Test retry awaits coroutine functions and sleeps without blocking."""
+        call_count = 0
+        
+        @retry_with_backoff(
+            strategy=ExponentialBackoffStrategy(base_delay=0.01, jitter=False),
+            max_attempts=3
+        )
+        async def sometimes_fail_func():
+            nonlocal call_count
+            call_count += 1
+            if call_count < 3:
+                raise DatabaseError("Temporary database error")
+            return "success"
+        
+        with patch('core.error_recovery.time.sleep') as mock_sleep:
+            result = asyncio.run(sometimes_fail_func())
+        
+        assert result == "success"
+        assert call_count == 3
+        mock_sleep.assert_not_called()
+
+    def test_retry_async_non_retryable(self):
+        """Test retry re-raises non-retryable errors from coroutine functions."""
+        @retry_with_backoff(max_attempts=3)
+        async def invalid_func():
+            raise ValidationError("Invalid input")
+        
+        with pytest.raises(ValidationError):
+            asyncio.run(invalid_func())
+
+    def test_retry_budget_exhausted(self):
+        """Test retries stop once the retry budget is spent."""
+        call_count = 0
+        budget = RetryBudget(ratio=0.0, capacity=1.0, min_per_second=0.0)
+        
+        @retry_with_backoff(
+            strategy=ExponentialBackoffStrategy(base_delay=0.01, jitter=False),
+            max_attempts=3,
+            budget=budget
+        )
+        def always_fail_func():
+            nonlocal call_count
+            call_count += 1
+            raise DatabaseError("Persistent database error")
+        
+        # One banked token allows a single retry
+        with pytest.raises(DatabaseError):
+            always_fail_func()
+        assert call_count == 2
+        
+        # The budget is now empty, so the next call fails fast
+        with pytest.raises(DatabaseError):
+            always_fail_func()
+        assert call_count == 3
+
+    def test_retry_budget_per_decorated_function(self):
+        """Test functions built by one factory don't share a retry budget."""
+        def make_func():
+            calls = []
+            
+            @retry_with_backoff(
+                strategy=ExponentialBackoffStrategy(base_delay=0.0, jitter=False),
+                max_attempts=2
+            )
+            def always_fail_func():
+                calls.append(1)
+                raise DatabaseError("Persistent database error")
+            
+            return always_fail_func, calls
+        
+        first, first_calls = make_func()
+        second, second_calls = make_func()
+        assert first.__qualname__ == second.__qualname__
+        
+        # Spend the first function's budget; the second keeps its own
+        for _ in range(15):
+            with pytest.raises(DatabaseError):
+                first()
+        del first_calls[:]
+        with pytest.raises(DatabaseError):
+            first()
+        with pytest.raises(DatabaseError):
+            second()
+        assert first_calls == [1]
+        assert second_calls == [1, 1]
+
+
+class TestRetryBudget:
+    """Test suite for RetryBudget class."""
+
+    def test_calls_earn_tokens(self):
+        """Test each call earns a fraction of a retry."""
+        budget = RetryBudget(ratio=0.5, capacity=1.0, min_per_second=0.0)
+        assert budget.try_consume() is True
+        assert budget.try_consume() is False
+        
+        budget.record_call()
+        budget.record_call()
+        assert budget.try_consume() is True
+
+    def test_time_refill(self):
+        """Test tokens refill over time up to capacity."""
+        budget = RetryBudget(ratio=0.0, capacity=2.0, min_per_second=1.0)
+        with patch('core.error_recovery._now', return_value=budget.last_refill):
+            assert budget.try_consume() is True
+            assert budget.try_consume() is True
+            assert budget.try_consume() is False
+        with patch('core.error_recovery._now', return_value=budget.last_refill + 10):
+            assert budget.try_consume() is True
+            assert budget.tokens == 1.0
+
 class TestCircuitBreakerDecorator:
     """Test suite for with_circuit_breaker decorator."""
 
@@ -386,17 +545,48 @@ class TestCustomExceptions:
         
         # Test with details
         details = {"field": "value"}
-        error = ValidationError("Invalid input", details)
+        error = ValidationError("Invalid input", details=details)
         assert error.details == details
 
     def test_configuration_error(self):
         """Test ConfigurationError."""
         error = ConfigurationError("Invalid configuration")
-        assert error.error_code == "CONFIGURATION_ERROR"
+        assert error.error_code == "CONFIG_ERROR"
         assert error.message == "Invalid configuration"
         assert error.details is None
         
         # Test with details
         details = {"config_key": "invalid_value"}
-        error = ConfigurationError("Invalid configuration", details)
-        assert error.details == details
\ No newline at end of file
+        error = ConfigurationError("Invalid configuration", details=details)
+        assert error.details == details
+
+    def test_shared_exception_classes(self):
+        """Test error_recovery re-exports the classes from core.exceptions."""
+        from core import exceptions
+        assert ValidationError is exceptions.ValidationError
+        assert ConfigurationError is exceptions.ConfigurationError
+        
+        strategy = ExponentialBackoffStrategy("test")
+        assert strategy.should_retry(exceptions.ValidationError("Invalid input"), 1) is False
+
+    def test_exception_positional_error_code(self):
+        """Test the second positional argument is still the error code."""
+        error = ValidationError("Invalid input", "BAD_FIELD")
+        assert error.error_code == "BAD_FIELD"
+        assert error.details is None
+        
+        error = ConfigurationError("Invalid configuration", "BAD_KEY", {"key": "x"})
+        assert error.error_code == "BAD_KEY"
+        assert error.context == {"key": "x"}
+
+    def test_exception_pickle_and_copy_round_trip(self):
+        """Test pickling and copying keep the error code, context and details."""
+        error = pickle.loads(pickle.dumps(RedisError("pool down", "REDIS_POOL_SHUTDOWN")))
+        assert error.error_code == "REDIS_POOL_SHUTDOWN"
+        assert str(error) == "[REDIS_POOL_SHUTDOWN] pool down"
+        
+        error = copy.copy(AgenticError("m", "CODE", {"key": "x"}, {"field": "y"}))
+        assert error.error_code == "CODE"
+        assert error.context == {"key": "x"}
+        assert error.details == {"field": "y"}
+        assert str(error) == "[CODE] m"
@@ -0,0 +1,239 @@
+"""
+Unit tests for the EventBus class.
+"""
+
+import pytest
+from contextlib import contextmanager
+from unittest.mock import patch, MagicMock
+from core.events import EventBus
+
+
+@pytest.fixture
+def mock_conn():
+    """Patch the shared Redis pool with a mocked connection."""
+    conn = MagicMock()
+    pool = MagicMock()
+
+    @contextmanager
+    def connection():
+        yield conn
+
+    pool.connection = connection
+    pool.get_pool_info.return_value = {"host": "localhost"}
+    with patch('core.events.get_redis_pool', return_value=pool):
+        yield conn
+
+
+@pytest.fixture
+def event_bus(mock_conn):
+    """Create an EventBus backed by the mocked connection."""
+    bus = EventBus(flush_interval=60)
+    yield bus
+    bus.close()
+
+
+class TestEventBus:
+    """Test suite for EventBus class."""
+
+    def test_publish_calls_local_handlers(self, event_bus):
+        """Test publish dispatches to subscribed handlers."""
+        received = []
+        event_bus.subscribe("task.enqueued", received.append)
+
+        event_bus.publish({"type": "task.enqueued", "task_id": 1})
+        assert event_bus.flush(timeout=5) is True
+
+        assert received == [{"type": "task.enqueued", "task_id": 1}]
+        assert event_bus.publish_count == 1
+
+    def test_publish_batches_redis_publishes(self, event_bus, mock_conn):
+        """Test queued publishes are flushed through one pipeline."""
+        pipe = mock_conn.pipeline.return_value
+
+        event_bus.publish({"type": "a"})
+        event_bus.publish({"type": "b"})
+        mock_conn.publish.assert_not_called()
+
+        assert event_bus.flush(timeout=5) is True
+
+        mock_conn.pipeline.assert_called_once_with(transaction=False)
+        assert pipe.publish.call_count == 2
+        assert pipe.publish.call_args_list[0][0][0] == "events:a"
+        pipe.execute.assert_called_once()
+
+    def test_publish_does_not_block_on_handlers(self, event_bus):
+        """Test publish returns before slow handlers run."""
+        import threading
+        release = threading.Event()
+        event_bus.subscribe("a", lambda event: release.wait(5))
+
+        event_bus.publish({"type": "a"})
+        assert event_bus.flush(timeout=0.05) is False
+
+        release.set()
+        assert event_bus.flush(timeout=5) is True
+
+    def test_publish_queue_full(self, mock_conn):
+        """Test a full queue applies backpressure to publishers."""
+        import queue
+        import threading
+        bus = EventBus(flush_interval=60, max_queue_size=1)
+        release = threading.Event()
+        bus.subscribe("a", lambda event: release.wait(5))
+
+        bus.publish({"type": "a"})
+        bus.flush(timeout=0.05)  # worker is now blocked in the handler
+        bus.publish({"type": "a"})
+        with pytest.raises(queue.Full):
+            bus.publish({"type": "a"}, block=False)
+
+        release.set()
+        bus.close()
+
+    def test_publish_sync(self, event_bus, mock_conn):
+        """Test publish_sync publishes to Redis immediately."""
+        assert event_bus.publish_sync({"type": "a"}) is True
+
+        mock_conn.publish.assert_called_once()
+        assert mock_conn.publish.call_args[0][0] == "events:a"
+
+    def test_publish_many(self, event_bus, mock_conn):
+        """Test publish_many uses a single pipeline for all events."""
+        received = []
+        event_bus.subscribe("a", received.append)
+
+        assert event_bus.publish_many([{"type": "a"}, {"type": "a"}, {"type": "b"}]) is True
+
+        assert mock_conn.pipeline.return_value.publish.call_count == 3
+        assert len(received) == 2
+        assert event_bus.publish_count == 3
+
+    def test_redis_error_does_not_raise(self, event_bus, mock_conn):
+        """Test Redis failures are logged rather than raised."""
+        import redis
+        mock_conn.publish.side_effect = redis.ConnectionError("down")
+
+        assert event_bus.publish_sync({"type": "a"}) is False
+
+    def test_handler_error_isolated(self, event_bus):
+        """Test one failing handler does not stop the others."""
+        received = []
+
+        def failing_handler(event):
+            raise ValueError("boom")
+
+        event_bus.subscribe("a", failing_handler)
+        event_bus.subscribe("a", received.append)
+
+        event_bus.publish({"type": "a"})
+        event_bus.flush(timeout=5)
+
+        assert received == [{"type": "a"}]
+
+    def test_parallel_handlers(self, mock_conn):
+        """Test handlers overlap when parallel dispatch is enabled."""
+        import time
+        bus = EventBus(flush_interval=60, parallel=True)
+        received = []
+
+        def slow_handler(event):
+            time.sleep(0.2)
+            received.append(event["type"])
+
+        def failing_handler(event):
+            raise ValueError("boom")
+
+        for _ in range(3):
+            bus.subscribe("a", slow_handler)
+        bus.subscribe("a", failing_handler)
+
+        start = time.monotonic()
+        bus.publish({"type": "a"})
+        bus.flush(timeout=5)
+        elapsed = time.monotonic() - start
+        bus.close()
+
+        assert received == ["a", "a", "a"]
+        assert elapsed < 0.5
+
+    def test_unsubscribe(self, event_bus):
+        """Test unsubscribed handlers no longer receive events."""
+        received = []
+        other = []
+        event_bus.subscribe("a", received.append)
+        event_bus.subscribe("a", other.append)
+
+        assert event_bus.unsubscribe("a", received.append) is True
+        assert event_bus.unsubscribe("a", received.append) is False
+        assert event_bus.unsubscribe("missing", other.append) is False
+
+        event_bus.publish_sync({"type": "a"})
+
+        assert received == []
+        assert other == [{"type": "a"}]
+
+    def test_handler_error_logging_sampled(self, event_bus):
+        """Test repeated handler errors are only logged at a sampled rate."""
+        def failing_handler(event):
+            raise ValueError("boom")
+
+        event_bus.subscribe("a", failing_handler)
+
+        with patch.object(event_bus.logger, 'error') as mock_error:
+            for _ in range(200):
+                event_bus.publish_sync({"type": "a"})
+
+        # First five, then the 100th and 200th
+        assert mock_error.call_count == 7
+
+    def test_get_eventbus_info_cached(self, event_bus):
+        """Test pool info is cached while counters and handlers stay current."""
+        from core import events
+
+        info = event_bus.get_eventbus_info()
+        assert info["handler_counts"] == {}
+        assert info["redis_info"] == {"host": "localhost"}
+
+        event_bus.subscribe("a", lambda event: None)
+        event_bus.publish_sync({"type": "a"})
+        info = event_bus.get_eventbus_info()
+
+        assert info["handler_counts"] == {"a": 1}
+        assert info["publish_count"] == 1
+        assert events.get_redis_pool().get_pool_info.call_count == 2
+
+        event_bus.get_eventbus_info()
+        assert events.get_redis_pool().get_pool_info.call_count == 2
+
+    def test_publish_skipped_without_subscribers(self, mock_conn):
+        """Test channels with no remote subscribers are not published to."""
+        mock_conn.pubsub_numsub.return_value = [(b"events:a", 0)]
+        mock_conn.pubsub_numpat.return_value = 0
+        event_bus = EventBus(flush_interval=60, skip_unsubscribed=True)
+
+        assert event_bus.publish_sync({"type": "a"}) is True
+        assert event_bus.publish_sync({"type": "a"}) is True
+        event_bus.close()
+
+        mock_conn.publish.assert_not_called()
+        # The count is cached, so only the first publish asks Redis
+        mock_conn.pubsub_numsub.assert_called_once_with("events:a")
+
+    def test_publish_to_pattern_subscribers(self, mock_conn):
+        """Test a PSUBSCRIBE client keeps channels without direct subscribers published."""
+        mock_conn.pubsub_numsub.return_value = [(b"events:a", 0)]
+        mock_conn.pubsub_numpat.return_value = 1
+        event_bus = EventBus(flush_interval=60, skip_unsubscribed=True)
+
+        assert event_bus.publish_sync({"type": "a"}) is True
+        event_bus.close()
+
+        mock_conn.publish.assert_called_once()
+        assert mock_conn.publish.call_args[0][0] == "events:a"
+
+    def test_publish_without_subscriber_check_by_default(self, event_bus, mock_conn):
+        """Test events are published without asking Redis for subscribers by default."""
+        assert event_bus.publish_sync({"type": "a"}) is True
+
+        mock_conn.pubsub_numsub.assert_not_called()
+        mock_conn.publish.assert_called_once()
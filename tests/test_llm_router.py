@@ -0,0 +1,95 @@
+"""
+Unit tests for the LLMRouter class.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add the project root to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+pytest.importorskip("httpx")
+
+from core.llm_router import LLMRouter
+
+
+async def _collect(router, calls, limit=None):
+    chunks = []
+    stream = router.route_many(calls)
+    try:
+        async for item in stream:
+            chunks.append(item)
+            if limit is not None and len(chunks) >= limit:
+                break
+    finally:
+        await stream.aclose()
+        await router.aclose()
+    return chunks
+
+
+class TestLLMRouter:
+    """Test suite for LLMRouter class."""
+
+    def test_route_dispatches_to_provider(self):
+        """Test route streams the provider's chunks"""
+        router = LLMRouter()
+        try:
+            assert list(router.route("Groq", "llama", "hi", [])) == ["Groq response to: hi"]
+        finally:
+            asyncio.run(router.aclose())
+
+    def test_route_unknown_provider(self):
+        """Test route reports an unknown provider"""
+        router = LLMRouter()
+        try:
+            assert router.route("Nope", "m", "hi", []) == "Unknown provider: Nope"
+        finally:
+            asyncio.run(router.aclose())
+
+    def test_route_many_yields_every_call(self):
+        """Test route_many tags each chunk with its call's index"""
+        calls = [("Gemini", "g", "a"), ("Claude", "c", "b"), ("Nope", "m", "c")]
+        chunks = asyncio.run(_collect(LLMRouter(), calls))
+        assert sorted(chunks) == [
+            (0, "Gemini response to: a"),
+            (1, "Claude response to: b"),
+            (2, "Unknown provider: Nope"),
+        ]
+
+    def test_route_many_reports_provider_errors(self):
+        """Test a failing provider yields an error chunk and the others still finish"""
+        router = LLMRouter()
+
+        async def failing(model, message, history):
+            raise RuntimeError("boom")
+            yield  # pragma: no cover
+
+        router._async_dispatch["Groq"] = failing
+        calls = [("Groq", "g", "a"), ("Claude", "c", "b")]
+        chunks = asyncio.run(_collect(router, calls))
+        assert sorted(chunks) == [
+            (0, "Error calling Groq API: boom"),
+            (1, "Claude response to: b"),
+        ]
+
+    def test_route_many_cancels_calls_when_caller_stops(self):
+        """Test stopping early cancels the calls still running"""
+        router = LLMRouter()
+        cancelled = []
+
+        async def slow(model, message, history):
+            try:
+                await asyncio.sleep(30)
+                yield "late"
+            except asyncio.CancelledError:
+                cancelled.append(model)
+                raise
+
+        router._async_dispatch["Groq"] = slow
+        calls = [("Claude", "c", "a"), ("Groq", "g", "b")]
+        chunks = asyncio.run(_collect(router, calls, limit=1))
+        assert chunks == [(0, "Claude response to: a")]
+        assert cancelled == ["g"]
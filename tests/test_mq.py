@@ -0,0 +1,31 @@
+"""
+Unit tests for the MessageQueue class.
+"""
+
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Add the project root to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from core.mq import MessageQueue
+
+
+class TestMessageQueue:
+    """Test suite for MessageQueue class."""
+
+    @pytest.mark.parametrize("n", [0, -1])
+    def test_dequeue_batch_rejects_non_positive_n(self, n):
+        """Test dequeue_batch refuses n < 1 before touching Redis"""
+        pool = MagicMock()
+        with patch("core.mq.get_redis_pool", return_value=pool):
+            queue = MessageQueue("test_queue")
+            with pytest.raises(ValueError):
+                queue.dequeue_batch(n)
+        
+        queue._pop_batch.assert_not_called()
+        pool.connection.assert_not_called()
+        assert queue.dequeue_count == 0
@@ -48,13 +48,13 @@ class TestRedisConnectionPool:
         """Test Redis connection pool with mocked Redis"""
         from core.redis_pool import RedisConnectionPool
         
-        # Create a pool
-        pool = RedisConnectionPool()
-        
         # Mock Redis connection
         mock_conn = MagicMock()
         mock_redis.return_value = mock_conn
         
+        # Create a pool
+        pool = RedisConnectionPool()
+        
         # Test getting a connection
         with pool.connection() as conn:
             # Verify the connection was created
@@ -67,4 +67,91 @@ class TestRedisConnectionPool:
             mock_conn.set("test_key", "test_value")
             value = mock_conn.get("test_key")
             
-            assert value == "test_value"
\ No newline at end of file
+            assert value == "test_value"
+
+    @patch('core.redis_pool.redis.Redis')
+    def test_startup_probe_runs_once(self, mock_redis):
+        """Test the startup probe pings Redis only until it first succeeds"""
+        from core.redis_pool import RedisConnectionPool
+        import redis
+        
+        mock_conn = MagicMock()
+        mock_redis.return_value = mock_conn
+        pool = RedisConnectionPool()
+        
+        # A failed probe is retried on the next call
+        mock_conn.ping.side_effect = redis.ConnectionError("down")
+        with pytest.raises(Exception):
+            pool.on_startup_probe()
+        
+        mock_conn.ping.side_effect = None
+        pool.on_startup_probe()
+        pings = mock_conn.ping.call_count
+        pool.on_startup_probe()
+        pool.on_startup_probe()
+        
+        assert mock_conn.ping.call_count == pings
+
+    @patch('core.redis_pool.redis.Redis')
+    def test_get_connection_pings_only_when_verifying(self, mock_redis):
+        """Test borrowing a connection makes no round-trip unless asked to"""
+        from core.redis_pool import RedisConnectionPool
+        
+        mock_conn = MagicMock()
+        mock_redis.return_value = mock_conn
+        pool = RedisConnectionPool()
+        
+        with pool.connection() as conn:
+            conn.get("key")
+        assert mock_conn.ping.call_count == 0
+        
+        pool.get_connection(verify=True)
+        assert mock_conn.ping.call_count == 1
+
+    def test_get_connection_shares_one_client(self):
+        """Test every borrow returns the pool's shared client"""
+        from core.redis_pool import RedisConnectionPool
+        
+        pool = RedisConnectionPool()
+        
+        assert pool.get_connection() is pool.get_connection()
+        assert pool.get_connection(binary=True) is pool.get_connection(binary=True)
+        assert pool.get_connection() is not pool.get_connection(binary=True)
+
+    def test_pool_size_from_environment(self, monkeypatch):
+        """Test REDIS_POOL_SIZE sets the default pool size"""
+        from core.redis_pool import RedisConnectionPool
+        
+        monkeypatch.setenv("REDIS_POOL_SIZE", "4")
+        assert RedisConnectionPool().max_connections == 4
+        assert RedisConnectionPool(max_connections=12).max_connections == 12
+        
+        monkeypatch.delenv("REDIS_POOL_SIZE")
+        assert RedisConnectionPool().max_connections == 8
+
+    def test_startup_probe_opens_min_idle_connections(self):
+        """Test a successful probe leaves min_idle connections in each pool"""
+        from core.redis_pool import RedisConnectionPool
+        
+        pool = RedisConnectionPool(min_idle=3)
+        pool._client = MagicMock()
+        pool.pool = MagicMock()
+        pool.binary_pool = MagicMock()
+        
+        pool.on_startup_probe()
+        
+        for p in (pool.pool, pool.binary_pool):
+            assert p.get_connection.call_count == 3
+            assert p.release.call_count == 3
+
+    def test_pool_info_cached_briefly(self):
+        """Test get_pool_info reuses its reading within the TTL"""
+        from core.redis_pool import RedisConnectionPool
+        
+        pool = RedisConnectionPool()
+        first = pool.get_pool_info()
+        pool.pool._available_connections.append(MagicMock())
+        
+        assert pool.get_pool_info() == first
+        pool._info_cache = (0.0, pool._info_cache[1])
+        assert pool.get_pool_info()["available_connections"] == first["available_connections"] + 1
@@ -0,0 +1,33 @@
+"""
+Unit tests for the Prometheus task-run counters.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add the project root to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+pytest.importorskip("prometheus_client")
+
+from core.task_metrics import record_task_run
+
+
+class TestTaskMetrics:
+    """Test suite for the task-run counters."""
+
+    def test_runs_served_at_metrics_endpoint(self):
+        """A recorded run shows up in the /metrics output"""
+        pytest.importorskip("fastapi")
+        pytest.importorskip("httpx")
+        pytest.importorskip("uvicorn")
+        from apps.proxy_api.main import get_prometheus_metrics
+
+        record_task_run("browser", "playwright", True, 120.0)
+
+        body = asyncio.run(get_prometheus_metrics()).body.decode()
+        assert 'argus_task_runs_total{agent="browser",success="true",tool="playwright"}' in body
+        assert "argus_task_latency_ms_bucket" in body
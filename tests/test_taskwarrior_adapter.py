@@ -6,13 +6,22 @@ import pytest
 import os
 import tempfile
 from unittest.mock import patch, MagicMock
-from core.taskwarrior_adapter import TaskwarriorAdapter
+from core.taskwarrior_adapter import TaskwarriorAdapter, _find_taskrc, _make_tw
 from core.exceptions import FileIOError
 
 
 class TestTaskwarriorAdapter:
     """Test suite for TaskwarriorAdapter class."""
 
+    @pytest.fixture(autouse=True)
+    def clear_client_cache(self):
+        """Start each test without the process-wide taskrc and client caches."""
+        _find_taskrc.cache_clear()
+        _make_tw.cache_clear()
+        yield
+        _find_taskrc.cache_clear()
+        _make_tw.cache_clear()
+
     def test_init_with_valid_taskrc_path(self):
         """Test initialization with a valid taskrc path."""
         with tempfile.NamedTemporaryFile(mode='w', delete=False) as f:
@@ -44,6 +53,27 @@ class TestTaskwarriorAdapter:
         with pytest.raises(FileIOError):
             TaskwarriorAdapter()
 
+    @patch('core.taskwarrior_adapter.TaskWarrior')
+    def test_client_shared_across_adapters(self, mock_taskwarrior):
+        """Test adapters for the same taskrc share one TaskWarrior client."""
+        first = TaskwarriorAdapter("/some/taskrc")
+        second = TaskwarriorAdapter("/some/taskrc")
+        assert first.tw is second.tw
+        assert mock_taskwarrior.call_count == 1
+
+    @patch('core.taskwarrior_adapter.TaskWarrior')
+    def test_get_tasks_reads_only_pending(self, mock_taskwarrior):
+        """Test get_tasks loads just the pending set and filters descriptions."""
+        mock_taskwarrior.return_value.load_tasks.return_value = {"pending": [
+            {"id": 1, "uuid": "a", "description": "write report", "status": "pending"},
+            {"id": 2, "uuid": "b", "description": "buy milk", "status": "pending"},
+        ]}
+        adapter = TaskwarriorAdapter("/some/taskrc")
+
+        assert [task["tw_uuid"] for task in adapter.get_tasks()] == ["a", "b"]
+        assert [task["tw_uuid"] for task in adapter.get_tasks("report")] == ["a"]
+        mock_taskwarrior.return_value.load_tasks.assert_called_with(command="pending")
+
     def test_get_tasks_success(self):
         """Test successful task retrieval."""
         adapter = TaskwarriorAdapter()
@@ -65,6 +95,59 @@ class TestTaskwarriorAdapter:
         # Should return a dict (even if empty on error)
         assert isinstance(task, dict)
 
+    @patch('core.taskwarrior_adapter.subprocess.run')
+    @patch('core.taskwarrior_adapter.TaskWarrior')
+    def test_get_tasks_exports_once_with_shellout(self, mock_taskwarrior, mock_run):
+        """Test the shell-out backend is read with a single task export."""
+        from taskw import TaskWarriorShellout
+        mock_taskwarrior.return_value = MagicMock(spec=TaskWarriorShellout, config_filename="/some/taskrc")
+        mock_run.return_value.stdout = b'[{"id": 1, "uuid": "a", "description": "d", "status": "waiting"}]'
+        adapter = TaskwarriorAdapter("/some/taskrc")
+
+        tasks = adapter.get_tasks()
+
+        assert [task["tw_uuid"] for task in tasks] == ["a"]
+        assert mock_run.call_count == 1
+        assert "export" in mock_run.call_args[0][0]
+        mock_taskwarrior.return_value.load_tasks.assert_not_called()
+
+    @patch('core.taskwarrior_adapter.TaskWarrior')
+    def test_get_tasks_reads_pending_data_directly(self, mock_taskwarrior, tmp_path):
+        """Test pending.data is parsed directly and reused until it changes."""
+        pending = tmp_path / "pending.data"
+        pending.write_text(
+            '[description:"write report" entry:"20230101T120000Z" status:"pending" uuid:"a"]\n'
+            '[description:"done already" status:"completed" uuid:"b"]\n'
+            '[description:"later" status:"waiting" uuid:"c"]\n'
+        )
+        mock_taskwarrior.return_value.config = {"data": {"location": str(tmp_path)}}
+        adapter = TaskwarriorAdapter("/some/taskrc")
+
+        tasks = adapter.get_tasks()
+        assert [(task["id"], task["tw_uuid"]) for task in tasks] == [(1, "a"), (3, "c")]
+        assert tasks[0]["created_ts"] == 1672574400
+        assert adapter._pending_cache[1] is adapter._load_pending()
+        mock_taskwarrior.return_value.load_tasks.assert_not_called()
+
+        pending.write_text('[description:"new" status:"pending" uuid:"d"]\n')
+        assert [task["tw_uuid"] for task in adapter.get_tasks()] == ["d"]
+
+    @patch('core.taskwarrior_adapter.TaskWarrior')
+    def test_update_task_reads_task_once(self, mock_taskwarrior):
+        """Test update_task fetches the task once and threads it through."""
+        tw = mock_taskwarrior.return_value
+        tw.get_task.return_value = (1, {"uuid": "a", "description": "d", "status": "pending"})
+        tw.task_update.side_effect = lambda task: (1, dict(task))
+        tw.task_annotate.side_effect = lambda task, annotation: dict(task, annotated=True)
+        adapter = TaskwarriorAdapter("/some/taskrc")
+
+        task = adapter.update_task("a", status="completed", annotations=["one", "two"])
+
+        assert task["status"] == "completed"
+        assert tw.get_task.call_count == 1
+        assert tw.task_update.call_args[0][0]["status"] == "completed"
+        assert tw.task_annotate.call_count == 2
+
     def test_parse_date_valid(self):
         """Test parsing a valid date string."""
         adapter = TaskwarriorAdapter()
@@ -72,6 +155,23 @@ class TestTaskwarriorAdapter:
         assert isinstance(timestamp, int)
         assert timestamp > 0
 
+    @patch('core.taskwarrior_adapter.TaskWarrior')
+    def test_parse_date_is_utc(self, mock_taskwarrior):
+        """Test date strings are read as UTC, whatever the local timezone."""
+        adapter = TaskwarriorAdapter("/some/taskrc")
+        assert adapter._parse_date("20230101T120000Z") == 1672574400
+        assert adapter._parse_date("20231301T120000Z") is None
+
+    @patch('core.taskwarrior_adapter.TaskWarrior')
+    def test_parse_date_rejects_impossible_dates(self, mock_taskwarrior):
+        """Test days past the end of the month and out-of-range times are rejected."""
+        adapter = TaskwarriorAdapter("/some/taskrc")
+        assert adapter._parse_date("20240231T120000Z") is None
+        assert adapter._parse_date("20230229T120000Z") is None
+        assert adapter._parse_date("20230101T246000Z") is None
+        assert adapter._parse_date("20230101T126000Z") is None
+        assert adapter._parse_date("20240229T000000Z") == 1709164800
+
     def test_parse_date_invalid(self):
         """Test parsing an invalid date string."""
         adapter = TaskwarriorAdapter()